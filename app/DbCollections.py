@@ -6,6 +6,8 @@ class DbCollections(object):
         self.__dict__['notifications'] = 'Notifications'
         self.__dict__['libraries'] = 'Libraries'
         self.__dict__['campaign_libraries'] = 'Campaign_Libraries'
+        self.__dict__['counters'] = 'Counters'
+        self.__dict__['tombstones'] = 'Tombstones'
 
     def __getitem__(self, item):
         return self.__dict__[item]
@@ -0,0 +1,49 @@
+from pymongo import ASCENDING, DESCENDING
+
+
+class DbIndexes(object):
+    """This class declares the indexes of the collections in DbCollections, one list per collection.
+       Each index has a 'name' and 'keys' in the format of pymongo.IndexModel, and optionally 'options'
+       passed on to create_index.
+       The indexes are created at server startup by ffcs_db_utils.ensure_indexes"""
+    def __init__(self):
+        self.__dict__['plates'] = [
+            {'name': 'userAccount_campaignId_plateId',
+             'keys': [('userAccount', ASCENDING), ('campaignId', ASCENDING), ('plateId', ASCENDING)]},
+            {'name': 'plateId', 'keys': [('plateId', ASCENDING)]},
+        ]
+        self.__dict__['wells'] = [
+            {'name': 'userAccount_campaignId_plateId',
+             'keys': [('userAccount', ASCENDING), ('campaignId', ASCENDING), ('plateId', ASCENDING)]},
+            {'name': 'plateId_well',
+             'keys': [('plateId', ASCENDING), ('well', ASCENDING)]},
+            {'name': 'plateId_wellEcho_soakStatus',
+             'keys': [('plateId', ASCENDING), ('wellEcho', ASCENDING), ('soakStatus', ASCENDING)]},
+            {'name': 'userAccount_campaignId_fished_shifterTimeOfDeparture',
+             'keys': [('userAccount', ASCENDING), ('campaignId', ASCENDING), ('fished', ASCENDING),
+                      ('shifterTimeOfDeparture', DESCENDING)]},
+        ]
+        self.__dict__['notifications'] = [
+            {'name': 'userAccount_campaignId_createdOn',
+             'keys': [('userAccount', ASCENDING), ('campaignId', ASCENDING), ('createdOn', ASCENDING)]},
+        ]
+        self.__dict__['libraries'] = []
+        self.__dict__['campaign_libraries'] = [
+            {'name': 'userAccount_campaignId',
+             'keys': [('userAccount', ASCENDING), ('campaignId', ASCENDING)]},
+            {'name': 'fragments.compoundCode',
+             'keys': [('fragments.compoundCode', ASCENDING)]},
+        ]
+        self.__dict__['counters'] = []
+        # tombstones are only read through the change stream of get_changes_since, which carries
+        # the inserted document, so they can expire after about the oplog window
+        self.__dict__['tombstones'] = [
+            {'name': 'deletedOn_ttl', 'keys': [('deletedOn', ASCENDING)],
+             'options': {'expireAfterSeconds': 7 * 24 * 3600}},
+        ]
+
+    def __getitem__(self, item):
+        return self.__dict__[item]
+
+    def items(self):
+        return self.__dict__.items()
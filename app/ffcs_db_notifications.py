@@ -0,0 +1,260 @@
+"""
+Fan-out of FFCS DB notifications to the clients subscribed to a user and campaign.
+
+One NotificationHub per server process follows the Notifications collection in a background thread
+and hands every new notification to the asyncio queues of the subscribers of its user and campaign.
+However many GUIs are connected, the database sees a single change stream (or, on a standalone
+server without change streams, a single poll per second).
+
+NotificationCoalescer is the sending side: ffcs_db_utils.send_notification hands it the notifications,
+and bursts of them are inserted as one document.
+
+ObjectIds are not a safe resume position: they are made by the clients, so their order is not the
+order in which the notifications were inserted. A stream is resumed from the change stream resume
+token instead, or without change streams from createdOn with an overlap window, and what is read
+twice is dropped by the _id of the notification (RecentIds).
+"""
+import asyncio
+import base64
+import collections
+import datetime
+import threading
+
+import bson
+import pymongo
+
+
+def encode_event_id(notification, resume_token=None):
+    """
+    Opaque id of a notification event, from which a client resumes the stream: the change stream resume
+    token of the notification (if it came from a change stream), its createdOn and its _id.
+    """
+    created_on = notification.get('createdOn')
+    if not isinstance(created_on, datetime.datetime):
+        # createdOn is in server local time, the _id time in UTC
+        created_on = notification['_id'].generation_time.astimezone().replace(tzinfo=None)
+    event_id = {'c': created_on, 'i': notification['_id']}
+    if resume_token is not None:
+        event_id['r'] = resume_token
+    return base64.urlsafe_b64encode(bson.encode(event_id)).decode('ascii')
+
+
+def decode_event_id(event_id):
+    """
+    Returns (resume token or None, createdOn) of an id made by encode_event_id.
+    Raises ValueError if it is malformed.
+    """
+    try:
+        decoded = bson.decode(base64.urlsafe_b64decode(event_id.encode('ascii')))
+        return decoded.get('r'), decoded['c']
+    except Exception:
+        raise ValueError('Invalid notification event id: {}'.format(event_id))
+
+
+class RecentIds:
+    """
+    Bounded set of the _ids of the most recently delivered notifications. Resuming from a position
+    delivers some notifications again; they are recognized here and dropped.
+    """
+    def __init__(self, max_size=10000):
+        self._ids = collections.OrderedDict()
+        self._max_size = max_size
+
+    def add(self, doc_id):
+        """Records doc_id, returns False if it was delivered already"""
+        if doc_id in self._ids:
+            return False
+        self._ids[doc_id] = None
+        if len(self._ids) > self._max_size:
+            self._ids.popitem(last=False)
+        return True
+
+
+class NotificationHub:
+    CHANGE_STREAM_LOST_CODES = (280, 286)  # ChangeStreamFatalError, ChangeStreamHistoryLost: cannot resume
+
+    def __init__(self, db_client, poll_interval=1.0):
+        """
+        :param db_client: ffcs_db_utils instance
+        :param poll_interval: seconds between polls when change streams are not available
+        """
+        self._client = db_client
+        self._poll_interval = poll_interval
+        self._subscribers = {}  # (userAccount, campaignId) -> set of (event loop, asyncio.Queue)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._delivered = RecentIds()  # notifications published already
+        # createdOn of the newest notification published, to catch up from; createdOn is stored in
+        # server local time, like in send_notification
+        self._since = datetime.datetime.now()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='ffcs_db_notifications', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def subscribe(self, user_account, campaign_id):
+        """
+        Returns an asyncio.Queue receiving the new notifications of the user and campaign, as
+        (notification, change stream resume token or None) pairs
+        """
+        queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault((user_account, campaign_id), set()).add(subscriber)
+        return queue
+
+    def unsubscribe(self, user_account, campaign_id, queue):
+        key = (user_account, campaign_id)
+        with self._lock:
+            subscribers = self._subscribers.get(key, set())
+            subscribers.difference_update({subscriber for subscriber in subscribers if subscriber[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(key, None)
+
+    def publish(self, notification, resume_token=None):
+        """Hands a notification to its subscribers. Safe to call from any thread"""
+        key = (notification.get('userAccount'), notification.get('campaignId'))
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, (notification, resume_token))
+
+    def _deliver(self, notification, resume_token=None):
+        """Publishes a notification unless it was published already"""
+        if self._delivered.add(notification['_id']):
+            self.publish(notification, resume_token)
+        created_on = notification.get('createdOn')
+        if isinstance(created_on, datetime.datetime):
+            self._since = max(self._since, created_on)
+
+    def _run(self):
+        try:
+            self._watch()
+        except pymongo.errors.OperationFailure as e:
+            print(f"Notification change stream not available ({e}), polling the Notifications collection instead")
+            self._poll()
+
+    def _watch(self):
+        """
+        Follows the change stream. A failed stream is resumed from its last resume token. If that fails
+        again, or the token is no longer in the oplog, a new stream is started and the notifications
+        created since the last one published are read from the collection, so none is lost in between.
+        """
+        resume_token = None
+        opened = False  # change streams are supported once a stream was opened
+        resumed = False  # the last failure was already answered by resuming from resume_token
+        catch_up = False
+        while not self._stop.is_set():
+            try:
+                with self._client.watch_notifications(resume_token, max_await_time_ms=1000) as stream:
+                    opened = True
+                    if catch_up:
+                        # the new stream starts now, what was inserted before comes from the collection
+                        for notification in self._client.get_notifications_since(self._since):
+                            self._deliver(notification)
+                        catch_up = False
+                    while not self._stop.is_set() and stream.alive:
+                        change = stream.try_next()
+                        if change is not None:
+                            self._deliver(change['fullDocument'], change['_id'])
+                            resumed = False
+                        resume_token = stream.resume_token
+            except pymongo.errors.OperationFailure as e:
+                if not opened:
+                    raise  # change streams are not supported at all
+                if resume_token is not None and not resumed and e.code not in self.CHANGE_STREAM_LOST_CODES:
+                    print(f"Notification change stream failed ({e}), resuming it")
+                    resumed = True
+                else:
+                    print(f"Notification change stream cannot be resumed ({e}), catching up from the collection")
+                    resume_token = None
+                    resumed = False
+                    catch_up = True
+                self._stop.wait(self._poll_interval)
+            except pymongo.errors.PyMongoError as e:
+                print(f"Notification change stream interrupted: {e}")
+                self._stop.wait(self._poll_interval)
+
+    def _poll(self):
+        while not self._stop.wait(self._poll_interval):
+            try:
+                # each poll reads the overlap window before the newest notification again, which catches
+                # the notifications inserted late; the ones published already are dropped by their _id
+                for notification in self._client.get_notifications_since(self._since):
+                    self._deliver(notification)
+            except pymongo.errors.PyMongoError as e:
+                print(f"Failed to poll notifications: {e}")
+
+
+class NotificationCoalescer:
+    """
+    Merges the notifications of the same user, campaign and type sent within a time window into one
+    notification document, so a burst of writes (e.g. an import) makes the GUIs refresh once.
+
+    The first notification of a burst opens the window; when it closes, a single document is inserted
+    with the number of merged notifications ('count') and the plate and well ids they reported.
+    """
+    MAX_IDS = 1000  # ids kept per merged notification, further ids only set 'idsTruncated'
+
+    def __init__(self, insert_notification, window_seconds):
+        """
+        :param insert_notification: callable inserting one notification document
+        :param window_seconds: length of the coalescing window
+        """
+        self._insert_notification = insert_notification
+        self._window_seconds = window_seconds
+        self._pending = {}  # (userAccount, campaignId, notification_type) -> merged notification
+        self._lock = threading.Lock()
+
+    def add(self, user_account, campaign_id, notification_type, plate_ids=None, well_ids=None):
+        key = (user_account, campaign_id, notification_type)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = {'count': 0, 'plateIds': {}, 'wellIds': {}, 'idsTruncated': False}
+                self._pending[key] = pending
+                timer = threading.Timer(self._window_seconds, self.flush, args=(key,))
+                timer.daemon = True
+                timer.start()
+            pending['count'] += 1
+            for field, ids in (('plateIds', plate_ids), ('wellIds', well_ids)):
+                for doc_id in ids or ():
+                    if len(pending[field]) >= self.MAX_IDS:
+                        pending['idsTruncated'] = True
+                        break
+                    pending[field][doc_id] = None  # dict as an insertion ordered set
+
+    def flush(self, key):
+        """Inserts the merged notification of key, if there is one"""
+        with self._lock:
+            pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        user_account, campaign_id, notification_type = key
+        notification = {
+            'userAccount': user_account,
+            'campaignId': campaign_id,
+            'createdOn': datetime.datetime.now(),
+            'notification_type': notification_type,
+            'count': pending['count'],
+            'plateIds': list(pending['plateIds']),
+            'wellIds': list(pending['wellIds']),
+            'idsTruncated': pending['idsTruncated']
+        }
+        try:
+            self._insert_notification(notification)
+        except pymongo.errors.PyMongoError as e:
+            print(f"Failed to insert notification {key}: {e}")
+
+    def flush_all(self):
+        """Inserts all pending notifications now, e.g. at shutdown"""
+        with self._lock:
+            keys = list(self._pending)
+        for key in keys:
+            self.flush(key)
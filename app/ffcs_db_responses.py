@@ -0,0 +1,168 @@
+"""
+Response classes of ffcs_db_server.
+
+Documents read from FFCS DB contain ObjectIds, datetimes and Decimal128 values, which FastAPI's
+generic jsonable_encoder cannot serialize. BSONJSONResponse encodes them in a single pass, using
+orjson when it is installed and the standard library json module otherwise:
+
+    ObjectId   -> str
+    datetime   -> ISO 8601 string (as datetime.isoformat())
+    Decimal128 -> float
+
+Endpoints return BSONJSONResponse(content) directly, which also skips FastAPI's jsonable_encoder.
+
+Large listings can also be streamed as NDJSON (one JSON document per line) when the client sends
+'Accept: application/x-ndjson', see accepts_ndjson() and ndjson_lines().
+
+Read endpoints return negotiated_response(request, content), which honours the Accept header and
+keeps the BSON types intact for clients that can decode them:
+
+    application/bson     BSONResponse: the documents as a sequence of BSON documents, decoded on
+                         the client with bson.decode_all(). A dict is sent as one document, a list
+                         as one document per item.
+    application/msgpack  MsgPackResponse (only when msgpack is installed): ObjectId is sent as
+                         ExtType(7, oid.binary), datetime as a msgpack Timestamp. Datetimes in FFCS
+                         DB are naive, they are packed as if UTC, so unpacking with timestamp=3 and
+                         dropping tzinfo gives back the stored value.
+    anything else        BSONJSONResponse
+"""
+import datetime
+import json
+from decimal import Decimal
+
+import bson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from bson.raw_bson import RawBSONDocument
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, application/msgpack is then answered with JSON
+    msgpack = None
+
+BSON_MEDIA_TYPE = 'application/bson'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+OBJECT_ID_EXT_TYPE = 7  # same code as the BSON ObjectId element type
+
+
+def bson_default(obj):
+    """Encodes the types that are not JSON serializable as such. Used as 'default' by the JSON backend"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal128):
+        return float(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if isinstance(obj, RawBSONDocument):
+        return dict(obj.items())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(content) -> bytes:
+    """Serializes content, which may contain BSON types, to JSON"""
+    if orjson is not None:
+        return orjson.dumps(content, default=bson_default,
+                            option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=bson_default, ensure_ascii=False, allow_nan=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+
+SSE_MEDIA_TYPE = 'text/event-stream'
+SSE_HEARTBEAT = b': heartbeat\n\n'
+
+
+def sse_event(document, event='notification', event_id=None) -> bytes:
+    """Formats a document as a Server-Sent Event. The event id, from which a client resumes, defaults to its _id"""
+    if event_id is None:
+        event_id = str(document['_id'])
+    return b'id: ' + event_id.encode('ascii') + b'\nevent: ' + event.encode('ascii') + \
+        b'\ndata: ' + dumps(document) + b'\n\n'
+
+
+def without_nulls(documents):
+    """
+    Drops the top level fields whose value is null from a document or a list of documents, for the
+    omit_nulls response mode. Readers fill the missing fields in from the schema defaults.
+    """
+    if documents is None:
+        return None
+    if isinstance(documents, dict):
+        return {key: value for key, value in documents.items() if value is not None}
+    return [without_nulls(document) for document in documents]
+
+
+def accepts_ndjson(request) -> bool:
+    """True if the client asked for a streamed NDJSON response in its Accept header"""
+    return NDJSON_MEDIA_TYPE in request.headers.get('accept', '')
+
+
+def ndjson_lines(documents) -> bytes:
+    """Serializes documents to NDJSON, one document per line"""
+    return b''.join(dumps(document) + b'\n' for document in documents)
+
+
+class BSONJSONResponse(JSONResponse):
+    """JSON response that natively encodes ObjectId, datetime and Decimal128"""
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class BSONResponse(Response):
+    """Binary response with the content as a sequence of BSON documents, see the module docstring"""
+    media_type = BSON_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        if content is None:
+            return b''
+        documents = [content] if isinstance(content, dict) else content
+        return b''.join(document.raw if isinstance(document, RawBSONDocument) else bson.encode(document)
+                        for document in documents)
+
+
+def msgpack_default(obj):
+    """Encodes the BSON types msgpack does not know. Used as 'default' by msgpack.packb"""
+    if isinstance(obj, ObjectId):
+        return msgpack.ExtType(OBJECT_ID_EXT_TYPE, obj.binary)
+    if isinstance(obj, datetime.datetime):
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=datetime.timezone.utc)
+        return msgpack.Timestamp.from_datetime(obj)
+    if isinstance(obj, RawBSONDocument):
+        return dict(obj.items())
+    return bson_default(obj)
+
+
+class MsgPackResponse(Response):
+    """MessagePack response keeping ObjectIds and datetimes typed, see the module docstring"""
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        return msgpack.packb(content, default=msgpack_default, use_bin_type=True)
+
+
+def accepts_bson(request) -> bool:
+    """True if the client asked for BSON, i.e. raw documents can be passed through as they are"""
+    return BSON_MEDIA_TYPE in request.headers.get('accept', '')
+
+
+def negotiated_response(request, content):
+    """Returns content in the format asked for in the Accept header of the request, JSON by default"""
+    if accepts_bson(request):
+        return BSONResponse(content)
+    if MSGPACK_MEDIA_TYPE in request.headers.get('accept', '') and msgpack is not None:
+        return MsgPackResponse(content)
+    return BSONJSONResponse(content)
@@ -1,9 +1,15 @@
 # Standard Libraries
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from typing import List, Optional, Dict, Any
 
 # Third-Party Libraries
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from pymongo import MongoClient
 import pymongo
@@ -12,9 +18,27 @@ from bson import ObjectId, Timestamp
 from bson.json_util import dumps
 
 # Your Libraries
-from ffcs_db_utils import ffcs_db_utils, LibraryAlreadyImported
+from ffcs_db_utils import ffcs_db_utils, ChangesTokenExpired, ChangesTokenUnavailable, LibraryAlreadyImported, Settings
+from ffcs_db_responses import (BSONJSONResponse, BSONResponse, NDJSON_MEDIA_TYPE, SSE_HEARTBEAT, SSE_MEDIA_TYPE,
+                               accepts_bson, accepts_ndjson, ndjson_lines, negotiated_response, sse_event,
+                               without_nulls)
+from ffcs_db_notifications import NotificationHub, RecentIds, decode_event_id, encode_event_id
 
-app = FastAPI()
+app = FastAPI(default_response_class=BSONJSONResponse)
+
+### Response compression, configured in .env
+if Settings.COMPRESSION == 'br':
+    try:
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(BrotliMiddleware, quality=int(Settings.COMPRESSION_LEVEL),
+                           minimum_size=int(Settings.COMPRESSION_MIN_SIZE), gzip_fallback=True)
+    except ImportError:
+        print("brotli-asgi is not installed, falling back to gzip compression")
+        Settings.COMPRESSION = 'gzip'
+        Settings.COMPRESSION_LEVEL = min(int(Settings.COMPRESSION_LEVEL), 9)
+if Settings.COMPRESSION == 'gzip':
+    app.add_middleware(GZipMiddleware, minimum_size=int(Settings.COMPRESSION_MIN_SIZE),
+                       compresslevel=int(Settings.COMPRESSION_LEVEL))
 
 ### Pydantic base models
 class Plate(BaseModel):
@@ -135,7 +159,7 @@ class RedesolveRequest(BaseModel):
 
 class UpdateShifterFishingResultRequest(BaseModel):
     well_shifter_data: dict
-    xtal_name_index: int
+    xtal_name_index: Optional[int] = None  # ignored, the number is reserved when the result is written
     xtal_name_prefix: Optional[str] = 'xtal'
 
 class UpdateResult(BaseModel):
@@ -147,7 +171,7 @@ class UpdateResult(BaseModel):
 class UpdateSoakDurationData(BaseModel):
     user: str = Field(..., example="user1")
     campaign_id: str = Field(..., example="campaign1")
-    wells: List[Dict[str, Any]]
+    wells: List[Dict[str, Any]] = []
 
 class FragmentRequest(BaseModel):
     library: dict
@@ -162,6 +186,14 @@ class CampaignRequest(BaseModel):
     user: str
     campaign_id: str
 
+class BatchOperation(BaseModel):
+    name: str = Field(..., example="get_cryo_usage")
+    user: str = Field(..., example="user1")
+    campaign_id: str = Field(..., example="campaign1")
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
 class MarkExportedToXlsData(BaseModel):
     wells: List[Dict[str, Any]]
 
@@ -201,24 +233,137 @@ def serializable_update_result(result):
 
     return update_result
 
+def serializable_bulk_result(result):
+    # For the results of bulk operations given in the old update result format ('n', 'nModified', 'ok').
+    # Additional keys, such as the per-plate counts of the exports, are passed on in raw_result
+    update_result = UpdateResult(
+        matched_count=result['n'],
+        modified_count=result['nModified'],
+        upserted_id=None,
+        raw_result=result
+    )
+
+    return update_result
+
+def projection_from_query(fields: Optional[str] = None, exclude: Optional[str] = None):
+    """
+    Builds a MongoDB projection from comma separated ``fields`` (fields to return) or ``exclude``
+    (fields to drop) query parameters. Returns None when neither is given, i.e. full documents.
+    """
+    if fields and exclude:
+        raise HTTPException(status_code=400, detail="Use either fields or exclude, not both.")
+    if fields:
+        return {field.strip(): 1 for field in fields.split(',') if field.strip()}
+    if exclude:
+        return {field.strip(): 0 for field in exclude.split(',') if field.strip()}
+    return None
+
+async def campaign_etag(request: Request, user_account: str, campaign_id: str, notification_types,
+                        soak_durations: bool = False):
+    """
+    Builds a weak ETag from the versions of the given collections of a user and campaign (bumped by
+    every send_notification) and from what was asked for (path, query, Accept). Reading the versions is
+    a single lookup in the counters collection; the data itself is not touched.
+
+    With soak_durations (responses listing wells) the current minute is added while the campaign has
+    soaking wells, since their soakDuration grows without any write bumping the versions. Whether it has
+    them is stored with the versions, so Wells is only read once for campaigns notified before that.
+    """
+    versions = await run_db(client.get_collection_versions, user_account, campaign_id)
+    clock = None
+    if soak_durations:
+        soaking = versions.get('soaking')
+        if soaking is None:
+            soaking = await run_db(client.update_soaking_version, user_account, campaign_id)
+        if soaking:
+            clock = datetime.now().strftime('%Y-%m-%dT%H:%M')
+    fingerprint = repr((user_account, campaign_id, [versions.get(notification_type, 0) for notification_type in notification_types],
+                        clock, request.url.path, str(request.url.query), request.headers.get('accept', '')))
+    return 'W/"{}"'.format(hashlib.sha1(fingerprint.encode('utf-8')).hexdigest())
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True if the If-None-Match header of the request matches etag"""
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or etag[2:] in tags
+
+def with_etag(response: Response, etag: Optional[str]) -> Response:
+    if etag is not None:
+        response.headers['ETag'] = etag
+    return response
+
+async def run_db(db_operation, *args, **kwargs):
+    """
+    Runs a blocking ffcs_db_utils call in the database executor and awaits its result.
+
+    pymongo is synchronous, so calling it directly from an async endpoint stalls the event loop
+    and every other request on the worker. The executor is bounded by DB_MAX_WORKERS, which caps
+    the number of concurrent database operations; further calls queue until a thread is free.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, partial(db_operation, *args, **kwargs))
+
+def stream_ndjson(batches, omit_nulls: bool = False):
+    """
+    Streams the batches yielded by an ffcs_db_utils stream_* generator as NDJSON. Each batch is
+    fetched through run_db, so the cursor is iterated off the event loop and only one batch is
+    held in memory at a time.
+    """
+    async def ndjson_body():
+        try:
+            while True:
+                batch = await run_db(next, batches, None)
+                if batch is None:
+                    break
+                yield ndjson_lines(without_nulls(batch) if omit_nulls else batch)
+        finally:
+            await run_db(batches.close)
+
+    return StreamingResponse(ndjson_body(), media_type=NDJSON_MEDIA_TYPE)
+
 @app.on_event("startup")
 async def startup_event():
-    global client
+    global client, db_executor, notification_hub
+    db_executor = ThreadPoolExecutor(max_workers=int(Settings.DB_MAX_WORKERS),
+                                     thread_name_prefix='ffcs_db')
     client = ffcs_db_utils()
+    notification_hub = NotificationHub(client)
+    notification_hub.start()
+    try:
+        indexes = await run_db(client.ensure_indexes)
+        for collection_name, report in indexes.items():
+            if report['created']:
+                print(f"Created indexes on {collection_name}: {report['created']}")
+            for index_name, error in report['errors'].items():
+                print(f"Failed to create index {index_name} on {collection_name}: {error}")
+    except pymongo.errors.PyMongoError as e:
+        print(f"Failed to create indexes: {e}")
+    try:
+        retention = await run_db(client.ensure_notifications_retention)
+        if retention['action'] == 'capped':
+            print("Notifications is a capped collection, run POST /migrate_notifications to manage it with a TTL index")
+        elif retention['action'] != 'unchanged':
+            print(f"Notifications TTL index {retention['action']}: expireAfterSeconds={retention['expireAfterSeconds']}")
+    except pymongo.errors.PyMongoError as e:
+        print(f"Failed to set up the notifications retention: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    global client
+    global client, db_executor, notification_hub
+    notification_hub.stop()
+    db_executor.shutdown(wait=True)
     client.close()
 
 ### FETCH_TAG delete_by_id
 @app.delete("/delete_by_id/{collection}/{doc_id}")
 async def delete_by_id(collection: str, doc_id: str):
     """Delete a document by its id"""
-    result = client.delete_by_id(collection, doc_id)
+    result = await run_db(client.delete_by_id, collection, doc_id)
     if result:
-        return {"message": f"Document with id {doc_id} successfully deleted from {collection}",
-                "acknowledged": result}
+        return BSONJSONResponse({"message": f"Document with id {doc_id} successfully deleted from {collection}",
+                                 "acknowledged": result})
     else:
         raise HTTPException(status_code=404, detail="Document not found or delete operation was not acknowledged")
 ### FETCH_TAG delete_by_id
@@ -227,10 +372,10 @@ async def delete_by_id(collection: str, doc_id: str):
 @app.post("/delete_by_query/{collection}")
 async def delete_by_query(collection: str, query: dict):
     """Delete documents that match the provided query"""
-    result = client.delete_by_query(collection, query)
+    result = await run_db(client.delete_by_query, collection, query)
     if result:
-        return {"message": f"Documents matching the query {query} successfully deleted from {collection}",
-                "acknowledged": result}
+        return BSONJSONResponse({"message": f"Documents matching the query {query} successfully deleted from {collection}",
+                                 "acknowledged": result})
     else:
         raise HTTPException(status_code=404, detail="No documents matching the query found or delete operation was not acknowledged")
 ### FETCH_TAG delete_by_query
@@ -248,7 +393,7 @@ async def check_if_db_connected():
         HTTPException: If unable to connect to the database.
     """
     try:
-        client._client.server_info()
+        await run_db(client._client.server_info)
     except (pymongo.errors.ServerSelectionTimeoutError,
             pymongo.errors.AutoReconnect,
             pymongo.errors.OperationFailure):
@@ -256,9 +401,22 @@ async def check_if_db_connected():
         raise HTTPException(status_code=500, detail="Unable to connect to the database")
     
     ### Connection successful
-    return True
+    return BSONJSONResponse(True)
 ### FETCH_TAG check_if_db_connected
 
+### FETCH_TAG get_index_report
+@app.get("/get_index_report")
+async def get_index_report():
+    """
+    Reports which of the indexes declared in DbIndexes are present or missing in each collection,
+    and which existing indexes have not been used since the last database server restart.
+    """
+    try:
+        return BSONJSONResponse(await run_db(client.get_index_report))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+### FETCH_TAG get_index_report
+
 ### FETCH_TAG get_collection
 @app.get("/get_collection/{collection_name}")
 async def get_collection(collection_name: str):
@@ -275,19 +433,22 @@ async def get_collection(collection_name: str):
     global client
     # Using Python name mangling to access private method
     collection = client._ffcs_db_utils__get_collection(collection_name)
-    return {"collection": str(collection)}
+    return BSONJSONResponse({"collection": str(collection)})
 ### FETCH_TAG get_collection
 
 ### FETCH_TAG get_libraries
 @app.get("/get_libraries/")
-async def get_libraries() -> List[dict]:
+async def get_libraries(request: Request, limit: Optional[int] = None, after: Optional[str] = None) -> List[dict]:
     """
     FastAPI endpoint to retrieve a list of all libraries from the database.
 
     This endpoint calls the get_libraries method from the client to fetch all library records. Each record's
-    '_id' and 'libraryBarcode', which are MongoDB ObjectIds, are converted to strings for JSON compatibility.
+    '_id' and 'libraryBarcode', which are MongoDB ObjectIds, are encoded as strings by BSONJSONResponse.
     If an error occurs during this process, an HTTPException is raised with the appropriate error details.
 
+    With limit, one page ordered by _id is returned as {"libraries": [...], "next": token}; the next page
+    is requested with after=token.
+
     Returns:
         List[dict]: A list of dictionaries, each representing a library, with ObjectIds converted to strings.
 
@@ -295,58 +456,61 @@ async def get_libraries() -> List[dict]:
         HTTPException: If an exception occurs while fetching the libraries or processing the data.
     """
     try:
-        libraries = client.get_libraries()
-        for library in libraries:
-            library['_id'] = str(library['_id'])  # Convert the ObjectId to string for each library
-            if 'libraryBarcode' in library:
-                library['libraryBarcode'] = str(library['libraryBarcode'])  # Convert the ObjectId to string for each library
-        return libraries
+        libraries = await run_db(client.get_libraries, limit, after)
+        if limit:
+            return negotiated_response(request, {"libraries": libraries['items'], "next": libraries['next']})
+        return negotiated_response(request, libraries)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_libraries
 
 ### FETCH_TAG get_plate
 @app.get("/get_plate/{user_account}/{campaign_id}/{plate_id}")
-async def get_plate(user_account: str, campaign_id: str, plate_id: str):
-    plate = client.get_plate(user_account, campaign_id, plate_id)
-    if plate is not None:
-        plate['_id'] = str(plate['_id'])
-    return plate
+async def get_plate(request: Request, user_account: str, campaign_id: str, plate_id: str):
+    plate = await run_db(client.get_plate, user_account, campaign_id, plate_id)
+    return negotiated_response(request, plate)
 ### FETCH_TAG get_plate
 
 ### FETCH_TAG get_plates
 @app.get("/get_plates/{user_account}/{campaign_id}")
-async def get_plates(user_account: str, campaign_id: str):
-    plates_cursor = client.get_plates(user_account, campaign_id)
-    plates_list = list(plates_cursor)  # Converts the Cursor to a list
-    for plate in plates_list:
-        plate['_id'] = str(plate['_id'])
-    return plates_list
+async def get_plates(request: Request, user_account: str, campaign_id: str, fields: Optional[str] = None, exclude: Optional[str] = None):
+    projection = projection_from_query(fields, exclude)
+    # plate soak states also change with the exports notified as 'wells'
+    etag = await campaign_etag(request, user_account, campaign_id, ['plates', 'wells'])
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    if accepts_bson(request):
+        # raw passthrough, the documents are sent as read without decoding them
+        plates = await run_db(client.get_plates_raw, user_account, campaign_id, projection)
+        return with_etag(BSONResponse(plates), etag)
+    plates_cursor = client.get_plates(user_account, campaign_id, projection)
+    plates_list = await run_db(list, plates_cursor)  # Converts the Cursor to a list
+    return with_etag(negotiated_response(request, plates_list), etag)
 ### FETCH_TAG get_plates
 
 ### FETCH_TAG get_campaigns
 @app.get("/get_campaigns/{user_account}")
 async def get_campaigns(user_account: str):
-    campaigns_cursor = client.get_campaigns(user_account)
+    campaigns_cursor = await run_db(client.get_campaigns, user_account)
     campaigns_list = list(campaigns_cursor)
-    return campaigns_list
+    return BSONJSONResponse(campaigns_list)
 ### FETCH_TAG get_campaigns
 
 ### FETCH_TAG add_plate
 @app.post("/add_plate/", response_model=PlateResponse)
 async def add_plate(plate: Plate):
-    result = client.add_plate(plate.dict())
-    return {
+    result = await run_db(client.add_plate, plate.dict())
+    return BSONJSONResponse({
         "acknowledged": result.acknowledged,
         "inserted_id": str(result.inserted_id) if result.acknowledged else None
-    }
+    })
 ### FETCH_TAG add_plate
 
 ### FETCH_TAG add_well
 @app.post("/add_well/")
 async def add_well(well: Well):
     try:
-        result = client.add_well(well.dict())
+        result = await run_db(client.add_well, well.dict())
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -356,14 +520,14 @@ async def add_well(well: Well):
         "inserted_id": str(result.inserted_id) if result.acknowledged else None
     }
 
-    return response
+    return BSONJSONResponse(response)
 ### FETCH_TAG add_well
 
 ### FETCH_TAG add_campaign_library
 @app.post("/add_campaign_library/")
 async def add_campaign_library(campaign_library: CampaignLibrary):
     try:
-        result = client.add_campaign_library(campaign_library.dict())
+        result = await run_db(client.add_campaign_library, campaign_library.dict())
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -373,7 +537,7 @@ async def add_campaign_library(campaign_library: CampaignLibrary):
         "inserted_id": str(result.inserted_id) if result.acknowledged else None
     }
 
-    return response
+    return BSONJSONResponse(response)
 ### FETCH_TAG add_campaign_library
 
 ### FETCH_TAG insert_campaign_library
@@ -397,11 +561,11 @@ async def insert_campaign_library(campaign_library: CampaignLibrary) -> dict:
         HTTPException: If a RuntimeError occurs during the insertion process.
     """
     try:
-        result = client.insert_campaign_library(campaign_library.dict())
-        return {
+        result = await run_db(client.insert_campaign_library, campaign_library.dict())
+        return BSONJSONResponse({
             "acknowledged": result.acknowledged,
             "inserted_id": str(result.inserted_id) if result.acknowledged else None
-        }
+        })
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG insert_campaign_library
@@ -409,7 +573,17 @@ async def insert_campaign_library(campaign_library: CampaignLibrary) -> dict:
 ### FETCH_TAG add_wells
 @app.post("/add_wells/")
 async def add_wells(wells: List[Well]):
-    result = client.add_wells([well.dict() for well in wells])
+    """
+    Inserts a list of wells in bulk. Wells that could not be inserted are reported with their
+    index in the request body, the remaining wells are inserted regardless.
+    """
+    result = await run_db(client.add_wells, [well.dict() for well in wells])
+    return BSONJSONResponse({
+        "acknowledged": True,
+        "inserted_count": result['nInserted'],
+        "inserted_ids": [str(inserted_id) for inserted_id in result['insertedIds']],
+        "write_errors": result['writeErrors']
+    })
 ### FETCH_TAG add_wells
 
 ### FETCH_TAG update_by_object_id
@@ -426,7 +600,7 @@ async def update_by_object_id(update_doc: UpdateDocument):
         doc_id = bson.objectid.ObjectId(update_doc.doc_id)
         query = {'userAccount': update_doc.user_account, 'campaignId': update_doc.campaign_id, 'collection': update_doc.collection, '_id': doc_id}
         update = {'$set': update_doc.kwargs}
-        result = client.update_by_object_id(update_doc.user_account, update_doc.campaign_id, update_doc.collection, doc_id, **update_doc.kwargs)
+        result = await run_db(client.update_by_object_id, update_doc.user_account, update_doc.campaign_id, update_doc.collection, doc_id, **update_doc.kwargs)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -437,7 +611,7 @@ async def update_by_object_id(update_doc: UpdateDocument):
         "upserted_id": str(result.upserted_id) if result.upserted_id else None,
     }
 
-    return {"result": result_data}
+    return BSONJSONResponse({"result": result_data})
 ### FETCH_TAG update_by_object_id
 
 ### FETCH_TAG update_by_object_id_NEW
@@ -466,7 +640,7 @@ async def update_by_object_id_NEW(update_doc: UpdateDocument):
         doc_id = bson.objectid.ObjectId(update_doc.doc_id)
         query = {'userAccount': update_doc.user_account, 'campaignId': update_doc.campaign_id, 'collection': update_doc.collection, '_id': doc_id}
         update = {'$set': update_doc.kwargs}
-        result = client.update_by_object_id_NEW(update_doc.user_account, update_doc.campaign_id, update_doc.collection, doc_id, **update_doc.kwargs)
+        result = await run_db(client.update_by_object_id_NEW, update_doc.user_account, update_doc.campaign_id, update_doc.collection, doc_id, **update_doc.kwargs)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -478,14 +652,14 @@ async def update_by_object_id_NEW(update_doc: UpdateDocument):
     }
     """
 
-    return {"Result": result}
+    return BSONJSONResponse({"Result": result})
 ### FETCH_TAG update_by_object_id_NEW
 
 ### FETCH_TAG is_plate_in_database
 @app.get("/is_plate_in_database/{plate_id}")
 async def is_plate_in_database(plate_id: str):
-    result = client.is_plate_in_database(plate_id)
-    return {"exists": result}
+    result = await run_db(client.is_plate_in_database, plate_id)
+    return BSONJSONResponse({"exists": result})
 ### FETCH_TAG is_plate_in_database
 
 ### FETCH_TAG get_unselected_plates
@@ -493,13 +667,9 @@ async def is_plate_in_database(plate_id: str):
 async def get_unselected_plates(user_account: str):
     try:
         # Get the plates data
-        plates_data = client.get_unselected_plates(user_account)
-
-        # Convert the ObjectId to string
-        for item in plates_data:
-            item["_id"] = str(item["_id"])
+        plates_data = await run_db(client.get_unselected_plates, user_account)
 
-        return plates_data
+        return BSONJSONResponse(plates_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 ### FETCH_TAG get_unselected_plates
@@ -507,56 +677,70 @@ async def get_unselected_plates(user_account: str):
 ### FETCH_TAG mark_plate_done
 @app.put("/mark_plate_done")
 async def mark_plate_done(data: MarkPlateDone):
-    result = client.mark_plate_done(
+    result = await run_db(
+        client.mark_plate_done,
         data.user_account,
         data.campaign_id,
         data.plate_id,
         data.last_imaged,
         data.batch_id
     )
-    return {"Result": result}
+    return BSONJSONResponse({"Result": result})
 ### FETCH_TAG mark_plate_done
 
 ### FETCH_TAG get_all_wells
 @app.get("/get_all_wells/")
-async def get_all_wells(user_account: str, campaign_id: Optional[str] = None):
+async def get_all_wells(request: Request, user_account: str, campaign_id: Optional[str] = None,
+                        fields: Optional[str] = None, exclude: Optional[str] = None,
+                        batch_size: Optional[int] = None, limit: Optional[int] = None, after: Optional[str] = None,
+                        omit_nulls: bool = False):
+    projection = projection_from_query(fields, exclude)
+    etag = None
+    if campaign_id is not None:
+        etag = await campaign_etag(request, user_account, campaign_id, ['wells'], soak_durations=True)
+        if not_modified(request, etag):
+            return Response(status_code=304, headers={'ETag': etag})
+    if accepts_ndjson(request):
+        return with_etag(stream_ndjson(client.stream_all_wells(user_account, campaign_id, projection, batch_size),
+                                       omit_nulls), etag)
     try:
-        wells = client.get_all_wells(user_account, campaign_id)
-        return wells
-    except RuntimeError as e:
+        if accepts_bson(request) and not limit:
+            # raw passthrough, the documents are sent as read without decoding them
+            wells = await run_db(client.get_all_wells_raw, user_account, campaign_id, projection, omit_nulls)
+            return with_etag(BSONResponse(wells), etag)
+        wells = await run_db(client.get_all_wells, user_account, campaign_id, projection, limit, after)
+        if limit:
+            items = without_nulls(wells['items']) if omit_nulls else wells['items']
+            return with_etag(negotiated_response(request, {"wells": items, "next": wells['next']}), etag)
+        return with_etag(negotiated_response(request, without_nulls(wells) if omit_nulls else wells), etag)
+    except (RuntimeError, ValueError) as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_all_wells
 
 ### FETCH_TAG get_wells_from_plate
 @app.get("/get_wells_from_plate/")
-async def get_wells_from_plate(user_account: str, campaign_id: str, plate_id: str, kwargs: Optional[Dict[str, Any]] = {}):
+async def get_wells_from_plate(request: Request, user_account: str, campaign_id: str, plate_id: str,
+                               kwargs: Optional[Dict[str, Any]] = {},
+                               fields: Optional[str] = None, exclude: Optional[str] = None,
+                               batch_size: Optional[int] = None, omit_nulls: bool = False):
+    projection = projection_from_query(fields, exclude)
+    if accepts_ndjson(request):
+        return stream_ndjson(client.stream_wells_from_plate(user_account, campaign_id, plate_id,
+                                                            projection, batch_size, **kwargs), omit_nulls)
     try:
-        wells = client.get_wells_from_plate(user_account, campaign_id, plate_id, **kwargs)
-
-        # Convert the ObjectId to string
-        for well in wells:
-            well["_id"] = str(well["_id"])
-            # Only convert if libraryId is not None
-            if well["libraryId"] is not None:
-                well["libraryId"] = str(well["libraryId"])  # Convert the ObjectId to string
-
-        return wells
+        wells = await run_db(client.get_wells_from_plate, user_account, campaign_id, plate_id,
+                             projection=projection, **kwargs)
+        return negotiated_response(request, without_nulls(wells) if omit_nulls else wells)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_wells_from_plate
 
 ### FETCH_TAG get_one_well
 @app.get("/get_one_well/")
-async def get_one_well(well_id: str):
+async def get_one_well(request: Request, well_id: str, omit_nulls: bool = False):
     try:
-        well = client.get_one_well(ObjectId(well_id))
-        well["_id"] = str(well["_id"])  # Convert the ObjectId to string
-
-        # Only convert if libraryId is not None
-        if well["libraryId"] is not None:
-            well["libraryId"] = str(well["libraryId"])  # Convert the ObjectId to string
-
-        return well
+        well = await run_db(client.get_one_well, ObjectId(well_id))
+        return negotiated_response(request, without_nulls(well) if omit_nulls else well)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_one_well
@@ -565,9 +749,8 @@ async def get_one_well(well_id: str):
 @app.get("/get_one_campaign_library/")
 async def get_one_campaign_library(library_id: str):
     try:
-        library = client.get_one_campaign_library(ObjectId(library_id))
-        library["_id"] = str(library["_id"])  # Convert the ObjectId to string
-        return library
+        library = await run_db(client.get_one_campaign_library, ObjectId(library_id))
+        return BSONJSONResponse(library)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_one_campaign_library
@@ -593,13 +776,9 @@ async def get_one_library(library_id: str) -> dict:
     """
     try:
         # Convert string to ObjectId
-        library = client.get_one_library(ObjectId(library_id))
+        library = await run_db(client.get_one_library, ObjectId(library_id))
         if library:
-            # Convert ObjectId fields to strings
-            library["_id"] = str(library["_id"])
-            if "libraryBarcode" in library:
-                library["libraryBarcode"] = str(library["libraryBarcode"])
-            return library
+            return BSONJSONResponse(library)
         else:
             raise HTTPException(status_code=404, detail="Library not found")
     except Exception as e:
@@ -628,15 +807,17 @@ async def get_smiles(user_account: str, campaign_id: str, xtal_name: str) -> dic
         HTTPException: If an error occurs during the retrieval process, with a status code of 400 and the error detail.
     """
     try:
-        smiles = client.get_smiles(user_account, campaign_id, xtal_name)
-        return {"smiles": smiles}
+        smiles = await run_db(client.get_smiles, user_account, campaign_id, xtal_name)
+        return BSONJSONResponse({"smiles": smiles})
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_smiles
 
 ### FETCH_TAG get_not_matched_wells
 @app.get("/get_not_matched_wells/")
-async def get_not_matched_wells(user_account: str, campaign_id: str):
+async def get_not_matched_wells(request: Request, user_account: str, campaign_id: str,
+                                fields: Optional[str] = None, exclude: Optional[str] = None,
+                                omit_nulls: bool = False):
     """
     FastAPI endpoint to retrieve wells that are not matched based on specific criteria from the database. 
     The endpoint filters wells by user account and campaign ID, focusing on wells where 'compoundCode' is 
@@ -645,6 +826,8 @@ async def get_not_matched_wells(user_account: str, campaign_id: str):
     Args:
         user_account (str): The user account identifier.
         campaign_id (str): The campaign identifier.
+        fields (str, optional): Comma separated fields to return.
+        exclude (str, optional): Comma separated fields to leave out.
 
     Returns:
         List[dict]: A JSON response containing a list of dictionaries, each representing a well that matches 
@@ -654,14 +837,10 @@ async def get_not_matched_wells(user_account: str, campaign_id: str):
         HTTPException: If there is an issue with database access, query execution, or data transformation, 
                        it raises an HTTPException with status code 400.
     """
+    projection = projection_from_query(fields, exclude)
     try:
-        wells = client.get_not_matched_wells(user_account, campaign_id)
-
-        # Convert the ObjectId to string for each well
-        for well in wells:
-            well["_id"] = str(well["_id"])
-
-        return wells
+        wells = await run_db(client.get_not_matched_wells, user_account, campaign_id, projection)
+        return negotiated_response(request, without_nulls(wells) if omit_nulls else wells)
     except Exception as e:
         # Handle any exceptions and provide appropriate feedback via HTTP response
         raise HTTPException(status_code=400, detail=f"Failed to retrieve not matched wells: {e}")
@@ -694,8 +873,8 @@ async def get_id_of_plates_to_soak(user_account: str, campaign_id: str):
         access error, it raises an HTTPException with status code 400.
     """
     try:
-        plates = client.get_id_of_plates_to_soak(user_account, campaign_id)
-        return plates
+        plates = await run_db(client.get_id_of_plates_to_soak, user_account, campaign_id)
+        return BSONJSONResponse(plates)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_id_of_plates_to_soak
@@ -725,8 +904,8 @@ async def get_id_of_plates_to_cryo_soak(user_account: str, campaign_id: str):
         access error, it raises an HTTPException with status code 400.
     """
     try:
-        plates = client.get_id_of_plates_to_cryo_soak(user_account, campaign_id)
-        return plates
+        plates = await run_db(client.get_id_of_plates_to_cryo_soak, user_account, campaign_id)
+        return BSONJSONResponse(plates)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_id_of_plates_to_cryo_soak
@@ -757,8 +936,8 @@ async def get_id_of_plates_for_redesolve(user_account: str, campaign_id: str):
         access error, it raises an HTTPException with status code 400.
     """
     try:
-        plates = client.get_id_of_plates_for_redesolve(user_account, campaign_id)
-        return plates
+        plates = await run_db(client.get_id_of_plates_for_redesolve, user_account, campaign_id)
+        return BSONJSONResponse(plates)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_id_of_plates_for_redesolve
@@ -778,7 +957,7 @@ async def export_to_soak_selected_wells(export_data: ExportData) -> Dict[str, An
                                   where 'data' is a list of well dictionaries to be updated.
 
     Returns:
-        Dict[str, Any]: A dictionary with the operation result, typically None.
+        Dict[str, Any]: A dictionary with the matched and modified counts, including the count per plate.
 
     Raises:
         HTTPException: If a runtime error occurs during the process.
@@ -787,8 +966,8 @@ async def export_to_soak_selected_wells(export_data: ExportData) -> Dict[str, An
         # Convert the list of well objects to dictionaries for the update operation
         well_data_dicts = [well.dict() for well in export_data.data]
         # Invoke the utility function and pass the converted data
-        result = client.export_to_soak_selected_wells(export_data.user, export_data.campaign_id, well_data_dicts)
-        return {"result": result}
+        result = await run_db(client.export_to_soak_selected_wells, export_data.user, export_data.campaign_id, well_data_dicts)
+        return BSONJSONResponse({"result": result})
     except RuntimeError as e:
         # Convert RuntimeError to HTTPException to provide a proper HTTP error response
         raise HTTPException(status_code=400, detail=str(e))
@@ -816,8 +995,8 @@ async def export_cryo_to_soak_selected_wells(export_data: ExportData) -> Dict[st
     """
     try:
         # The request's body will be converted to a dictionary and passed as arguments.
-        result = client.export_cryo_to_soak_selected_wells(**export_data.dict())
-        return {"result": result}
+        result = await run_db(client.export_cryo_to_soak_selected_wells, **export_data.dict())
+        return BSONJSONResponse({"result": result})
     except RuntimeError as e:
         # If an exception occurs, it is caught and an HTTPException is raised with the error details.
         raise HTTPException(status_code=400, detail=str(e))
@@ -838,7 +1017,7 @@ async def export_redesolve_to_soak_selected_wells(export_data: ExportData):
                                   where 'data' is a list of well dictionaries to be updated.
 
     Returns:
-        dict: A dictionary with the operation result, typically None.
+        dict: A dictionary with the matched and modified counts, including the count per plate.
 
     Raises:
         HTTPException: An error with detailed message if the database update fails.
@@ -846,8 +1025,8 @@ async def export_redesolve_to_soak_selected_wells(export_data: ExportData):
     try:
         # Converting the well objects to dictionaries before passing to the utility function
         well_data_dicts = [well.dict() for well in export_data.data]
-        result = client.export_redesolve_to_soak_selected_wells(export_data.user, export_data.campaign_id, well_data_dicts)
-        return {"result": result}
+        result = await run_db(client.export_redesolve_to_soak_selected_wells, export_data.user, export_data.campaign_id, well_data_dicts)
+        return BSONJSONResponse({"result": result})
     except RuntimeError as e:
         # Convert RuntimeError to HTTPException to provide proper HTTP error response
         raise HTTPException(status_code=400, detail=str(e))
@@ -865,7 +1044,8 @@ async def export_to_soak(data: List[Dict[str, Any]]):
               Example: [{'_id': 'plateId', 'soak_time': '2023-01-01T00:00:00'}]
 
     Returns:
-        pymongo.results.UpdateResult: The result of the update operation from the database.
+        UpdateResult: Matched and modified wells over all plates; plate totals and the number
+        of wells modified per plate are in 'raw_result'.
 
     Raises:
         HTTPException: If there's an error during the update process with a status code of 400.
@@ -876,12 +1056,11 @@ async def export_to_soak(data: List[Dict[str, Any]]):
             item['soak_time'] = datetime.strptime(item['soak_time'], '%Y-%m-%dT%H:%M:%S.%f')
 
         # Call the client function to perform the update operation and get the result
-        result = client.export_to_soak(data)
+        result = await run_db(client.export_to_soak, data)
 
-        # Assuming 'serializable_update_result' is a function that serializes the update result
-        update_result = serializable_update_result(result)
+        update_result = serializable_bulk_result(result)
 
-        return update_result
+        return BSONJSONResponse(update_result)
     except RuntimeError as e:
         # Raise an HTTPException with the error detail if a runtime error occurs
         raise HTTPException(status_code=400, detail=str(e))
@@ -915,11 +1094,11 @@ async def export_redesolve_to_soak(data: List[Dict[str, Any]]) -> Dict[str, Any]
             item['soak_time'] = datetime.strptime(item['soak_time'], '%Y-%m-%dT%H:%M:%S.%f')
 
         # Call the utility function and get the result
-        result = client.export_redesolve_to_soak(data)
+        result = await run_db(client.export_redesolve_to_soak, data)
         # Convert the result to a serializable format
-        update_result = serializable_update_result(result)
+        update_result = serializable_bulk_result(result)
 
-        return update_result
+        return BSONJSONResponse(update_result)
     except RuntimeError as e:
         # If a runtime error occurs, raise an HTTPException with the error details
         raise HTTPException(status_code=400, detail=str(e))
@@ -950,10 +1129,10 @@ async def export_cryo_to_soak(data: List[Dict[str, Any]]) -> Dict[str, Any]:
             item['soak_time'] = datetime.strptime(item['soak_time'], '%Y-%m-%dT%H:%M:%S.%f')
 
         # Call to the utility function from the client to update the database collections
-        result = client.export_cryo_to_soak(data)
-        update_result = serializable_update_result(result)
+        result = await run_db(client.export_cryo_to_soak, data)
+        update_result = serializable_bulk_result(result)
 
-        return update_result
+        return BSONJSONResponse(update_result)
     except RuntimeError as e:
         # If there is an issue with the update operation, raise an HTTPException
         raise HTTPException(status_code=400, detail=str(e))
@@ -961,14 +1140,14 @@ async def export_cryo_to_soak(data: List[Dict[str, Any]]) -> Dict[str, Any]:
 
 ### FETCH_TAG import_soaking_results
 @app.post("/import_soaking_results/")
-async def import_soaking_results(wells_data: List[Dict[str, Any]]) -> Dict[str, str]:
+async def import_soaking_results(wells_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Endpoint to import soaking results, updates SoakStatus of wells to 'Done'.
 
     Accepts a list of dictionaries containing well data and invokes the
     'import_soaking_results' method from the client to process and update the
     soak status in the database. Upon successful completion, returns a
-    confirmation message.
+    confirmation message together with the match and modify result of each transfer.
 
     Args:
         wells_data (List[Dict[str, Any]]): A list of dictionaries, each containing data for
@@ -976,7 +1155,8 @@ async def import_soaking_results(wells_data: List[Dict[str, Any]]) -> Dict[str,
                                            'transferStatus'.
 
     Returns:
-        Dict[str, str]: A dictionary with the result message indicating successful import.
+        Dict[str, Any]: A dictionary with the result message, the total matched and modified
+                        counts, and the per-transfer results under 'transfers'.
 
     Raises:
         HTTPException: An exception with status code 400 is raised if there is a runtime
@@ -984,9 +1164,12 @@ async def import_soaking_results(wells_data: List[Dict[str, Any]]) -> Dict[str,
                        the raised exception.
     """
     try:
-        client.import_soaking_results(wells_data)
-        return {"result": "Soaking results imported successfully."}
-    except RuntimeError as e:
+        result = await run_db(client.import_soaking_results, wells_data)
+        return BSONJSONResponse({"result": "Soaking results imported successfully.",
+                                 "matched_count": result['nMatched'],
+                                 "modified_count": result['nModified'],
+                                 "transfers": result['transfers']})
+    except (RuntimeError, ValueError) as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG import_soaking_results
 
@@ -1017,7 +1200,8 @@ async def mark_soak_for_well_in_echo_done(data: Dict[str, Any]):
         transfer_status = data['transfer_status']
 
         # Call the utility client to update the soak status
-        result = client.mark_soak_for_well_in_echo_done(
+        result = await run_db(
+            client.mark_soak_for_well_in_echo_done,
             user=user,
             campaign_id=campaign_id,
             plate_id=plate_id,
@@ -1027,7 +1211,7 @@ async def mark_soak_for_well_in_echo_done(data: Dict[str, Any]):
         
         # Convert the update result to a serializable format
         update_result = serializable_update_result(result)
-        return update_result
+        return BSONJSONResponse(update_result)
 
     except Exception as e:
         # Re-raising as an HTTPException for the FastAPI framework to handle
@@ -1066,14 +1250,14 @@ async def add_cryo(data: Dict[str, Any]):
         cryo_barcode = data['cryo_barcode']
 
         # Call utility function to add cryoprotection details to the database
-        result = client.add_cryo(user_account, campaign_id, target_plate, target_well,
+        result = await run_db(client.add_cryo, user_account, campaign_id, target_plate, target_well,
                                  cryo_desired_concentration, cryo_transfer_volume,
                                  cryo_source_well, cryo_name, cryo_barcode)
         
         # Convert the update result to a serializable format
         update_result = serializable_update_result(result)
 
-        return update_result
+        return BSONJSONResponse(update_result)
     except RuntimeError as e:
         # Handle runtime errors during the cryo update process
         raise HTTPException(status_code=400, detail=str(e))
@@ -1100,11 +1284,11 @@ async def remove_cryo_from_well(well_id: str):
     """
     try:
         # Convert the string ID to an ObjectId and attempt to remove the cryo information.
-        result = client.remove_cryo_from_well(ObjectId(well_id))
+        result = await run_db(client.remove_cryo_from_well, ObjectId(well_id))
         # Serialize the update result to make it JSON serializable.
         update_result = serializable_update_result(result)
 
-        return update_result
+        return BSONJSONResponse(update_result)
     except Exception as e:  # Catch any exception, which is more generic than RuntimeError.
         # Return an HTTPException with status code 400, which indicates a client error.
         raise HTTPException(status_code=400, detail=str(e))
@@ -1135,10 +1319,10 @@ async def remove_new_solvent_from_well(well_id: str) -> Any:
         # Convert the well_id from a string to an ObjectId
         well_object_id = ObjectId(well_id)
         # Perform the removal of the new solvent using the utility function
-        result = client.remove_new_solvent_from_well(well_object_id)
+        result = await run_db(client.remove_new_solvent_from_well, well_object_id)
         # Serialize the update result to a dictionary
         update_result = serializable_update_result(result)
-        return update_result
+        return BSONJSONResponse(update_result)
     except (TypeError, PyMongoError) as e:
         # Raise an HTTPException if there's a problem with the database operation
         raise HTTPException(status_code=400, detail=str(e))
@@ -1161,10 +1345,10 @@ async def get_cryo_usage(user: str, campaign_id: str):
     """
     try:
         ### Execute get_cryo_usage function from client object and store result
-        cryo_usage_result = client.get_cryo_usage(user, campaign_id)
+        cryo_usage_result = await run_db(client.get_cryo_usage, user, campaign_id)
 
         ### Return the result as is, since it's expected to be in JSON-compatible format
-        return cryo_usage_result
+        return BSONJSONResponse(cryo_usage_result)
 
     except RuntimeError as runtime_err:
         ### Raise an HTTPException with a 400 status code in case of a RuntimeError
@@ -1190,10 +1374,10 @@ async def get_solvent_usage(user: str, campaign_id: str):
     
     try:
         ### Call the get_solvent_usage function from the client and store the result
-        solvent_usage_result = client.get_solvent_usage(user, campaign_id)
+        solvent_usage_result = await run_db(client.get_solvent_usage, user, campaign_id)
         
         ### Return the solvent usage information
-        return solvent_usage_result
+        return BSONJSONResponse(solvent_usage_result)
         
     except RuntimeError as runtime_error:
         ### Raise HTTP 400 Bad Request if RuntimeError occurs
@@ -1233,7 +1417,8 @@ async def redesolve_in_new_solvent(request: RedesolveRequest):
         redesolve_barcode = request.redesolve_barcode
         
         ### Call the utility function to update the database
-        result = client.redesolve_in_new_solvent(
+        result = await run_db(
+            client.redesolve_in_new_solvent,
             user_account, 
             campaign_id, 
             target_plate, 
@@ -1248,7 +1433,7 @@ async def redesolve_in_new_solvent(request: RedesolveRequest):
         update_result = serializable_update_result(result)
         
         ### Return the serialized result
-        return update_result
+        return BSONJSONResponse(update_result)
 
     except RuntimeError as e:
         ### Log the error and raise an HTTP Exception with a 400 status code
@@ -1280,13 +1465,14 @@ async def update_notes(request: UpdateNotesRequest):
     """
     try:
         ### Execute the update_notes function from the client and get the result
-        update_operation_result = client.update_notes(
+        update_operation_result = await run_db(
+            client.update_notes,
             request.user, request.campaign_id, request.doc_id, request.note)
         
         ### Serialize the update result to make it JSON compatible
         serialized_result = serializable_update_result(update_operation_result)
         
-        return serialized_result.raw_result
+        return BSONJSONResponse(serialized_result.raw_result)
     except RuntimeError as runtime_error:
         ### Handle Runtime Error and raise HTTP exception with status code 400
         raise HTTPException(status_code=400, detail=str(runtime_error))
@@ -1310,10 +1496,10 @@ async def is_crystal_already_fished(plate_id: str, well_id: str):
     """
     try:
         ### Call the utility function to get the fished status
-        result = client.is_crystal_already_fished(plate_id, well_id)
+        result = await run_db(client.is_crystal_already_fished, plate_id, well_id)
         
         ### Return the result as a dictionary
-        return {"result": result}
+        return BSONJSONResponse({"result": result})
     except RuntimeError as runtime_error:
         ### Raise HTTP 400 error if RuntimeError occurs
         raise HTTPException(status_code=400, detail=str(runtime_error))
@@ -1337,7 +1523,8 @@ async def update_shifter_fishing_result(request: UpdateShifterFishingResultReque
 
     try:
         ### Perform the update action by invoking the utility function
-        result = client.update_shifter_fishing_result(
+        result = await run_db(
+            client.update_shifter_fishing_result,
             request.well_shifter_data,
             request.xtal_name_index,
             request.xtal_name_prefix
@@ -1346,7 +1533,7 @@ async def update_shifter_fishing_result(request: UpdateShifterFishingResultReque
         ### Serialize the result for a standard output
         update_result = serializable_update_result(result)
 
-        return update_result
+        return BSONJSONResponse(update_result)
 
     except RuntimeError as e:
         ### Handle runtime exceptions by returning HTTP 400 status code
@@ -1363,19 +1550,20 @@ async def import_fishing_results(fishing_results: List[dict]):
     delegates the processing to the import_fishing_results method in the client.
     
     Returns:
-        - A serialized result of the last `update_shifter_fishing_result` operation.
+        - A serialized result with the matched and modified totals over all rows; 'raw_result'
+          also holds 'nSkipped', the number of rows for crystals that were already fished.
     
     Raises:
         - HTTPException: with status_code 400 if any RuntimeError is caught.
     """
     try:
         ### Delegate the operation to client's import_fishing_results function
-        result = client.import_fishing_results(fishing_results)
+        result = await run_db(client.import_fishing_results, fishing_results)
         
         ### Serialize the update result
-        update_result = serializable_update_result(result)
+        update_result = serializable_bulk_result(result)
         
-        return update_result
+        return BSONJSONResponse(update_result)
     except RuntimeError as e:
         ### Raise an HTTPException for any caught RuntimeError
         raise HTTPException(status_code=400, detail=str(e))
@@ -1401,12 +1589,12 @@ async def find_user_from_plate_id(plate_id: str) -> Any:
     HTTPException: Raised if there is a RuntimeError during the execution.
     """
     try:
-        result = client.find_user_from_plate_id(plate_id)
+        result = await run_db(client.find_user_from_plate_id, plate_id)
         if result:
-            return {"user": result["user"], "campaign_id": result["campaign_id"]}
+            return BSONJSONResponse({"user": result["user"], "campaign_id": result["campaign_id"]})
         else:
             ### No matching plate found in the database.
-            return {"user": None, "campaign_id": None}
+            return BSONJSONResponse({"user": None, "campaign_id": None})
     except RuntimeError as e:
         ### Log the RuntimeError for debugging purposes.
         print(f"RuntimeError occurred: {e}")
@@ -1415,30 +1603,30 @@ async def find_user_from_plate_id(plate_id: str) -> Any:
 
 ### FETCH_TAG find_last_fished_xtal
 @app.get("/find_last_fished_xtal/{user}/{campaign_id}")
-async def find_last_fished_xtal(user: str, campaign_id: str):
+async def find_last_fished_xtal(request: Request, user: str, campaign_id: str, limit: Optional[int] = None, after: Optional[str] = None):
     """
     Fetch the last fished xtal based on user and campaign ID.
     
     Parameters:
     - user: The user account identifier
     - campaign_id: The identifier for the campaign
+    - limit: Optional page size
+    - after: Optional 'next' token of the previous page
 
     Returns:
-    A JSON object containing the fished xtal details.
+    A JSON object containing the fished xtal details, and the "next" page token when limit is given.
 
     Raises:
     HTTPException if unable to fetch the fished xtal
     """
     try:
         ### Fetch fished xtals from database using the client utility function
-        fetched_xtals = client.find_last_fished_xtal(user, campaign_id)
-        
-        ### Convert ObjectIds to strings for JSON serialization
-        for xtal in fetched_xtals:
-            xtal["_id"] = str(xtal["_id"])
+        fetched_xtals = await run_db(client.find_last_fished_xtal, user, campaign_id, limit, after)
+        if limit:
+            return negotiated_response(request, {"result": fetched_xtals['items'], "next": fetched_xtals['next']})
         
-        return {"result": fetched_xtals}
-    except RuntimeError as runtime_error:
+        return negotiated_response(request, {"result": fetched_xtals})
+    except (RuntimeError, ValueError) as runtime_error:
         ### Handle errors by raising an HTTP Exception
         raise HTTPException(status_code=400, detail=str(runtime_error))
 ### FETCH_TAG find_last_fished_xtal
@@ -1455,37 +1643,69 @@ async def get_next_xtal_number(plate_id: str):
     """
     try:
         ### Fetch the next available xtal number using client utility function
-        next_number = client.get_next_xtal_number(plate_id)
+        next_number = await run_db(client.get_next_xtal_number, plate_id)
         
         ### Return the result as a JSON response
-        return {"next_xtal_number": next_number}
+        return BSONJSONResponse({"next_xtal_number": next_number})
     except RuntimeError as e:
         ### Handle runtime errors by returning an HTTP 400 status code
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_next_xtal_number
 
+### FETCH_TAG reserve_xtal_numbers
+@app.post("/reserve_xtal_numbers/{user}/{campaign_id}")
+async def reserve_xtal_numbers(user: str, campaign_id: str, count: int = 1):
+    """
+    Atomically reserve consecutive crystal numbers for a user and campaign.
+
+    :param user: The user account identifier
+    :param campaign_id: The identifier for the campaign
+    :param count: How many numbers to reserve
+    :return: A dictionary with the first reserved number and the count
+    """
+    try:
+        first_number = await run_db(client.reserve_xtal_numbers, user, campaign_id, count)
+        return BSONJSONResponse({"first_xtal_number": first_number, "count": count})
+    except (RuntimeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+### FETCH_TAG reserve_xtal_numbers
+
+### FETCH_TAG backfill_xtal_counters
+@app.post("/backfill_xtal_counters")
+async def backfill_xtal_counters():
+    """
+    One-off backfill of the xtal name counters of all campaigns from the existing xtalNames.
+    Idempotent, so it can safely be run again.
+
+    :return: A dictionary with the counter value of every campaign
+    """
+    try:
+        counters = await run_db(client.backfill_all_xtal_counters)
+        return BSONJSONResponse({"counters": counters})
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+### FETCH_TAG backfill_xtal_counters
+
 ### FETCH_TAG get_soaked_wells
 @app.get("/get_soaked_wells/{user}/{campaign_id}")
-async def get_soaked_wells(user: str, campaign_id: str):
+async def get_soaked_wells(request: Request, user: str, campaign_id: str, fields: Optional[str] = None, exclude: Optional[str] = None,
+                           omit_nulls: bool = False):
     """
     Endpoint to retrieve wells that are soaked but not yet fished for a given user and campaign.
 
     :param user: The user account
     :param campaign_id: The campaign identifier
+    :param fields: Optional comma separated fields to return
+    :param exclude: Optional comma separated fields to leave out
     :return: JSON response containing the list of soaked but not fished wells
     """
+    projection = projection_from_query(fields, exclude)
     try:
         # Fetch soaked wells using the utility function
-        result = client.get_soaked_wells(user, campaign_id)
-
-        # Convert MongoDB ObjectIds to string format for JSON serialization
-        if result:
-            for well in result:
-                well["_id"] = str(well["_id"])
-                well["libraryId"] = str(well["libraryId"])
+        result = await run_db(client.get_soaked_wells, user, campaign_id, projection)
 
         # Return the result as a JSON response
-        return {"result": result}
+        return negotiated_response(request, {"result": without_nulls(result) if omit_nulls else result})
 
     except RuntimeError as e:
         # Handle runtime errors and send HTTP 400 status
@@ -1503,10 +1723,10 @@ async def get_number_of_unsoaked_wells(user: str, campaign_id: str):
     """
     try:
         ### Fetch the count of unsoaked wells using the utility function from the client
-        unsoaked_count = client.get_number_of_unsoaked_wells(user, campaign_id)
+        unsoaked_count = await run_db(client.get_number_of_unsoaked_wells, user, campaign_id)
         
         ### Return the number of unsoaked wells in a dictionary format
-        return {"number_of_unsoaked_wells": unsoaked_count}
+        return BSONJSONResponse({"number_of_unsoaked_wells": unsoaked_count})
     except RuntimeError as e:
         ### Catch any runtime errors and return an HTTP 400 error
         raise HTTPException(status_code=400, detail=str(e))
@@ -1516,46 +1736,53 @@ async def get_number_of_unsoaked_wells(user: str, campaign_id: str):
 @app.put("/update_soaking_duration")
 async def update_soaking_duration(data: UpdateSoakDurationData):
     """
-    Update the soakDuration field for wells based on the input data.
+    Store the soakDuration field for the soaking wells of a campaign, in a single update.
+
+    The well read endpoints already return soakDuration computed from soakTransferTime,
+    so periodic calls of this endpoint are no longer needed.
     
     Parameters:
-        data (UpdateSoakDurationData): The input data containing user, campaign_id, and wells information.
+        data (UpdateSoakDurationData): The input data containing user, campaign_id and, optionally,
+                                       the wells ('_id') to restrict the update to.
     
     Returns:
         dict: A dictionary containing the update result, or an error message.
     """
-    # Convert string representations to appropriate data types for well fields
+    # Convert string representations to ObjectId for the well ids
     for well in data.wells:
         try:
             well['_id'] = bson.objectid.ObjectId(well['_id'])
-            well['soakTransferTime'] = datetime.fromisoformat(well['soakTransferTime'])
         except Exception as conversion_error:
             print(f"Data conversion failed: {conversion_error}")
-            return {"error": "Data conversion failed"}
+            return BSONJSONResponse({"error": "Data conversion failed"})
 
     # Update the soak duration using utility function
     try:
-        update_result = client.update_soaking_duration(
+        update_result = await run_db(
+            client.update_soaking_duration,
             data.user,
             data.campaign_id,
             data.wells
         )
     except Exception as update_error:
         print(f"Failed to update soaking duration: {update_error}")
-        return {"error": "Failed to update soaking duration"}
+        return BSONJSONResponse({"error": "Failed to update soaking duration"})
 
-    return update_result
+    return BSONJSONResponse(update_result)
 ### FETCH_TAG update_soaking_duration
 
 ### FETCH_TAG get_all_fished_wells
 @app.get("/get_all_fished_wells/{user}/{campaign_id}")
-async def get_all_fished_wells(user: str, campaign_id: str):
+async def get_all_fished_wells(request: Request, user: str, campaign_id: str, fields: Optional[str] = None, exclude: Optional[str] = None,
+                               omit_nulls: bool = False):
     """
     FastAPI endpoint to fetch all fished wells for a given user and campaign ID.
     
     Parameters:
     - user (str): The user account identifier.
     - campaign_id (str): The campaign identifier.
+    - fields (str, optional): Comma separated fields to return.
+    - exclude (str, optional): Comma separated fields to leave out.
     
     Returns:
     - JSON object containing the list of fished wells.
@@ -1563,15 +1790,12 @@ async def get_all_fished_wells(user: str, campaign_id: str):
     Raises:
     - HTTPException: An exception with a 400 status code if an error occurs.
     """
+    projection = projection_from_query(fields, exclude)
     try:
         ### Fetch all fished wells from the utility function
-        wells = client.get_all_fished_wells(user, campaign_id)
+        wells = await run_db(client.get_all_fished_wells, user, campaign_id, projection)
         
-        ### Convert MongoDB ObjectIds to strings for JSON serialization
-        for well in wells:
-            well["_id"] = str(well["_id"])
-        
-        return {"fished_wells": wells}
+        return negotiated_response(request, {"fished_wells": without_nulls(wells) if omit_nulls else wells})
         
     except Exception as e:
         ### Handle exceptions by raising HTTP errors with detailed messages
@@ -1590,10 +1814,8 @@ async def get_all_wells_not_exported_to_datacollection_xls(user: str, campaign_i
         dict: A dictionary containing a list of well data that meet the conditions.
     """
     try:
-        wells = client.get_all_wells_not_exported_to_datacollection_xls(user, campaign_id)
-        for well in wells:
-            well["_id"] = str(well["_id"])
-        return {"wells_not_exported_to_xls": wells}
+        wells = await run_db(client.get_all_wells_not_exported_to_datacollection_xls, user, campaign_id)
+        return BSONJSONResponse({"wells_not_exported_to_xls": wells})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_all_wells_not_exported_to_datacollection_xls
@@ -1605,15 +1827,15 @@ async def mark_exported_to_xls(data: MarkExportedToXlsData):
     Endpoint for marking wells as exported to XLS.
     
     :param data: Payload containing well data.
-    :return: A dictionary containing the update result.
+    :return: A dictionary containing the total matched and modified counts.
     """
     # Convert _id to ObjectId type
     for well_data in data.wells:
         well_data['_id'] = bson.objectid.ObjectId(well_data['_id'])
     
     # Use utility function to mark wells as exported
-    update_result = client.mark_exported_to_xls(data.wells)
-    return update_result
+    update_result = await run_db(client.mark_exported_to_xls, data.wells)
+    return BSONJSONResponse(update_result)
 ### FETCH_TAG mark_exported_to_xls
 
 ### FETCH_TAG send_notification
@@ -1631,9 +1853,9 @@ async def send_notification(user_account: str, campaign_id: str, notification_ty
     dict: A dictionary containing the status and inserted_id if successful, or raises an HTTPException.
     """
     try:
-        result = client.send_notification(user_account, campaign_id, notification_type)
+        result = await run_db(client.send_notification, user_account, campaign_id, notification_type, coalesce=False)
         if result:
-            return {"status": "success", "inserted_id": str(result.inserted_id)}
+            return BSONJSONResponse({"status": "success", "inserted_id": str(result.inserted_id)})
         else:
             raise HTTPException(status_code=500, detail="Notification not sent.")
     except Exception as e:
@@ -1642,30 +1864,152 @@ async def send_notification(user_account: str, campaign_id: str, notification_ty
 
 ### FETCH_TAG get_notifications
 @app.get("/get_notifications/{user_account}/{campaign_id}/{timestamp}")
-async def get_notifications(user_account: str, campaign_id: str, timestamp: datetime):
+async def get_notifications(request: Request, user_account: str, campaign_id: str, timestamp: datetime,
+                            limit: Optional[int] = None, after: Optional[str] = None,
+                            wait_seconds: float = 0):
     """
     Endpoint to retrieve notifications for a specified user account, campaign, and timestamp.
 
+    With wait_seconds the request is a long poll: if there are no notifications yet, the response is held
+    until a new one arrives or wait_seconds (at most NOTIFICATIONS_MAX_WAIT_SECONDS) have passed. The wait
+    is on the NotificationHub queue, so no database thread is blocked meanwhile.
+
     Args:
         user_account (str): The user account to filter notifications for.
         campaign_id (str): The campaign ID to filter notifications for.
         timestamp (datetime): The starting timestamp for filtering notifications.
+        limit (int, optional): Page size.
+        after (str, optional): The "next" token of the previous page.
+        wait_seconds (float, optional): How long to wait for a notification when there is none yet.
 
     Returns:
-        dict: A dictionary containing the list of notifications under the key "notifications".
+        dict: A dictionary containing the list of notifications under the key "notifications",
+              and the "next" page token when limit is given.
 
     Raises:
         HTTPException: If any error occurs during the operation.
     """
+    wait_seconds = min(max(wait_seconds, 0), float(Settings.NOTIFICATIONS_MAX_WAIT_SECONDS))
+    # subscribe before reading, so a notification inserted in between still ends the wait
+    queue = notification_hub.subscribe(user_account, campaign_id) if wait_seconds else None
     try:
         ### Fetch notifications using utility function
-        notifications = client.get_notifications(user_account, campaign_id, timestamp)
-        return {"notifications": notifications}
+        notifications = await run_db(client.get_notifications, user_account, campaign_id, timestamp, limit, after)
+        if queue is not None and not (notifications['items'] if limit else notifications):
+            try:
+                await asyncio.wait_for(queue.get(), timeout=wait_seconds)
+                notifications = await run_db(client.get_notifications, user_account, campaign_id, timestamp, limit, after)
+            except asyncio.TimeoutError:
+                pass
+        if limit:
+            return negotiated_response(request, {"notifications": notifications['items'], "next": notifications['next']})
+        return negotiated_response(request, {"notifications": notifications})
     except Exception as e:
         ### Handle exceptions by raising an HTTPException
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if queue is not None:
+            notification_hub.unsubscribe(user_account, campaign_id, queue)
 ### FETCH_TAG get_notifications
 
+### FETCH_TAG changes_since
+@app.get("/changes_since/{user_account}/{campaign_id}/{token}")
+async def changes_since(user_account: str, campaign_id: str, token: str):
+    """
+    Endpoint returning the wells and plates of a user and campaign changed since token, with their ids
+    and changed fields (see ffcs_db_utils.get_changes_since), so clients can update their local view
+    incrementally instead of calling get_all_wells again.
+
+    Use 'now' as token to only get a starting token, e.g. right after loading the campaign. Every
+    response carries the token for the next call; while 'complete' is False more changes are pending.
+
+    Raises:
+        HTTPException: 410 if the token is too old (reload the campaign), 503 if no starting token could
+                       be read yet (try again), 400 for any other error.
+    """
+    try:
+        changes = await run_db(client.get_changes_since, user_account, campaign_id,
+                               None if token == 'now' else token)
+        return BSONJSONResponse(changes)
+    except ChangesTokenExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ChangesTokenUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except (RuntimeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+### FETCH_TAG changes_since
+
+### FETCH_TAG migrate_notifications
+@app.post("/migrate_notifications")
+async def migrate_notifications():
+    """
+    One-off migration of the Notifications collection to a regular collection whose documents expire
+    after NOTIFICATIONS_RETENTION_DAYS. Converts a capped collection, fixes missing createdOn dates and
+    deletes expired notifications. Can safely be run again.
+
+    :return: A dictionary describing what was migrated
+    """
+    try:
+        result = await run_db(client.migrate_notifications)
+        return BSONJSONResponse(result)
+    except pymongo.errors.PyMongoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+### FETCH_TAG migrate_notifications
+
+### FETCH_TAG stream_notifications
+@app.get("/notifications/stream/{user_account}/{campaign_id}")
+async def stream_notifications(request: Request, user_account: str, campaign_id: str, after: Optional[str] = None):
+    """
+    Server-Sent Events stream of the notifications of a user and campaign, pushed as they are inserted.
+
+    Every event carries an opaque id made of the change stream resume token of the notification (when
+    the server follows the collection with a change stream), its createdOn and its _id. After a reconnect
+    the stream resumes from the id given by the Last-Event-ID header (sent by EventSource clients
+    automatically) or by the 'after' query parameter, so nothing inserted in between is lost: from the
+    resume token if there is one, otherwise from createdOn with an overlap window. Notifications read
+    twice are dropped by their _id. A comment line is sent as a heartbeat when there was no notification
+    for NOTIFICATIONS_HEARTBEAT_SECONDS.
+
+    Args:
+        user_account (str): The user account to stream notifications for.
+        campaign_id (str): The campaign ID to stream notifications for.
+        after (str, optional): Id of the last event received, as an alternative to Last-Event-ID.
+    """
+    resume_id = request.headers.get('last-event-id') or after
+    try:
+        resume_token, created_on = decode_event_id(resume_id) if resume_id else (None, None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    heartbeat = float(Settings.NOTIFICATIONS_HEARTBEAT_SECONDS)
+
+    async def events():
+        delivered = RecentIds()
+        # subscribe before catching up, so nothing inserted during the catch up is missed
+        queue = notification_hub.subscribe(user_account, campaign_id)
+        try:
+            if resume_id:
+                missed = await run_db(client.get_missed_notifications, user_account, campaign_id,
+                                      resume_token, created_on)
+                for notification, token in missed:
+                    if delivered.add(notification['_id']):
+                        yield sse_event(notification, event_id=encode_event_id(notification, token))
+            while True:
+                try:
+                    notification, token = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield SSE_HEARTBEAT
+                    continue
+                if not delivered.add(notification['_id']):
+                    continue  # already sent during the catch up
+                yield sse_event(notification, event_id=encode_event_id(notification, token))
+        finally:
+            notification_hub.unsubscribe(user_account, campaign_id, queue)
+
+    # Content-Encoding keeps the compression middleware from buffering the events
+    headers = {'Cache-Control': 'no-cache', 'Content-Encoding': 'identity', 'X-Accel-Buffering': 'no'}
+    return StreamingResponse(events(), media_type=SSE_MEDIA_TYPE, headers=headers)
+### FETCH_TAG stream_notifications
+
 ### FETCH_TAG add_fragment_to_well
 @app.post("/add_fragment_to_well/")
 async def add_fragment_to_well(fragment_request: FragmentRequest):
@@ -1691,7 +2035,8 @@ async def add_fragment_to_well(fragment_request: FragmentRequest):
         fragment_request.well_id = ObjectId(fragment_request.well_id)
 
         # Perform the add fragment operation
-        response = client.add_fragment_to_well(
+        response = await run_db(
+            client.add_fragment_to_well,
             fragment_request.library,
             fragment_request.well_id,
             fragment_request.fragment,
@@ -1700,7 +2045,7 @@ async def add_fragment_to_well(fragment_request: FragmentRequest):
             fragment_request.ligand_concentration,
             fragment_request.is_solvent_test
         )
-        return {"result": response}
+        return BSONJSONResponse({"result": response})
     except Exception as e:
         # Handle exceptions and return an appropriate HTTP response
         raise HTTPException(status_code=400, detail=str(e))
@@ -1728,8 +2073,8 @@ async def remove_fragment_from_well(well_id: str):
                        the error in an HTTP response with status code 400.
     """
     try:
-        response = client.remove_fragment_from_well(ObjectId(well_id))
-        return {"result": response}
+        response = await run_db(client.remove_fragment_from_well, ObjectId(well_id))
+        return BSONJSONResponse({"result": response})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG remove_fragment_from_well
@@ -1756,16 +2101,15 @@ async def import_library(library: dict) -> dict:
     """
     library['libraryBarcode'] = ObjectId(library['libraryBarcode'])
     try:
-        result = client.import_library(library)
-        result['_id'] = str(result['_id'])
-        return {"result": result}
+        result = await run_db(client.import_library, library)
+        return BSONJSONResponse({"result": result})
     except LibraryAlreadyImported as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG import_library
 
 ### FETCH_TAG get_campaign_libraries
 @app.post("/get_campaign_libraries/")  # We use POST because we are sending user & campaign_id in the request body
-async def get_campaign_libraries(query: CampaignRequest):
+async def get_campaign_libraries(request: Request, query: CampaignRequest, limit: Optional[int] = None, after: Optional[str] = None):
     """
     FastAPI endpoint to retrieve all libraries associated with a given user and campaign ID.
     
@@ -1775,21 +2119,26 @@ async def get_campaign_libraries(query: CampaignRequest):
 
     Args:
         query (CampaignRequest): A model representing the user and campaign ID for the query.
+        limit (int, optional): Page size. With limit the response is {"libraries": [...], "next": token}.
+        after (str, optional): The "next" token of the previous page.
 
     Returns:
         list: A list of dictionaries, each representing a library. The '_id' and 'libraryBarcode'
-              fields are converted to strings.
+              fields are converted to strings. The response carries an ETag; a request with a matching
+              If-None-Match header is answered with 304 and no body.
 
     Raises:
         HTTPException: If an exception occurs during the retrieval process.
     """
     try:
-        libraries = client.get_campaign_libraries(query.user, query.campaign_id)
-        for library in libraries:
-            library['_id'] = str(library['_id'])  # Convert the ObjectId to string for each library
-            if 'libraryBarcode' in library:
-                library['libraryBarcode'] = str(library['libraryBarcode'])  # Convert the ObjectId to string
-        return libraries
+        # fragments are marked as used by well updates, notified as 'wells'
+        etag = await campaign_etag(request, query.user, query.campaign_id, ['library', 'wells'])
+        if not_modified(request, etag):
+            return Response(status_code=304, headers={'ETag': etag})
+        libraries = await run_db(client.get_campaign_libraries, query.user, query.campaign_id, limit, after)
+        if limit:
+            return with_etag(negotiated_response(request, {"libraries": libraries['items'], "next": libraries['next']}), etag)
+        return with_etag(negotiated_response(request, libraries), etag)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 ### FETCH_TAG get_campaign_libraries
@@ -1816,13 +2165,71 @@ async def get_library_usage_count(user: str, campaign_id: str, library_id: str):
                        status code 400 and a detailed error message.
     """
     try:
-        count = client.get_library_usage_count(user, campaign_id, library_id)
-        return {"count": count}
+        count = await run_db(client.get_library_usage_count, user, campaign_id, library_id)
+        return BSONJSONResponse({"count": count})
     except Exception as e:
         # Providing a detailed error message for easier troubleshooting
         raise HTTPException(status_code=400, detail=f"Failed to retrieve library usage count: {e}")
 ### FETCH_TAG get_library_usage_count
 
+### FETCH_TAG batch
+# Read operations available in /batch, all called as client.<method>(user, campaign_id)
+BATCH_OPERATIONS = {
+    'get_plates': lambda user, campaign_id: list(client.get_plates(user, campaign_id)),
+    'get_all_wells': lambda user, campaign_id: client.get_all_wells(user, campaign_id),
+    'get_id_of_plates_to_soak': lambda user, campaign_id: client.get_id_of_plates_to_soak(user, campaign_id),
+    'get_id_of_plates_to_cryo_soak': lambda user, campaign_id: client.get_id_of_plates_to_cryo_soak(user, campaign_id),
+    'get_id_of_plates_for_redesolve': lambda user, campaign_id: client.get_id_of_plates_for_redesolve(user, campaign_id),
+    'get_cryo_usage': lambda user, campaign_id: client.get_cryo_usage(user, campaign_id),
+    'get_solvent_usage': lambda user, campaign_id: client.get_solvent_usage(user, campaign_id),
+    'get_number_of_unsoaked_wells': lambda user, campaign_id: client.get_number_of_unsoaked_wells(user, campaign_id),
+    'get_soaked_wells': lambda user, campaign_id: client.get_soaked_wells(user, campaign_id),
+    'get_all_fished_wells': lambda user, campaign_id: client.get_all_fished_wells(user, campaign_id),
+    'get_not_matched_wells': lambda user, campaign_id: client.get_not_matched_wells(user, campaign_id),
+    'get_campaign_libraries': lambda user, campaign_id: client.get_campaign_libraries(user, campaign_id),
+}
+BATCH_MAX_OPERATIONS = 50
+
+@app.post("/batch")
+async def batch(batch_request: BatchRequest):
+    """
+    Runs several read operations in one request, e.g. everything a campaign dashboard refresh needs.
+
+    The operations run concurrently in the database executor. Each one is reported separately, in the
+    order of the request, so one failing operation does not fail the others.
+
+    Args:
+        batch_request (BatchRequest): {"operations": [{"name": ..., "user": ..., "campaign_id": ...}, ...]},
+                                      where name is one of BATCH_OPERATIONS.
+
+    Returns:
+        dict: {"results": [{"name": ..., "result": ...} or {"name": ..., "error": ...}, ...]}, with the
+              results as returned by the ffcs_db_utils methods.
+
+    Raises:
+        HTTPException: 400 if more than BATCH_MAX_OPERATIONS operations are requested.
+    """
+    operations = batch_request.operations
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {BATCH_MAX_OPERATIONS} operations can be sent in one batch.")
+
+    async def run_operation(operation: BatchOperation):
+        if operation.name not in BATCH_OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation.name}")
+        return await run_db(BATCH_OPERATIONS[operation.name], operation.user, operation.campaign_id)
+
+    outcomes = await asyncio.gather(*(run_operation(operation) for operation in operations),
+                                    return_exceptions=True)
+    results = []
+    for operation, outcome in zip(operations, outcomes):
+        if isinstance(outcome, Exception):
+            results.append({"name": operation.name, "error": str(outcome)})
+        else:
+            results.append({"name": operation.name, "result": outcome})
+    return BSONJSONResponse({"results": results})
+### FETCH_TAG batch
+
 ### FETCH_TAG_TEST test_dummy_01
 def test_dummy_01(self):
     print("test_dummy_01")
@@ -3,8 +3,13 @@ import pymongo
 import datetime
 from dateutil import parser
 from DbCollections import DbCollections
+from DbIndexes import DbIndexes
+from ffcs_db_notifications import NotificationCoalescer
 import DbDataSchema
+import base64
 import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 import copy
 
 
@@ -14,7 +19,18 @@ import copy
 # Implemented Pydantic Settings for the ENV variables
 
 class Settings:
-    pass
+    # Optional settings, can be overridden in .env
+    DB_MAX_WORKERS = 16  # number of threads running blocking database calls for the async server
+    STREAM_BATCH_SIZE = 500  # documents fetched per round trip when streaming NDJSON listings
+    NOTIFICATIONS_COALESCE_SECONDS = 0.5  # notifications of a user, campaign and type within this window are merged, 0 disables
+    NOTIFICATIONS_RETENTION_DAYS = 7  # notifications older than this are deleted by a TTL index, 0 keeps them
+    NOTIFICATIONS_MAX_WAIT_SECONDS = 60  # upper bound for wait_seconds of long polling get_notifications
+    NOTIFICATIONS_HEARTBEAT_SECONDS = 15  # idle time after which the notification stream sends a heartbeat
+    NOTIFICATIONS_OVERLAP_SECONDS = 5  # without change streams, notifications created this much before the last one are read again
+    STORE_NULL_DEFAULTS = True  # False: new wells are stored without the fields whose default is null
+    COMPRESSION = 'gzip'  # response compression: gzip, br (needs brotli-asgi) or none
+    COMPRESSION_MIN_SIZE = 1000  # responses smaller than this (bytes) are sent uncompressed
+    COMPRESSION_LEVEL = 6  # gzip level 1-9, brotli quality 0-11
 
 def load_env_variables(file_path):
     with open(file_path, 'r') as file:
@@ -60,13 +76,16 @@ def send_notification(notification_type):
                     raise Exception('Sending notification implemented only for insert and update operations')
             if test:  # send notification only when insert or update was successful
                 self = args[0]  # enables methods of ffcsdbclient
+                plate_ids = None
                 if isinstance(args[1], dict):
                     user_account = args[1]['userAccount']
                     campaign_id = args[1]['campaignId']
+                    if 'plateId' in args[1]:
+                        plate_ids = [args[1]['plateId']]
                 else:
                     user_account = args[1]
                     campaign_id = args[2]
-                self.send_notification(user_account, campaign_id, notification_type)
+                self.send_notification(user_account, campaign_id, notification_type, plate_ids=plate_ids)
             return wrapped
         return wrapper
     return real_decorator
@@ -74,6 +93,12 @@ def send_notification(notification_type):
 class LibraryAlreadyImported(Exception):
     pass
 
+class ChangesTokenExpired(Exception):
+    pass
+
+class ChangesTokenUnavailable(Exception):
+    pass
+
 def print_update_result(result):
     print("Matched documents: ", result.matched_count)
     print("Modified documents: ", result.modified_count)
@@ -81,10 +106,28 @@ def print_update_result(result):
     print("Raw result: ", result.raw_result)
 
 class ffcs_db_utils(object):
+    NOTIFICATIONS_TTL_INDEX = 'createdOn_ttl'
+    TOMBSTONED_COLLECTIONS = ('wells', 'plates')  # deletes are recorded for get_changes_since
+    SOAK_DURATION_FIELDS = ('soakTransferTime', 'fished')  # read to compute soakDuration
+
     def __init__(self, database_uri=Settings.URI):
         ### MongoDB on Atlas ### 
-        self._client = MongoClient(database_uri, serverSelectionTimeoutMS=5000)
+        # The connection pool is sized to the server's database executor, so every worker thread gets a socket
+        self._client = MongoClient(database_uri, serverSelectionTimeoutMS=5000,
+                                   maxPoolSize=int(Settings.DB_MAX_WORKERS))
         self._db = self._client[Settings.DATABASE_NAME]
+        coalesce_seconds = float(Settings.NOTIFICATIONS_COALESCE_SECONDS)
+        self._notification_coalescer = None
+        if coalesce_seconds > 0:
+            self._notification_coalescer = NotificationCoalescer(self.__insert_notification, coalesce_seconds)
+
+    ### FETCH_TAG close
+    def close(self):
+        """Send the pending notifications and close the connection pool to the database"""
+        if self._notification_coalescer is not None:
+            self._notification_coalescer.flush_all()
+        self._client.close()
+    ### FETCH_TAG close
 
     ### FETCH_TAG delete_by_id
     def delete_by_id(self, collection_name, doc_id):
@@ -92,8 +135,7 @@ class ffcs_db_utils(object):
         -- Delete a document in the specified collection using its ObjectId.
         Added for the purpose of deleting documents created in the unittest integration test (Alexander Metz)
         """
-        collection = self.__get_collection(collection_name)
-        result = collection.delete_one({"_id": bson.ObjectId(doc_id)})
+        result = self.__delete_with_tombstones(collection_name, {"_id": bson.ObjectId(doc_id)}, many=False)
         return result.acknowledged
     ### FETCH_TAG delete_by_id
 
@@ -103,11 +145,32 @@ class ffcs_db_utils(object):
         -- Delete documents in the specified collection that match the provided query.
         Added for the purpose of deleting documents created in the unittest integration test (Alexander Metz)
         """
-        collection = self.__get_collection(collection_name)
-        result = collection.delete_many(query)
+        result = self.__delete_with_tombstones(collection_name, query)
         return result.acknowledged
     ### FETCH_TAG delete_by_query
 
+    ### FETCH_TAG delete_with_tombstones
+    def __delete_with_tombstones(self, collection_name, query, many=True):
+        """
+        Deletes the documents matching query. For wells and plates a tombstone with the user and campaign
+        of every deleted document is inserted, since a change stream delete event only has the _id and
+        get_changes_since must not report the deletes of other campaigns.
+        """
+        collection = self.__get_collection(collection_name)
+        if collection_name not in self.TOMBSTONED_COLLECTIONS:
+            return collection.delete_many(query) if many else collection.delete_one(query)
+        documents = list(collection.find(query, {'userAccount': 1, 'campaignId': 1}, limit=0 if many else 1))
+        result = collection.delete_many({'_id': {'$in': [document['_id'] for document in documents]}})
+        if documents:
+            deleted_on = datetime.datetime.now()
+            self.__get_collection('tombstones').insert_many([
+                {'collection': collection_name, 'documentId': document['_id'],
+                 'userAccount': document.get('userAccount'), 'campaignId': document.get('campaignId'),
+                 'deletedOn': deleted_on}
+                for document in documents])
+        return result
+    ### FETCH_TAG delete_with_tombstones
+
     ### FETCH_TAG get_collection
     def __get_collection(self, name):
         collection_name = getattr(DbCollections(), name)
@@ -115,6 +178,168 @@ class ffcs_db_utils(object):
         return collection
     ### FETCH_TAG get_collection
 
+    ### FETCH_TAG get_raw_collection
+    def __get_raw_collection(self, name):
+        """
+        Same collection, but documents are returned as RawBSONDocument: the BSON bytes from the
+        server, decoded lazily on access. Used by the read paths that pass documents through as BSON.
+        """
+        return self.__get_collection(name).with_options(
+            codec_options=CodecOptions(document_class=RawBSONDocument))
+    ### FETCH_TAG get_raw_collection
+
+    ### FETCH_TAG ensure_indexes
+    def ensure_indexes(self):
+        """
+        Creates the indexes declared in DbIndexes. Indexes that already exist are left untouched,
+        so this is safe to run at every startup.
+
+        Returns:
+            dict: {collection_name: {'created': [index names], 'errors': {index name: error message}}}
+                  where 'errors' lists indexes that could not be created, e.g. because an index with the
+                  same keys but other options already exists.
+        """
+        result = {}
+        for name, indexes in DbIndexes().items():
+            collection = self.__get_collection(name)
+            existing = self.__index_keys(collection)
+            report = {'created': [], 'errors': {}}
+            for index in indexes:
+                if self.__normalize_index_keys(index['keys']) in existing:
+                    continue
+                try:
+                    report['created'].append(collection.create_index(index['keys'], name=index['name'],
+                                                                     **index.get('options', {})))
+                except pymongo.errors.OperationFailure as e:
+                    report['errors'][index['name']] = str(e)
+            result[name] = report
+        return result
+    ### FETCH_TAG ensure_indexes
+
+    ### FETCH_TAG ensure_notifications_retention
+    def ensure_notifications_retention(self):
+        """
+        Creates, updates or drops the TTL index on Notifications.createdOn so that notifications are kept
+        for NOTIFICATIONS_RETENTION_DAYS. createdOn is stored in local time and TTL compares it with UTC,
+        so notifications live the time zone offset longer than the retention, which does not matter here.
+        A capped Notifications collection cannot have a TTL index, see migrate_notifications.
+
+        Returns:
+            dict: {'action': 'created' | 'updated' | 'unchanged' | 'dropped' | 'disabled' | 'capped',
+                   'expireAfterSeconds': int or None}
+        """
+        collection = self.__get_collection('notifications')
+        if collection.options().get('capped'):
+            return {'action': 'capped', 'expireAfterSeconds': None}
+        retention_days = float(Settings.NOTIFICATIONS_RETENTION_DAYS)
+        ttl_index = next((index for index in collection.list_indexes()
+                          if index['name'] == self.NOTIFICATIONS_TTL_INDEX), None)
+        if retention_days <= 0:
+            if ttl_index is None:
+                return {'action': 'disabled', 'expireAfterSeconds': None}
+            collection.drop_index(self.NOTIFICATIONS_TTL_INDEX)
+            return {'action': 'dropped', 'expireAfterSeconds': None}
+        expire_after_seconds = int(retention_days * 24 * 3600)
+        if ttl_index is None:
+            collection.create_index([('createdOn', pymongo.ASCENDING)], name=self.NOTIFICATIONS_TTL_INDEX,
+                                    expireAfterSeconds=expire_after_seconds)
+            action = 'created'
+        elif ttl_index.get('expireAfterSeconds') != expire_after_seconds:
+            self._db.command('collMod', collection.name,
+                             index={'name': self.NOTIFICATIONS_TTL_INDEX, 'expireAfterSeconds': expire_after_seconds})
+            action = 'updated'
+        else:
+            action = 'unchanged'
+        return {'action': action, 'expireAfterSeconds': expire_after_seconds}
+    ### FETCH_TAG ensure_notifications_retention
+
+    ### FETCH_TAG migrate_notifications
+    def migrate_notifications(self):
+        """
+        One-off migration of an existing Notifications collection to the TTL managed one:
+          1. a capped collection is copied into a regular one, which then replaces it (notifications
+             inserted while the copy runs are lost, so run it when the facility is quiet),
+          2. notifications without a date in createdOn get the creation time of their _id, in server local
+             time like the createdOn of new notifications (send_notification), so the TTL and the
+             createdOn queries treat old and new notifications alike,
+          3. notifications older than the retention are deleted right away,
+          4. the declared indexes and the TTL index are created.
+        Safe to run again.
+
+        Returns:
+            dict: {'uncapped': bool, 'createdOnFixed': int, 'deleted': int, 'ttl': ensure_notifications_retention()}
+        """
+        collection = self.__get_collection('notifications')
+        uncapped = False
+        if collection.options().get('capped'):
+            migrated_name = collection.name + '_migrated'
+            collection.aggregate([{'$match': {}}, {'$out': migrated_name}])
+            self._db[migrated_name].rename(collection.name, dropTarget=True)
+            uncapped = True
+        # $toDate of the _id would give UTC; the local time is computed here, per date for daylight saving
+        fixed = 0
+        requests = []
+        for notification in collection.find({'createdOn': {'$not': {'$type': 'date'}}}, {'_id': 1}):
+            created_on = notification['_id'].generation_time.astimezone().replace(tzinfo=None)
+            requests.append(pymongo.UpdateOne({'_id': notification['_id']}, {'$set': {'createdOn': created_on}}))
+            if len(requests) == 1000:
+                fixed += collection.bulk_write(requests, ordered=False).modified_count
+                requests = []
+        if requests:
+            fixed += collection.bulk_write(requests, ordered=False).modified_count
+        deleted = 0
+        retention_days = float(Settings.NOTIFICATIONS_RETENTION_DAYS)
+        if retention_days > 0:
+            cutoff = datetime.datetime.now() - datetime.timedelta(days=retention_days)
+            deleted = collection.delete_many({'createdOn': {'$lt': cutoff}}).deleted_count
+        self.ensure_indexes()
+        return {'uncapped': uncapped, 'createdOnFixed': fixed, 'deleted': deleted,
+                'ttl': self.ensure_notifications_retention()}
+    ### FETCH_TAG migrate_notifications
+
+    ### FETCH_TAG get_index_report
+    def get_index_report(self):
+        """
+        Reports, for every collection, which of the indexes declared in DbIndexes are present or missing,
+        and which existing indexes have not been used since the last server restart (from $indexStats).
+
+        Returns:
+            dict: {collection_name: {'present': [names], 'missing': [names], 'unused': [names] or None}}
+                  'unused' is None if $indexStats is not available, e.g. for lack of privileges.
+        """
+        report = {}
+        for name, indexes in DbIndexes().items():
+            collection = self.__get_collection(name)
+            existing = self.__index_keys(collection)
+            present = [index['name'] for index in indexes
+                       if self.__normalize_index_keys(index['keys']) in existing]
+            missing = [index['name'] for index in indexes
+                       if self.__normalize_index_keys(index['keys']) not in existing]
+            try:
+                unused = [stat['name'] for stat in collection.aggregate([{'$indexStats': {}}])
+                          if stat['name'] != '_id_' and stat['accesses']['ops'] == 0]
+            except pymongo.errors.OperationFailure:
+                unused = None
+            report[name] = {'present': present, 'missing': missing, 'unused': unused}
+        return report
+    ### FETCH_TAG get_index_report
+
+    ### FETCH_TAG normalize_index_keys
+    @staticmethod
+    def __normalize_index_keys(keys):
+        """
+        Key pattern as a comparable tuple. Numeric directions may come back as floats (1.0), special
+        index types ('text', 'hashed', '2dsphere', ...) are kept as strings.
+        """
+        return tuple((field, direction if isinstance(direction, str) else int(direction)) for field, direction in keys)
+    ### FETCH_TAG normalize_index_keys
+
+    ### FETCH_TAG index_keys
+    def __index_keys(self, collection):
+        """Returns the key patterns of the existing indexes of the collection"""
+        return {self.__normalize_index_keys(info['key']) for info in collection.index_information().values()}
+    ### FETCH_TAG index_keys
+
     ### FETCH_TAG merge_two_dictionaries
     def __merge_two_dictionaries(self, d1, d2):
         """
@@ -127,6 +352,137 @@ class ffcs_db_utils(object):
         return out
     ### FETCH_TAG merge_two_dictionaries
 
+    ### FETCH_TAG without_null_defaults
+    @staticmethod
+    def __without_null_defaults(document):
+        """
+        Drops the null fields of a new document when STORE_NULL_DEFAULTS is off. Queries on null
+        ({'field': None}) also match missing fields, so stored documents behave the same either way.
+        """
+        if str(Settings.STORE_NULL_DEFAULTS).lower() not in ('false', '0', 'no'):
+            return document
+        return {key: value for key, value in document.items() if value is not None}
+    ### FETCH_TAG without_null_defaults
+
+    ### FETCH_TAG projects_field
+    @staticmethod
+    def __projects_field(projection, field):
+        """
+        Tells whether a MongoDB projection (inclusion or exclusion style) returns the given field.
+        No projection returns every field.
+        """
+        if not projection:
+            return True
+        inclusive = any(value for key, value in projection.items() if key != '_id')
+        if inclusive:
+            return bool(projection.get(field))
+        return projection.get(field, 1) != 0
+    ### FETCH_TAG projects_field
+
+    ### FETCH_TAG wells_projection
+    def __wells_projection(self, projection):
+        """
+        Projections returning soakDuration also need the fields it is computed from (SOAK_DURATION_FIELDS).
+        __add_soak_duration drops them again if the caller's projection leaves them out.
+        """
+        if not projection or not self.__projects_field(projection, 'soakDuration'):
+            return projection
+        if any(value for key, value in projection.items() if key != '_id'):
+            return self.__merge_two_dictionaries(projection, {field: 1 for field in self.SOAK_DURATION_FIELDS})
+        return {key: value for key, value in projection.items() if key not in self.SOAK_DURATION_FIELDS}
+    ### FETCH_TAG wells_projection
+
+    ### FETCH_TAG add_soak_duration
+    def __add_soak_duration(self, wells, projection=None):
+        """
+        Computes soakDuration (in seconds) at read time for wells that are soaking, i.e. that have a
+        soakTransferTime and are not fished yet. Fished wells keep their stored soakDuration.
+        soakTransferTime is stored in server local time, so the local clock is used here as well.
+        Nothing is added when the projection leaves soakDuration out.
+        """
+        if not self.__projects_field(projection, 'soakDuration'):
+            return wells
+        unrequested = [field for field in self.SOAK_DURATION_FIELDS if not self.__projects_field(projection, field)]
+        now = datetime.datetime.now()
+        for well in wells:
+            soak_transfer_time = well.get('soakTransferTime')
+            if isinstance(soak_transfer_time, datetime.datetime) and not well.get('fished'):
+                well['soakDuration'] = (now - soak_transfer_time).total_seconds()
+            for field in unrequested:
+                well.pop(field, None)
+        return wells
+    ### FETCH_TAG add_soak_duration
+
+    ### FETCH_TAG encode_page_token
+    @staticmethod
+    def __encode_page_token(sort_value, doc_id):
+        """Opaque 'after' token pointing at the last document of a page: its sort key value and _id"""
+        return base64.urlsafe_b64encode(bson.encode({'k': sort_value, 'i': doc_id})).decode('ascii')
+    ### FETCH_TAG encode_page_token
+
+    ### FETCH_TAG decode_page_token
+    @staticmethod
+    def __decode_page_token(token):
+        try:
+            decoded = bson.decode(base64.urlsafe_b64decode(token.encode('ascii')))
+            return decoded['k'], decoded['i']
+        except Exception:
+            raise ValueError('Invalid page token: {}'.format(token))
+    ### FETCH_TAG decode_page_token
+
+    ### FETCH_TAG find_page
+    def __find_page(self, collection, query, limit, after=None, sort_key='_id',
+                    direction=pymongo.ASCENDING, projection=None):
+        """
+        Keyset pagination: returns at most limit documents matching query, ordered by sort_key and _id
+        (as a tie breaker) in the given direction, starting after the document the 'after' token points at.
+        Each page is a range scan on the index, not a skip over the previous pages.
+        :return: {'items': [...], 'next': token of the last item, or None on the last page}
+        """
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError('limit must be a positive integer')
+        if after:
+            last_value, last_id = self.__decode_page_token(after)
+            compare = '$gt' if direction == pymongo.ASCENDING else '$lt'
+            if sort_key == '_id':
+                keyset = {'_id': {compare: last_id}}
+            elif last_value is None:
+                # null sorts before any other value
+                keyset = {'$or': [{sort_key: None, '_id': {compare: last_id}}]}
+                if direction == pymongo.ASCENDING:
+                    keyset['$or'].append({sort_key: {'$ne': None}})
+            else:
+                keyset = {'$or': [{sort_key: {compare: last_value}},
+                                  {sort_key: last_value, '_id': {compare: last_id}}]}
+                if direction == pymongo.DESCENDING:
+                    keyset['$or'].append({sort_key: None})
+            query = {'$and': [query, keyset]}
+        sort = [('_id', direction)] if sort_key == '_id' else [(sort_key, direction), ('_id', direction)]
+        # the token is built from the sort key and _id, so they are read even if the projection leaves them out
+        hidden = []
+        if projection:
+            if projection.get('_id', 1) == 0:
+                hidden.append('_id')
+            if sort_key != '_id' and not self.__projects_field(projection, sort_key):
+                hidden.append(sort_key)
+            if any(value for key, value in projection.items() if key != '_id'):
+                projection = self.__merge_two_dictionaries(projection, {sort_key: 1, '_id': 1})
+            else:
+                projection = {key: value for key, value in projection.items() if key not in hidden} or None
+        # one extra document tells whether there is a next page
+        items = list(collection.find(query, projection).sort(sort).limit(limit + 1))
+        next_token = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_token = self.__encode_page_token(last.get(sort_key), last['_id'])
+        for item in items:
+            for field in hidden:
+                item.pop(field, None)
+        return {'items': items, 'next': next_token}
+    ### FETCH_TAG find_page
+
     ### FETCH_TAG update_by_object_id
     # @send_notification('wells') # blocks gui in long running loops. call refresh_all_content() after update instead
     def update_by_object_id(self, user, campaign_id, collection, doc_id, **kwargs):
@@ -185,13 +541,21 @@ class ffcs_db_utils(object):
     ### FETCH_TAG add_plate
 
     ### FETCH_TAG get_plates
-    def get_plates(self, user_account, campaign_id):
+    def get_plates(self, user_account, campaign_id, projection=None):
         query = {'userAccount': user_account, 'campaignId': campaign_id}
         collection = self.__get_collection('plates')
-        r = collection.find(query)
+        r = collection.find(query, projection)
         return r
     ### FETCH_TAG get_plates
 
+    ### FETCH_TAG get_plates_raw
+    def get_plates_raw(self, user_account, campaign_id, projection=None):
+        """Same plates as get_plates, returned as a list of RawBSONDocument without decoding them"""
+        query = {'userAccount': user_account, 'campaignId': campaign_id}
+        collection = self.__get_raw_collection('plates')
+        return list(collection.find(query, projection))
+    ### FETCH_TAG get_plates_raw
+
     ### FETCH_TAG get_plate
     def get_plate(self, user_account, campaign_id, plate_id):
         query = {'userAccount': user_account, 'plateId': plate_id, 'campaignId': campaign_id}
@@ -276,22 +640,68 @@ class ffcs_db_utils(object):
 
     # Group of methods for Wells
     ### FETCH_TAG add_wells
-    def add_wells(self, list_of_wells):
+    def add_wells(self, list_of_wells, chunk_size=1000):
+        """
+        Inserts a list of wells (usually a whole plate) with unordered insert_many calls.
+
+        Each well is validated through DbDataSchema.WellDataSchema first. Valid wells are sent in chunks of
+        chunk_size documents, so a plate costs one or a few round trips instead of one per well. Since the
+        inserts are unordered, a failing document does not stop the rest of the chunk.
+
+        Args:
+            list_of_wells (list): List of well dictionaries.
+            chunk_size (int): Maximum number of documents sent in one insert_many call.
+
+        Returns:
+            dict: {'nInserted': int, 'insertedIds': [ObjectId, ...],
+                   'writeErrors': [{'index': int, 'plateId': str, 'well': str, 'error': str}, ...]}
+                  where 'index' is the position of the failed well in list_of_wells.
+        """
+        collection = self.__get_collection('wells')
         user = None
         campaign_id = None
-        for incoming_well in list_of_wells:
-            user = incoming_well['userAccount']
-            campaign_id = incoming_well['campaignId']
-            well = DbDataSchema.WellDataSchema(incoming_well['userAccount'], incoming_well['campaignId'],
-                                               incoming_well['plateId'], incoming_well['well'],
-                                               incoming_well['wellEcho'], incoming_well['x'], incoming_well['y'],
-                                               incoming_well['xEcho'], incoming_well['yEcho'])
-            self.add_well(well)
-        ### time.sleep(0.1)
+        write_errors = []
+        wells = []  # (index in list_of_wells, validated well document)
+        for index, incoming_well in enumerate(list_of_wells):
+            try:
+                well = DbDataSchema.WellDataSchema(incoming_well['userAccount'], incoming_well['campaignId'],
+                                                   incoming_well['plateId'], incoming_well['well'],
+                                                   incoming_well['wellEcho'], incoming_well['x'], incoming_well['y'],
+                                                   incoming_well['xEcho'], incoming_well['yEcho'])
+                well = self.__without_null_defaults(well)
+            except Exception as e:
+                write_errors.append({'index': index, 'plateId': incoming_well.get('plateId'),
+                                     'well': incoming_well.get('well'), 'error': str(e)})
+                continue
+            wells.append((index, well))
+
+        inserted_ids = []
+        plate_ids = {}
+        for start in range(0, len(wells), chunk_size):
+            chunk = wells[start:start + chunk_size]
+            documents = [well for _, well in chunk]
+            failed = set()
+            try:
+                collection.insert_many(documents, ordered=False)
+            except pymongo.errors.BulkWriteError as e:
+                for error in e.details['writeErrors']:
+                    index, well = chunk[error['index']]
+                    failed.add(error['index'])
+                    write_errors.append({'index': index, 'plateId': well['plateId'], 'well': well['well'],
+                                         'error': error['errmsg']})
+            for position, (_, well) in enumerate(chunk):
+                if position not in failed:
+                    inserted_ids.append(well['_id'])
+                    plate_ids[well['plateId']] = None
+                    user = well['userAccount']
+                    campaign_id = well['campaignId']
 
         # Send notification only if at least one well was inserted to database
         if user is not None and campaign_id is not None:
-            self.send_notification(user, campaign_id, 'wells')
+            self.send_notification(user, campaign_id, 'wells', plate_ids=list(plate_ids), well_ids=inserted_ids)
+
+        write_errors.sort(key=lambda error: error['index'])
+        return {'nInserted': len(inserted_ids), 'insertedIds': inserted_ids, 'writeErrors': write_errors}
     ### FETCH_TAG add_wells
 
     ### FETCH_TAG add_well
@@ -301,7 +711,7 @@ class ffcs_db_utils(object):
         collection = self.__get_collection('wells')
         collection_name = DbCollections().wells
         try:
-            r = collection.insert_one(well)
+            r = collection.insert_one(self.__without_null_defaults(well))
         except pymongo.errors.WriteError as e:
             raise RuntimeError('FFCS_DB write error: Document failed validation for collection {}. '
                                'One of the required elements is missing or has wrong type. '
@@ -329,35 +739,109 @@ class ffcs_db_utils(object):
     ### FETCH_TAG add_campaign_library
 
     ### FETCH_TAG get_all_wells
-    def get_all_wells(self, user_account, campaign_id):
+    def get_all_wells(self, user_account, campaign_id, projection=None, limit=None, after=None):
+        """
+        Returns all wells of the campaign. With limit, returns one page ordered by _id instead:
+        {'items': [...], 'next': token}, where the next page is requested with after=token.
+        """
         query = {'userAccount': user_account, 'campaignId': campaign_id}
         collection = self.__get_collection('wells')
-        r = collection.find(query)
-        wells = list(r)
-        # Convert the ObjectId to string
-        for well in wells:
-            well["_id"] = str(well["_id"])
-            if well["libraryId"]:
-                well["libraryId"] = str(well["libraryId"])
+        if limit:
+            page = self.__find_page(collection, query, limit, after,
+                                    projection=self.__wells_projection(projection))
+            self.__add_soak_duration(page['items'], projection)
+            return page
+        r = collection.find(query, self.__wells_projection(projection))
+        wells = self.__add_soak_duration(list(r), projection)
         return wells
     ### FETCH_TAG get_all_wells
 
+    ### FETCH_TAG get_all_wells_raw
+    def get_all_wells_raw(self, user_account, campaign_id, projection=None, omit_nulls=False):
+        """
+        Same wells as get_all_wells, returned as RawBSONDocument without decoding them to dicts.
+        soakDuration of soaking wells is computed by the server in the pipeline, since raw documents
+        cannot be updated in place. With omit_nulls the null fields are dropped by the server as well.
+        """
+        query = {'userAccount': user_account, 'campaignId': campaign_id}
+        now = datetime.datetime.now()  # soakTransferTime is stored in server local time
+        soaking = {'$and': [{'$eq': [{'$type': '$soakTransferTime'}, 'date']}, {'$ne': ['$fished', True]}]}
+        pipeline = [
+            {'$match': query},
+            {'$set': {'soakDuration': {'$cond': [
+                soaking,
+                {'$divide': [{'$subtract': [now, '$soakTransferTime']}, 1000]},
+                '$soakDuration'
+            ]}}}
+        ]
+        if projection:
+            pipeline.append({'$project': projection})
+        if omit_nulls:
+            pipeline.append({'$replaceWith': {'$arrayToObject': {'$filter': {
+                'input': {'$objectToArray': '$$ROOT'},
+                'cond': {'$ne': ['$$this.v', None]}
+            }}}})
+        collection = self.__get_raw_collection('wells')
+        return list(collection.aggregate(pipeline))
+    ### FETCH_TAG get_all_wells_raw
+
     ### FETCH_TAG get_wells_from_plate
-    def get_wells_from_plate(self, user_account, campaign_id, plate_id, **kwargs):
+    def get_wells_from_plate(self, user_account, campaign_id, plate_id, projection=None, **kwargs):
         query = {'userAccount': user_account, 'plateId': plate_id, 'campaignId': campaign_id}
         # query = {**query, **kwargs}
         query = self.__merge_two_dictionaries(query, kwargs)  # for python 2.* compatibility
         collection = self.__get_collection('wells')
-        r = collection.find(query)
-        listr = list(r)
+        r = collection.find(query, self.__wells_projection(projection))
+        listr = self.__add_soak_duration(list(r), projection)
         return listr
     ### FETCH_TAG get_wells_from_plate
 
+    ### FETCH_TAG stream_wells
+    def stream_wells(self, query, projection=None, batch_size=None):
+        """
+        Generator yielding the wells matching query in lists of at most batch_size documents, with
+        soakDuration computed as in get_all_wells. Only one batch is held in memory at a time, so it
+        is used to stream large campaigns instead of building the whole list.
+        :param query: MongoDB filter on the wells collection
+        :param projection: optional MongoDB projection
+        :param batch_size: documents per batch, defaults to Settings.STREAM_BATCH_SIZE
+        """
+        batch_size = max(1, int(batch_size or Settings.STREAM_BATCH_SIZE))
+        collection = self.__get_collection('wells')
+        cursor = collection.find(query, self.__wells_projection(projection), batch_size=batch_size)
+        try:
+            batch = []
+            for well in cursor:
+                batch.append(well)
+                if len(batch) >= batch_size:
+                    yield self.__add_soak_duration(batch, projection)
+                    batch = []
+            if batch:
+                yield self.__add_soak_duration(batch, projection)
+        finally:
+            cursor.close()
+    ### FETCH_TAG stream_wells
+
+    ### FETCH_TAG stream_all_wells
+    def stream_all_wells(self, user_account, campaign_id, projection=None, batch_size=None):
+        query = {'userAccount': user_account, 'campaignId': campaign_id}
+        return self.stream_wells(query, projection, batch_size)
+    ### FETCH_TAG stream_all_wells
+
+    ### FETCH_TAG stream_wells_from_plate
+    def stream_wells_from_plate(self, user_account, campaign_id, plate_id, projection=None, batch_size=None, **kwargs):
+        query = {'userAccount': user_account, 'plateId': plate_id, 'campaignId': campaign_id}
+        query = self.__merge_two_dictionaries(query, kwargs)
+        return self.stream_wells(query, projection, batch_size)
+    ### FETCH_TAG stream_wells_from_plate
+
     ### FETCH_TAG get_one_well
     def get_one_well(self, well_id):
         query = {'_id': well_id}
         collection = self.__get_collection('wells')
         r = collection.find_one(query)
+        if r is not None:
+            self.__add_soak_duration([r])
         return r
     ### FETCH_TAG get_one_well
     
@@ -405,17 +889,14 @@ class ffcs_db_utils(object):
     
         Returns:
             str or None: The SMILES string if found, otherwise None.
-    
-        Raises:
-            TypeError: If the record is not found and a NoneType access attempt occurs.
         """
         query = {'userAccount': user_account, 'campaignId': campaign_id, 'xtalName': xtal_name}
         collection = self.__get_collection('wells')
-        record = collection.find_one(query)
-        try:
-            return record['smiles']
-        except TypeError:  # Record is None because the document does not exist
+        record = collection.find_one(query, {'smiles': 1})
+        if record is None:
             return None
+        # 'smiles' is absent rather than null on wells stored without null defaults
+        return record.get('smiles')
     ### FETCH_TAG get_smiles
 
     ###
@@ -451,7 +932,7 @@ class ffcs_db_utils(object):
     ### FETCH_TAG import_library
 
     ### FETCH_TAG get_libraries
-    def get_libraries(self, **kwargs):
+    def get_libraries(self, limit=None, after=None, **kwargs):
         """
         Retrieves a list of all libraries from the 'libraries' collection in the database.
     
@@ -460,6 +941,9 @@ class ffcs_db_utils(object):
         extensibility where specific filtering based on user account or other criteria might be added.
     
         Args:
+            limit (int, optional): Page size. With limit one page ordered by _id is returned as
+                                   {'items': [...], 'next': token}.
+            after (str, optional): The 'next' token of the previous page.
             **kwargs: A placeholder for future arguments for filtering the results.
     
         Returns:
@@ -470,6 +954,8 @@ class ffcs_db_utils(object):
             The '_id' field of each library is automatically generated by MongoDB.
         """
         collection = self.__get_collection('libraries')
+        if limit:
+            return self.__find_page(collection, {}, limit, after)
         result = collection.find({})
         return list(result)
     ### FETCH_TAG get_libraries
@@ -501,7 +987,7 @@ class ffcs_db_utils(object):
     ### FETCH_TAG insert_campaign_library
 
     ### FETCH_TAG get_campaign_libraries
-    def get_campaign_libraries(self, user: str, campaign_id: str) -> list:
+    def get_campaign_libraries(self, user: str, campaign_id: str, limit=None, after=None) -> list:
         """
         Retrieves all libraries associated with a given user and campaign ID from the 'campaign_libraries' collection.
     
@@ -511,6 +997,9 @@ class ffcs_db_utils(object):
         Args:
             user (str): The identifier of the user account.
             campaign_id (str): The identifier of the campaign.
+            limit (int, optional): Page size. With limit one page ordered by _id is returned as
+                                   {'items': [...], 'next': token}.
+            after (str, optional): The 'next' token of the previous page.
     
         Returns:
             list: A list of dictionaries, each representing a library associated with the given user and campaign ID.
@@ -522,8 +1011,12 @@ class ffcs_db_utils(object):
         try:
             collection = self.__get_collection('campaign_libraries')
             query = {'userAccount': user, 'campaignId': campaign_id}
+            if limit:
+                return self.__find_page(collection, query, limit, after)
             result = collection.find(query)
             return list(result)
+        except ValueError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Error retrieving campaign libraries: {e}")
     ### FETCH_TAG get_campaign_libraries
@@ -576,7 +1069,7 @@ class ffcs_db_utils(object):
     ###
 
     ### FETCH_TAG get_not_matched_wells
-    def get_not_matched_wells(self, user, campaign_id):
+    def get_not_matched_wells(self, user, campaign_id, projection=None):
         """
         Retrieves wells from the database that are not matched based on specific criteria. These wells are filtered
         by user account and campaign ID and further based on the 'compoundCode' and 'cryoProtection' status.
@@ -587,6 +1080,7 @@ class ffcs_db_utils(object):
         Args:
             user (str): The user account identifier.
             campaign_id (str): The campaign identifier.
+            projection (dict, optional): MongoDB projection limiting the returned fields.
     
         Returns:
             List[dict]: A list of dictionaries, each representing a well that matches the query criteria.
@@ -604,7 +1098,7 @@ class ffcs_db_utils(object):
         }
     
         try:
-            result = collection.find(query)
+            result = collection.find(query, projection)
             return list(result)
         except Exception as e:
             raise RuntimeError(f"Error retrieving not matched wells: {e}")
@@ -884,6 +1378,63 @@ class ffcs_db_utils(object):
             raise RuntimeError(f"Error retrieving plate IDs for redesolve: {e}")
     ### FETCH_TAG get_id_of_plates_for_redesolve
 
+    ### FETCH_TAG export_selected_wells
+    def __export_selected_wells(self, user, campaign_id, data, query, export_time_field, status_field):
+        """
+        Shared implementation of the export_*_selected_wells methods.
+
+        The distinct plateIds in data are collapsed into a single update_many with an '$in' filter, so the
+        export costs the same number of database operations whatever the number of selected wells. Per-plate
+        counts are then read back with one aggregation over the wells stamped with this export time.
+
+        Args:
+            user (str): The user account associated with the wells.
+            campaign_id (str): The campaign ID associated with the wells.
+            data (list of dict): Each dict contains the 'plateId' of a well to update.
+            query (dict): Additional filter selecting the wells that are ready for this export.
+            export_time_field (str): Name of the export time field, set to the current time.
+            status_field (str): Name of the status field, set to 'exported'.
+
+        Returns:
+            dict: {'nModified': int, 'ok': float, 'n': int, 'plates': {plateId: nModified, ...}}
+        """
+        for well in data:
+            if not isinstance(well, dict) or 'plateId' not in well:
+                raise ValueError("Each item in data must be a dict with a 'plateId' key.")
+
+        plate_ids = list(dict.fromkeys(well['plateId'] for well in data))
+        wells_collection = self.__get_collection('wells')
+        now = datetime.datetime.now()
+
+        filter_query = self.__merge_two_dictionaries(query, {'userAccount': user,
+                                                             'campaignId': campaign_id,
+                                                             'plateId': {'$in': plate_ids},
+                                                             export_time_field: None})
+        update = {'$set': {export_time_field: now, status_field: 'exported'}}
+        plates = {plate_id: 0 for plate_id in plate_ids}
+
+        try:
+            result = wells_collection.update_many(filter_query, update)
+            if result.modified_count:
+                counts = wells_collection.aggregate([
+                    {'$match': {'userAccount': user, 'campaignId': campaign_id, 'plateId': {'$in': plate_ids},
+                                export_time_field: now, status_field: 'exported'}},
+                    {'$group': {'_id': '$plateId', 'count': {'$sum': 1}}}
+                ])
+                for count in counts:
+                    plates[count['_id']] = count['count']
+        except Exception as e:
+            raise Exception(f"Database update operation failed: {e}")
+
+        # Send a notification to the user about the update.
+        self.send_notification(user, campaign_id, 'wells', plate_ids=plate_ids)
+
+        return {'nModified': result.modified_count,
+                'ok': 1.0 if result.acknowledged else 0.0,
+                'n': result.matched_count,
+                'plates': plates}
+    ### FETCH_TAG export_selected_wells
+
     ### FETCH_TAG export_to_soak_selected_wells
     def export_to_soak_selected_wells(self, user, campaign_id, data):
         """
@@ -891,7 +1442,7 @@ class ffcs_db_utils(object):
 
         This function identifies wells based on the provided user and campaign ID that have not yet been exported and
         have 'libraryAssigned' set to True. It updates these wells, setting 'soakExportTime' to the current time and
-        'soakStatus' to 'exported'.
+        'soakStatus' to 'exported'. All plates in data are updated in a single database operation.
 
         Args:
             user (str): The user account associated with the wells.
@@ -899,40 +1450,14 @@ class ffcs_db_utils(object):
             data (list of dict): Each dict contains the 'plateId' of a well to update.
 
         Returns:
-            None: The function performs database updates but does not return a value.
+            dict: Matched and modified counts, with the modified count per plate under 'plates'.
 
         Raises:
+            ValueError: If an item in data does not contain the 'plateId' key.
             Exception: If any database operation fails.
         """
-        wells_collection = self.__get_collection('wells')
-        now = datetime.datetime.now()
-
-        for well in data:
-            if 'plateId' not in well:
-                raise ValueError("Each item in data must include a 'plateId'.")
-            
-            query = {
-                'userAccount': user,
-                'campaignId': campaign_id,
-                'plateId': well['plateId'],
-                'soakExportTime': None,
-                'libraryAssigned': True,
-                'soakStatus': 'pending'
-            }
-            update = {
-                '$set': {
-                    'soakExportTime': now,
-                    'soakStatus': 'exported'
-                }
-            }
-
-            try:
-                wells_collection.update_many(query, update)
-            except Exception as e:
-                raise Exception(f"Database update operation failed: {e}")
-
-        # Send a notification to the user about the update.
-        self.send_notification(user, campaign_id, 'wells')
+        query = {'libraryAssigned': True, 'soakStatus': 'pending'}
+        return self.__export_selected_wells(user, campaign_id, data, query, 'soakExportTime', 'soakStatus')
     ### FETCH_TAG export_to_soak_selected_wells
 
     ### FETCH_TAG export_cryo_to_soak_selected_wells
@@ -941,9 +1466,9 @@ class ffcs_db_utils(object):
         Updates the cryoExportTime to the current time and cryoStatus to 'exported' for the selected wells.
     
         This function is invoked to mark selected wells that are ready to have their 'cryo' data exported.
-        It updates the 'cryoExportTime' with the current timestamp and sets the 'cryoStatus' to 'exported'.
         It filters the wells based on the provided user and campaign ID and updates only those wells that
-        have 'cryoProtection' set to True and 'cryoStatus' set to 'pending'.
+        have 'cryoProtection' set to True and 'cryoStatus' set to 'pending'. All plates in data are updated
+        in a single database operation.
     
         Args:
             user: The username associated with the wells.
@@ -951,39 +1476,14 @@ class ffcs_db_utils(object):
             data: A list of dictionaries where each dictionary represents a selected well with its plate ID.
     
         Returns:
-            None: The function returns nothing but performs updates on the database and may send a notification.
+            dict: Matched and modified counts, with the modified count per plate under 'plates'.
     
         Raises:
+            ValueError: If an item in data does not contain the 'plateId' key.
             Exception: If there is an issue performing the update operation on the database.
         """
-        wells_collection = self.__get_collection('wells')
-        now = datetime.datetime.now()
-    
-        for well in data:
-            # Construct query to find non-exported plates only
-            query = {
-                'userAccount': user,
-                'campaignId': campaign_id,
-                'plateId': well['plateId'],
-                'cryoExportTime': None,
-                'cryoProtection': True,
-                'cryoStatus': 'pending'
-            }
-            update = {
-                '$set': {
-                    'cryoExportTime': now,
-                    'cryoStatus': 'exported'
-                }
-            }
-    
-            try:
-                # Perform the update operation on the wells collection
-                wells_collection.update_many(query, update, False)
-            except Exception as e:
-                raise Exception(f"Database update operation failed: {e}")
-    
-        # Optionally send a notification after the update operation
-        self.send_notification(user, campaign_id, 'wells')
+        query = {'cryoProtection': True, 'cryoStatus': 'pending'}
+        return self.__export_selected_wells(user, campaign_id, data, query, 'cryoExportTime', 'cryoStatus')
     ### FETCH_TAG export_cryo_to_soak_selected_wells
 
     ### FETCH_TAG export_redesolve_to_soak_selected_wells
@@ -991,9 +1491,9 @@ class ffcs_db_utils(object):
         """
         Updates 'redesolveExportTime' and 'redesolveStatus' for selected wells based on 'redesolve' data.
     
-        Iterates through a list of wells and updates the database to mark 'redesolveExportTime' with the
-        current timestamp and 'redesolveStatus' as 'exported'. This update is only applied to wells that are
-        pending export and have not been exported yet.
+        Marks 'redesolveExportTime' with the current timestamp and 'redesolveStatus' as 'exported'. This update
+        is only applied to wells that are pending export and have not been exported yet. All plates in data are
+        updated in a single database operation.
     
         Args:
             user: The username associated with the wells.
@@ -1001,45 +1501,61 @@ class ffcs_db_utils(object):
             data: A list of dictionaries, each representing a well with at least a 'plateId' key.
     
         Returns:
-            None: This function does not return any value.
+            dict: Matched and modified counts, with the modified count per plate under 'plates'.
     
         Raises:
             ValueError: If an item in 'data' does not contain the required 'plateId' key.
             Exception: If the database operation fails for any reason.
         """
-        wells_collection = self.__get_collection('wells')
-        now = datetime.datetime.now()
-    
-        for well in data:
-            if not isinstance(well, dict) or 'plateId' not in well:
-                raise ValueError('Each item in data should be a dict with a "plateId" key.')
-            
-            # this will find only non exported plates
-            query = {
-                'userAccount': user,
-                'campaignId': campaign_id,
-                'plateId': well['plateId'],
-                'redesolveExportTime': None,
-                'redesolveApplied': True,
-                'redesolveStatus': 'pending'
-            }
-            update = {
-                '$set': {
-                    'redesolveExportTime': now,
-                    'redesolveStatus': 'exported'
-                }
-            }
-    
-            # Attempt to update the database and handle potential exceptions.
-            try:
-                r = wells_collection.update_many(query, update)
-            except Exception as e:
-                raise Exception(f"Database update operation failed: {e}")
-    
-        # Send a notification regarding the update
-        self.send_notification(user, campaign_id, 'wells')
+        query = {'redesolveApplied': True, 'redesolveStatus': 'pending'}
+        return self.__export_selected_wells(user, campaign_id, data, query, 'redesolveExportTime', 'redesolveStatus')
     ### FETCH_TAG export_redesolve_to_soak_selected_wells
 
+    ### FETCH_TAG bulk_export
+    def __bulk_export(self, data, well_requests, plate_requests, export_time_field):
+        """
+        Shared implementation of export_to_soak, export_cryo_to_soak and export_redesolve_to_soak.
+
+        All well updates and all plate updates are sent as two unordered bulk_write calls. The number of
+        wells modified per plate is read back with one aggregation over the wells carrying the export time
+        of their plate.
+
+        Args:
+            data (list): The validated export data, [{'_id': plateId, 'soak_time': datetime_object}, ...].
+            well_requests (list): UpdateMany operations on the wells collection, one per plate.
+            plate_requests (list): UpdateOne operations on the plates collection, one per plate.
+            export_time_field (str): The well field set to 'soak_time' by well_requests.
+
+        Returns:
+            dict: Totals for the wells ('n', 'nModified') and plates ('platesMatched', 'platesModified'),
+                  'ok', and the number of wells modified per plate under 'plates'.
+        """
+        wells_collection = self.__get_collection('wells')
+        plates_collection = self.__get_collection('plates')
+        plates = {plate['_id']: 0 for plate in data}
+
+        try:
+            wells_result = wells_collection.bulk_write(well_requests, ordered=False)
+            plates_result = plates_collection.bulk_write(plate_requests, ordered=False)
+            if wells_result.modified_count:
+                match = {'$or': [{'plateId': plate['_id'], export_time_field: plate['soak_time']} for plate in data]}
+                counts = wells_collection.aggregate([
+                    {'$match': match},
+                    {'$group': {'_id': '$plateId', 'count': {'$sum': 1}}}
+                ])
+                for count in counts:
+                    plates[count['_id']] = count['count']
+        except Exception as e:
+            raise Exception(f"Database operation failed: {e}")
+
+        return {'nModified': wells_result.modified_count,
+                'ok': 1.0 if wells_result.acknowledged and plates_result.acknowledged else 0.0,
+                'n': wells_result.matched_count,
+                'platesMatched': plates_result.matched_count,
+                'platesModified': plates_result.modified_count,
+                'plates': plates}
+    ### FETCH_TAG bulk_export
+
     ### FETCH_TAG export_to_soak
     def export_to_soak(self, data):
         """
@@ -1051,7 +1567,8 @@ class ffcs_db_utils(object):
                 [{'_id': str, 'soak_time': datetime_object}, ...].
         
         Returns:
-            pymongo.results.UpdateResult: The result of the update operation on the plates collection.
+            dict: Totals of the well and plate updates over all plates, and the number of wells
+                modified per plate. See __bulk_export.
         
         Raises:
             ValueError: If 'data' is empty or if any entry lacks the '_id' or 'soak_time' keys.
@@ -1064,21 +1581,16 @@ class ffcs_db_utils(object):
             if not isinstance(item, dict) or '_id' not in item or 'soak_time' not in item:
                 raise ValueError("Each item in data must be a dict with '_id' and 'soak_time' keys.")
         
-        wells_collection = self.__get_collection('wells')
-        plates_collection = self.__get_collection('plates')
-        
+        well_requests = []
+        plate_requests = []
         for plate in data:
             query = {'plateId': plate['_id'], 'soakExportTime': None, 'libraryAssigned': True}
             query_plates = {'plateId': plate['_id']}
             update = {'$set': {'soakExportTime': plate['soak_time'], 'soakStatus': 'exported'}}
+            well_requests.append(pymongo.UpdateMany(query, update))
+            plate_requests.append(pymongo.UpdateOne(query_plates, update))
         
-            try:
-                r = wells_collection.update_many(query, update)
-                r_p = plates_collection.update_one(query_plates, update)
-            except Exception as e:
-                raise Exception(f"Database operation failed: {e}")
-        
-        return r_p
+        return self.__bulk_export(data, well_requests, plate_requests, 'soakExportTime')
     ### FETCH_TAG export_to_soak
 
     ### FETCH_TAG export_cryo_to_soak
@@ -1091,7 +1603,8 @@ class ffcs_db_utils(object):
                          Expected format: [{'_id': str, 'soak_time': datetime_object}, ...]
     
         Returns:
-            pymongo.results.UpdateResult: The result of the update operation on the wells collection.
+            dict: Totals of the well and plate updates over all plates, and the number of wells
+                  modified per plate. See __bulk_export.
     
         Raises:
             ValueError: If 'data' is empty or if any entry lacks the '_id' or 'soak_time' keys.
@@ -1104,9 +1617,8 @@ class ffcs_db_utils(object):
             if not isinstance(item, dict) or '_id' not in item or 'soak_time' not in item:
                 raise ValueError("Each item in data must be a dict with '_id' and 'soak_time'.")
     
-        wells_collection = self.__get_collection('wells')
-        plates_collection = self.__get_collection('plates')
-    
+        well_requests = []
+        plate_requests = []
         for plate in data:
             query = {'plateId': plate['_id'], 'cryoExportTime': None, 'cryoProtection': True}
             update = {
@@ -1117,14 +1629,10 @@ class ffcs_db_utils(object):
             }
             query_plates = {'plateId': plate['_id']}
             update_plates = {'$set': {'cryoProtection': True}}
+            well_requests.append(pymongo.UpdateMany(query, update))
+            plate_requests.append(pymongo.UpdateOne(query_plates, update_plates))
     
-            try:
-                wells_result = wells_collection.update_many(query, update)
-                plates_result = plates_collection.update_one(query_plates, update_plates)
-            except Exception as e:
-                raise Exception(f"Database operation failed: {e}")
-    
-        return wells_result
+        return self.__bulk_export(data, well_requests, plate_requests, 'cryoExportTime')
     ### FETCH_TAG export_cryo_to_soak
 
     ### FETCH_TAG export_redesolve_to_soak
@@ -1141,7 +1649,8 @@ class ffcs_db_utils(object):
                 the plate ID and the timestamp when the data was soaked.
     
         Returns:
-            UpdateResult: The result of the update operation from the wells collection.
+            dict: Totals of the well and plate updates over all plates, and the number of wells
+                modified per plate. See __bulk_export.
     
         Raises:
             ValueError: If `data` is empty or incorrectly formatted.
@@ -1151,25 +1660,18 @@ class ffcs_db_utils(object):
         if not data or not all('_id' in item and 'soak_time' in item for item in data):
             raise ValueError("Each dictionary in `data` must contain '_id' and 'soak_time' keys")
     
-        wells_collection = self.__get_collection('wells')
-        plates_collection = self.__get_collection('plates')
-    
+        well_requests = []
+        plate_requests = []
         for plate in data:
             # Construct the query and update dictionaries for wells and plates
             well_query = {'plateId': plate['_id'], 'redesolveExportTime': None, 'redesolveApplied': True}
             well_update = {'$set': {'redesolveExportTime': plate['soak_time'], 'redesolveStatus': 'exported'}}
             plate_query = {'plateId': plate['_id']}
             plate_update = {'$set': {'redesolveApplied': True}}
+            well_requests.append(pymongo.UpdateMany(well_query, well_update))
+            plate_requests.append(pymongo.UpdateOne(plate_query, plate_update))
     
-            # Execute the update operations
-            try:
-                well_result = wells_collection.update_many(well_query, well_update)
-                plate_result = plates_collection.update_one(plate_query, plate_update)
-            except Exception as e:
-                raise Exception(f"Database update operation failed: {e}")
-    
-        # Return the result of the update operation for wells
-        return well_result
+        return self.__bulk_export(data, well_requests, plate_requests, 'redesolveExportTime')
     ### FETCH_TAG export_redesolve_to_soak
 
     ### FETCH_TAG import_soaking_results
@@ -1177,40 +1679,124 @@ class ffcs_db_utils(object):
         """
         Imports soaking results by updating the SoakStatus of wells to 'Done'.
     
-        Processes a list of well data, each containing a 'plateId', 'wellEcho', and 'transferStatus'.
-        It updates the SoakStatus of each well, finds the corresponding user and campaign,
-        marks the soak for the well in echo as done, and sends a notification.
+        Processes a list of well data (the transfers of an Echo transfer report), each containing a 'plateId',
+        'wellEcho', and 'transferStatus'. The user and campaign are resolved for every distinct plate with a
+        single query, and all transfers are written with one unordered bulk_write of UpdateMany operations,
+        grouped by plate. A notification is sent once for each user and campaign that had wells updated.
     
         Args:
             wells_data (List[Dict[str, Any]]): A list of dictionaries, each representing well data
                                                 with keys 'plateId', 'wellEcho', and 'transferStatus'.
     
+        Returns:
+            dict: {'nMatched': int, 'nModified': int,
+                   'transfers': [{'plateId', 'wellEcho', 'matched', 'modified', 'error'}, ...]}
+                  with one entry per transfer, in the order of wells_data. 'matched' counts the wells that
+                  were ready for the transfer, 'modified' those that were updated. 'error' is None unless the
+                  transfer could not be applied (missing fields, unknown plate, or a repeated row for a well
+                  that an earlier row of wells_data already transferred).
+    
         Raises:
             ValueError: If wells_data is empty or None.
-            RuntimeError: If the user data is not found.
+            RuntimeError: If none of the plates in wells_data is found in the database.
         """
         if not wells_data:
             raise ValueError("wells_data list is empty or None.")
     
-        # Find user and campaign for given well based on plate_id from 1st element
-        # Assumes that all the plates in wells_data belong to the same user and same campaign
-        plate_id = wells_data[0]['plateId']
-        user_data = self.find_user_from_plate_id(plate_id)
-        if user_data is None:
-            raise RuntimeError(f"No user data found for plate_id {plate_id}")
+        # Find user and campaign for all the plates in wells_data with one query
+        plate_ids = list(dict.fromkeys(well.get('plateId') for well in wells_data))
+        plate_order = {plate_id: index for index, plate_id in enumerate(plate_ids)}
+        plates_collection = self.__get_collection('plates')
+        owners = {}
+        for plate in plates_collection.find({'plateId': {'$in': plate_ids}},
+                                            {'plateId': 1, 'userAccount': 1, 'campaignId': 1}):
+            owners.setdefault(plate['plateId'], (plate['userAccount'], plate['campaignId']))
+        if not owners:
+            raise RuntimeError(f"No user data found for plate_id {', '.join(map(str, plate_ids))}")
+    
+        # Build one UpdateMany per transferred well, grouped by plate
+        transfers = []
+        requests = []
+        seen = set()
+        now = datetime.datetime.now()
+        for well in wells_data:
+            plate_id = well.get('plateId')
+            well_echo = well.get('wellEcho')
+            transfer_status = well.get('transferStatus')
+            transfer = {'plateId': plate_id, 'wellEcho': well_echo, 'matched': 0, 'modified': 0, 'error': None}
+            transfers.append(transfer)
+            if not all([plate_id, well_echo, transfer_status]):
+                transfer['error'] = 'plateId, wellEcho and transferStatus are required'
+                continue
+            if plate_id not in owners:
+                transfer['error'] = f'No user data found for plate_id {plate_id}'
+                continue
+            if (plate_id, well_echo) in seen:
+                transfer['error'] = f'Duplicate transfer of well {well_echo} on plate {plate_id}'
+                continue
+            seen.add((plate_id, well_echo))
+            user, campaign_id = owners[plate_id]
+            query = {
+                'userAccount': user,
+                'campaignId': campaign_id,
+                'plateId': plate_id,
+                'wellEcho': well_echo,
+                'soakStatus': 'exported'
+            }
+            update = {
+                '$set': {
+                    'soakStatus': 'done',
+                    'soakTransferTime': now,
+                    'soakTransferStatus': transfer_status
+                }
+            }
+            requests.append((plate_order[plate_id], pymongo.UpdateMany(query, update)))
+        requests = [request for _, request in sorted(requests, key=lambda item: item[0])]
+    
+        result = {'nMatched': 0, 'nModified': 0, 'transfers': transfers}
+        if not requests:
+            return result
     
-        user = user_data['user']
-        campaign_id = user_data['campaign_id']
+        wells_collection = self.__get_collection('wells')
+
+        # Count the wells each transfer matches, i.e. the wells still 'exported', since the bulk result has no per-op counts
+        matched = {}
+        pipeline = [
+            {'$match': {'plateId': {'$in': list(owners)}, 'soakStatus': 'exported'}},
+            {'$group': {'_id': {'plateId': '$plateId', 'wellEcho': '$wellEcho',
+                                'userAccount': '$userAccount', 'campaignId': '$campaignId'},
+                        'count': {'$sum': 1}}}
+        ]
+        for group in wells_collection.aggregate(pipeline):
+            key = group['_id']
+            if owners.get(key['plateId']) == (key.get('userAccount'), key.get('campaignId')):
+                matched[(key['plateId'], key.get('wellEcho'))] = group['count']
+
+        bulk_result = wells_collection.bulk_write(requests, ordered=False)
+        result['nMatched'] = bulk_result.matched_count
+        result['nModified'] = bulk_result.modified_count
+    
+        # Read back which transfers matched: the updated wells are the ones stamped with this transfer time
+        updated = {}
+        campaigns = {}  # (user, campaign_id) -> updated plateIds
+        if bulk_result.modified_count:
+            query = {'plateId': {'$in': list(owners)}, 'soakTransferTime': now, 'soakStatus': 'done'}
+            projection = {'plateId': 1, 'wellEcho': 1, 'userAccount': 1, 'campaignId': 1}
+            for well in wells_collection.find(query, projection):
+                key = (well['plateId'], well['wellEcho'])
+                updated[key] = updated.get(key, 0) + 1
+                campaigns.setdefault((well['userAccount'], well['campaignId']), {})[well['plateId']] = None
+        for transfer in transfers:
+            if transfer['error'] is None:
+                key = (transfer['plateId'], transfer['wellEcho'])
+                transfer['modified'] = updated.get(key, 0)
+                transfer['matched'] = max(matched.get(key, 0), transfer['modified'])
     
-        # Update soak status for each well in the data
-        for well in wells_data:
-            plate_id = well['plateId']
-            well_echo = well['wellEcho']
-            transfer_status = well['transferStatus']
-            self.mark_soak_for_well_in_echo_done(user, campaign_id, plate_id, well_echo, transfer_status)
-                    
         # When all updates are done, send notification
-        self.send_notification(user, campaign_id, 'wells')
+        for (user, campaign_id), plate_ids in sorted(campaigns.items()):
+            self.send_notification(user, campaign_id, 'wells', plate_ids=list(plate_ids))
+    
+        return result
     ### FETCH_TAG import_soaking_results
 
     ### FETCH_TAG mark_soak_for_well_in_echo_done
@@ -1608,48 +2194,94 @@ class ffcs_db_utils(object):
         """
         Import fishing results into the ffcs_db.
         
-        This function iterates through an array of dictionaries containing fishing results, 
-        extracts relevant information, and performs several database operations.
+        The plates of all rows are resolved with one query, the wells that are already fished are prefetched
+        with one query, and the xtal numbers needed are reserved from the campaign counter with one call per
+        campaign (see reserve_xtal_numbers). All rows are then written with a single unordered bulk_write. Rows for crystals that
+        are already fished (in the database or earlier in the same file) are skipped.
         
         After completing all operations, it sends a notification for the userAccount: 'shifter', 
         and campaignId: 'shifter'.
         
         :param fishing_results: An array of dictionaries containing processed CSV file data from 'shifter'.
-        :return: The result of the last `update_shifter_fishing_result` operation.
+        :return: A dictionary in the old update result format {'nModified', 'ok', 'n'} with the totals over
+                 all rows, and 'nSkipped' for the rows of already fished crystals.
         
         Raises:
-            - RuntimeError: If the plateId is missing in the shifter result file.
+            - RuntimeError: If the plateId is missing in the shifter result file, or the plate is not found.
         """
-        
-        ### Iterate through each well_data dictionary in the fishing_results array
+        ### Extract plateId from each well_data, if it exists
+        plate_ids = []
         for well_data in fishing_results:
-            ### Extract plateId from well_data, if it exists
             try:
-                plate_id = well_data['plateId']
+                plate_ids.append(well_data['plateId'])
             except KeyError:
                 raise RuntimeError(
                     'ffcsdbclient:import_fishing_results -> plateId is missing in the shifter result file.'
                 )
+        plate_ids = list(dict.fromkeys(plate_ids))
+    
+        ### Find user and campaign information for all plates at once
+        owners = {}
+        for plate in self.__get_collection('plates').find({'plateId': {'$in': plate_ids}},
+                                                          {'plateId': 1, 'userAccount': 1, 'campaignId': 1}):
+            owners.setdefault(plate['plateId'], (plate['userAccount'], plate['campaignId']))
+        for plate_id in plate_ids:
+            if plate_id not in owners:
+                raise RuntimeError(f'Cannot find the user for plate: {plate_id}')
+    
+        ### Prefetch the wells that are already fished
+        wells_collection = self.__get_collection('wells')
+        already_fished = {(well['plateId'], well['well'])
+                          for well in wells_collection.find({'plateId': {'$in': plate_ids}, 'fished': True},
+                                                            {'plateId': 1, 'well': 1})}
+    
+        ### Select the rows to write: skip crystals that are already fished, in the database or earlier in the file
+        rows = []
+        names_needed = {}
+        skipped = 0
+        for well_data in fishing_results:
+            plate_id = well_data['plateId']
+            owner = owners[plate_id]
+            well_id = well_data['plateRow'] + well_data['plateColumn'] + well_data['plateSubwell']
+            if (plate_id, well_id) in already_fished:
+                skipped += 1
+                continue
     
-            ### Generate the next xtal name index based on the plateId
-            xtal_name_index = self.get_next_xtal_number(plate_id)
-            
-            ### Find user and campaign information based on the plateId
-            user_info = self.find_user_from_plate_id(plate_id)
-            campaign_id = user_info['campaign_id']
-            
-            ### Update the shifter fishing result
-            r = self.update_shifter_fishing_result(
-                well_data, xtal_name_index, xtal_name_prefix=campaign_id
-            )
-            
-            ### Commented out: Optional sleep to ensure database write completion
-            ### time.sleep(0.1) 
+            fished, named = self.__shifter_comment_status(well_data['comment'])
+            if fished:
+                already_fished.add((plate_id, well_id))
+            if named:
+                names_needed[owner] = names_needed.get(owner, 0) + 1
+            rows.append((owner, well_data))
+    
+        ### Reserve the xtal numbers for each user and campaign in one call
+        next_numbers = {}
+        for (user, campaign_id), count in names_needed.items():
+            next_numbers[(user, campaign_id)] = self.reserve_xtal_numbers(user, campaign_id, count)
+    
+        ### Prepare one update per row
+        requests = []
+        for owner, well_data in rows:
+            query, update = self.__shifter_fishing_update(well_data, next_numbers.get(owner), xtal_name_prefix=owner[1])
+            if update['$set']['xtalName'] is not None:
+                next_numbers[owner] += 1
+            requests.append(pymongo.UpdateOne(query, update))
+    
+        result = {'nModified': 0, 'ok': 1.0, 'n': 0, 'nSkipped': skipped}
+        if requests:
+            bulk_result = wells_collection.bulk_write(requests, ordered=False)
+            result['nModified'] = bulk_result.modified_count
+            result['ok'] = 1.0 if bulk_result.acknowledged else 0.0
+            result['n'] = bulk_result.matched_count
     
         ### Send a notification once all well data has been processed
         self.send_notification('shifter', 'shifter', 'wells')
+        ### The notification above is not addressed to a campaign, bump the versions of the campaigns changed
+        if result['nModified']:
+            for user, campaign_id in sorted({owner for owner, _ in rows}):
+                self.bump_collection_version(user, campaign_id, 'wells')
         
-        return r
+        return result
     ### FETCH_TAG import_fishing_results
 
     ### FETCH_TAG find_user_from_plate_id
@@ -1685,13 +2317,15 @@ class ffcs_db_utils(object):
     ### FETCH_TAG find_user_from_plate_id
 
     ### FETCH_TAG find_last_fished_xtal
-    def find_last_fished_xtal(self, user, campaign_id):
+    def find_last_fished_xtal(self, user, campaign_id, limit=None, after=None):
         """
         This function fetches the most recently 'fished' crystal for a given user and campaign.
         It queries the MongoDB collection 'wells' and sorts the results by the 'shifterTimeOfDeparture' field in descending order.
     
         :param user: The account of the user
         :param campaign_id: The ID of the campaign
+        :param limit: Optional page size. With limit one page is returned as {'items': [...], 'next': token}
+        :param after: Token of the previous page ('next'), to fetch the following page
         :return: A list of dictionaries containing the 'fished' crystals
         :rtype: list
         """
@@ -1705,6 +2339,10 @@ class ffcs_db_utils(object):
             'fished': True
         }
         
+        if limit:
+            return self.__find_page(collection, query, limit, after,
+                                    sort_key='shifterTimeOfDeparture', direction=pymongo.DESCENDING)
+
         ### Execute the query and sort the results by 'shifterTimeOfDeparture' in descending order
         results = collection.find(query).sort('shifterTimeOfDeparture', pymongo.DESCENDING)
         
@@ -1715,9 +2353,8 @@ class ffcs_db_utils(object):
     ### FETCH_TAG get_next_xtal_number
     def get_next_xtal_number(self, plate_id):
         """
-        Given a plate_id, the function finds the owner and campaign_id of the plate.
-        It then looks for previously fished crystals and finds the last used xtal name.
-        Finally, it parses the name to determine the next available number for a new crystal.
+        Given a plate_id, the function finds the owner and campaign_id of the plate and
+        reads the next available number for a new crystal from the campaign's xtal name counter.
         
         :param plate_id: The plate identifier
         :return: An integer representing the next available crystal number
@@ -1729,32 +2366,113 @@ class ffcs_db_utils(object):
         if user_info is None:
             raise RuntimeError(f'Cannot find the user for plate: {plate_id}')
     
-        user = user_info['user']
-        campaign_id = user_info['campaign_id']
+        return self.get_next_xtal_number_for_campaign(user_info['user'], user_info['campaign_id'])
+    ### FETCH_TAG get_next_xtal_number
+
+    ### FETCH_TAG get_next_xtal_number_for_campaign
+    def get_next_xtal_number_for_campaign(self, user, campaign_id):
+        """
+        Returns the next available crystal number for the given user and campaign, read from the
+        xtal name counter, e.g. for display. The number is not reserved: update_shifter_fishing_result
+        and import_fishing_results reserve the numbers of the names they write (reserve_xtal_numbers).
         
-        ### Fetch the list of previously fished crystals for the user and campaign
-        xtals = self.find_last_fished_xtal(user, campaign_id)
-    
-        ### Create a list of previously used xtal numbers
-        xtals_list = []
-        for xtal in xtals:
-            xtal_name = xtal['xtalName']
-            if xtal_name is None:  # Indicates that fishing was unsuccessful
-                continue
-            
-            ### Assume xtal name is in the format "xtal-<number>" and extract the number
-            xtal_number = int(xtal_name.split('-')[-1])
-            
-            xtals_list.append(xtal_number)
-    
-        ### Find the next available xtal number
+        :param user: The account of the user
+        :param campaign_id: The ID of the campaign
+        :return: An integer representing the next available crystal number
+        """
+        collection = self.__get_collection('counters')
+        counter = collection.find_one({'_id': self.__xtal_counter_id(user, campaign_id)})
+        if counter is None:
+            return self.backfill_xtal_counter(user, campaign_id) + 1
+        return counter['value'] + 1
+    ### FETCH_TAG get_next_xtal_number_for_campaign
+
+    ### FETCH_TAG xtal_counter_id
+    @staticmethod
+    def __xtal_counter_id(user, campaign_id):
+        return {'userAccount': user, 'campaignId': campaign_id, 'name': 'xtalName'}
+    ### FETCH_TAG xtal_counter_id
+
+    ### FETCH_TAG reserve_xtal_numbers
+    def reserve_xtal_numbers(self, user, campaign_id, count=1):
+        """
+        Atomically reserves count consecutive crystal numbers for the given user and campaign.
+
+        The counter document holds the last number handed out and is incremented with find_one_and_update,
+        so concurrent imports never receive the same numbers. A missing counter is first backfilled from
+        the existing xtalNames of the campaign.
+
+        :param user: The account of the user
+        :param campaign_id: The ID of the campaign
+        :param count: How many numbers to reserve
+        :return: The first reserved number; the reserved numbers are first, ..., first + count - 1
+        """
+        if count < 1:
+            raise ValueError('count must be at least 1')
+        collection = self.__get_collection('counters')
+        query = {'_id': self.__xtal_counter_id(user, campaign_id)}
+        update = {'$inc': {'value': count}}
+        counter = collection.find_one_and_update(query, update, return_document=pymongo.ReturnDocument.AFTER)
+        if counter is None:
+            self.backfill_xtal_counter(user, campaign_id)
+            counter = collection.find_one_and_update(query, update, return_document=pymongo.ReturnDocument.AFTER)
+        return counter['value'] - count + 1
+    ### FETCH_TAG reserve_xtal_numbers
+
+    ### FETCH_TAG backfill_xtal_counter
+    def backfill_xtal_counter(self, user, campaign_id):
+        """
+        Raises the xtal name counter of the given user and campaign to the highest number used in the
+        existing xtalNames (names are in the format "<prefix>-<number>"). Uses '$max', so it is idempotent
+        and never lowers a counter that is already ahead.
+
+        :param user: The account of the user
+        :param campaign_id: The ID of the campaign
+        :return: The value of the counter, i.e. the last number handed out
+        """
+        collection = self.__get_collection('wells')
+        query = {'userAccount': user, 'campaignId': campaign_id, 'fished': True, 'xtalName': {'$ne': None}}
+        last_number = max((int(xtal['xtalName'].split('-')[-1])
+                           for xtal in collection.find(query, {'xtalName': 1, '_id': 0})), default=0)
+        return self.__raise_xtal_counter(user, campaign_id, last_number)
+    ### FETCH_TAG backfill_xtal_counter
+
+    ### FETCH_TAG backfill_all_xtal_counters
+    def backfill_all_xtal_counters(self):
+        """
+        One-off backfill of the xtal name counters of all campaigns from the existing xtalNames.
+        Safe to run again at any time, see backfill_xtal_counter.
+
+        :return: A dictionary {'userAccount/campaignId': counter value}
+        """
+        collection = self.__get_collection('wells')
+        pipeline = [
+            {'$match': {'fished': True, 'xtalName': {'$ne': None}}},
+            {'$group': {'_id': {'userAccount': '$userAccount', 'campaignId': '$campaignId'},
+                        'xtalNames': {'$push': '$xtalName'}}}
+        ]
+        counters = {}
+        for campaign in collection.aggregate(pipeline):
+            user = campaign['_id']['userAccount']
+            campaign_id = campaign['_id']['campaignId']
+            last_number = max(int(xtal_name.split('-')[-1]) for xtal_name in campaign['xtalNames'])
+            counters[f'{user}/{campaign_id}'] = self.__raise_xtal_counter(user, campaign_id, last_number)
+        return counters
+    ### FETCH_TAG backfill_all_xtal_counters
+
+    ### FETCH_TAG raise_xtal_counter
+    def __raise_xtal_counter(self, user, campaign_id, last_number):
+        collection = self.__get_collection('counters')
+        query = {'_id': self.__xtal_counter_id(user, campaign_id)}
+        update = {'$max': {'value': last_number}}
         try:
-            next_number = max(xtals_list) + 1
-        except ValueError:  # This means xtals_list is empty, so we default to 1
-            next_number = 1
-        
-        return next_number
-    ### FETCH_TAG get_next_xtal_number
+            counter = collection.find_one_and_update(query, update, upsert=True,
+                                                     return_document=pymongo.ReturnDocument.AFTER)
+        except pymongo.errors.DuplicateKeyError:
+            # Another request created the counter concurrently; apply '$max' to that document
+            counter = collection.find_one_and_update(query, update, return_document=pymongo.ReturnDocument.AFTER)
+        return counter['value']
+    ### FETCH_TAG raise_xtal_counter
 
     ### FETCH_TAG is_crystal_already_fished
     def is_crystal_already_fished(self, plateId, wellId):
@@ -1790,17 +2508,24 @@ class ffcs_db_utils(object):
     ### FETCH_TAG is_crystal_already_fished
 
     ### FETCH_TAG update_shifter_fishing_result
-    def update_shifter_fishing_result(self, well_shifter_data, xtal_name_index, xtal_name_prefix='xtal'):
+    def update_shifter_fishing_result(self, well_shifter_data, xtal_name_index=None, xtal_name_prefix='xtal'):
         """
         Update the fishing result based on the data received from the well shifter.
+
+        The number of the crystal name is reserved from the campaign's xtal name counter here, when the
+        result is written, so concurrent clients never write the same xtalName.
     
         Parameters:
         - well_shifter_data (dict): A dictionary with fishing result for given well.
-        - xtal_name_index (int): An integer number that will be added to xtal_name_prefix.
+        - xtal_name_index (int): Ignored, the number is reserved by reserve_xtal_numbers. Kept so older
+                                 clients, which sent the number from get_next_xtal_number, keep working.
         - xtal_name_prefix (str): A prefix used to create a crystal name.
     
         Returns:
         - pymongo.results.UpdateResult: The result of the MongoDB update operation.
+
+        Raises:
+        - RuntimeError: If the crystal is named and the user of the plate cannot be found.
         """
         plateId = well_shifter_data['plateId']
         wellId = well_shifter_data['plateRow'] + well_shifter_data['plateColumn'] + well_shifter_data['plateSubwell']
@@ -1808,6 +2533,34 @@ class ffcs_db_utils(object):
         ### Validate if the crystal is already fished
         if self.is_crystal_already_fished(plateId=plateId, wellId=wellId):
             return
+
+        xtal_number = None
+        _, named = self.__shifter_comment_status(well_shifter_data.get('comment'))
+        if named:
+            user_info = self.find_user_from_plate_id(plateId)
+            if user_info is None:
+                raise RuntimeError(f'Cannot find the user for plate: {plateId}')
+            xtal_number = self.reserve_xtal_numbers(user_info['user'], user_info['campaign_id'])
+
+        query, update = self.__shifter_fishing_update(well_shifter_data, xtal_number, xtal_name_prefix)
+        # a concurrent call for the same well writes once; its reserved number is then left unused
+        query['fished'] = {'$ne': True}
+        collection = self.__get_collection('wells')
+        result = collection.update_one(query, update, False)
+        return result
+    ### FETCH_TAG update_shifter_fishing_result
+
+    ### FETCH_TAG shifter_fishing_update
+    def __shifter_fishing_update(self, well_shifter_data, xtal_name_index, xtal_name_prefix='xtal'):
+        """
+        Builds the MongoDB query and update for the fishing result of one well, as received from the well shifter.
+        The crystal name is only set (and xtal_name_index used) when the shifter comment starts with 'OK'.
+    
+        Returns:
+        - tuple: (query, update)
+        """
+        plateId = well_shifter_data['plateId']
+        wellId = well_shifter_data['plateRow'] + well_shifter_data['plateColumn'] + well_shifter_data['plateSubwell']
     
         ### Sanitize data: Replace all empty fields with None
         for key, value in well_shifter_data.items():
@@ -1829,14 +2582,10 @@ class ffcs_db_utils(object):
     
         ### Determine fishing status and crystal name based on shifter comment
         comment = well_shifter_data['comment']
-        fished, xtal_name = False, None
-        if comment:
-            if comment.startswith('OK'):
-                fished, xtal_name = True, f"{xtal_name_prefix}-{xtal_name_index}"
-            elif comment.startswith('FAIL'):
-                fished = True
-    
-        ### Prepare MongoDB query and execute the update
+        fished, named = self.__shifter_comment_status(comment)
+        xtal_name = f"{xtal_name_prefix}-{xtal_name_index}" if named else None
+    
+        ### Prepare MongoDB query and update
         query = {'plateId': plateId, 'well': wellId}
         update = {
             '$set': {
@@ -1854,18 +2603,35 @@ class ffcs_db_utils(object):
             }
         }
     
-        collection = self.__get_collection('wells')
-        return collection.update_one(query, update, False)
-    ### FETCH_TAG update_shifter_fishing_result
+        return query, update
+    ### FETCH_TAG shifter_fishing_update
+
+    ### FETCH_TAG shifter_comment_status
+    @staticmethod
+    def __shifter_comment_status(comment):
+        """
+        Interprets the shifter comment of a well.
+
+        Returns:
+        - tuple: (fished, named) where fished is True if fishing was attempted ('OK...' or 'FAIL...'),
+                 and named is True if the crystal was mounted ('OK...') and gets an xtal name.
+        """
+        if comment and comment.startswith('OK'):
+            return True, True
+        if comment and comment.startswith('FAIL'):
+            return True, False
+        return False, False
+    ### FETCH_TAG shifter_comment_status
 
     ### FETCH_TAG get_soaked_wells
-    def get_soaked_wells(self, user, campaign_id):
+    def get_soaked_wells(self, user, campaign_id, projection=None):
         """
         Return list of wells that have been soaked but not yet fished.
         
         Parameters:
         - user (str): The user account identifier.
         - campaign_id (str): The identifier for the campaign.
+        - projection (dict, optional): MongoDB projection limiting the returned fields.
         
         Returns:
         - list: A list of dictionaries, each representing a well that has been soaked but not yet fished.
@@ -1883,11 +2649,23 @@ class ffcs_db_utils(object):
         }
     
         # Execute the query and fetch the result
-        result = collection.find(query)
+        result = collection.find(query, self.__wells_projection(projection))
         
-        return list(result)
+        return self.__add_soak_duration(list(result), projection)
     ### FETCH_TAG get_soaked_wells
 
+    ### FETCH_TAG has_soaking_wells
+    def has_soaking_wells(self, user, campaign_id):
+        """
+        True if the campaign has wells that are soaking (soakTransferTime set and not fished), i.e. whose
+        soakDuration is computed at read time and changes while nothing is written.
+        """
+        collection = self.__get_collection('wells')
+        query = {'userAccount': user, 'campaignId': campaign_id, 'soakTransferTime': {'$type': 'date'},
+                 'fished': {'$ne': True}}
+        return collection.find_one(query, {'_id': 1}) is not None
+    ### FETCH_TAG has_soaking_wells
+
     ### FETCH_TAG get_number_of_unsoaked_wells
     def get_number_of_unsoaked_wells(self, user, campaign_id):
         """
@@ -1911,52 +2689,58 @@ class ffcs_db_utils(object):
     ### FETCH_TAG get_number_of_unsoaked_wells
 
     ### FETCH_TAG update_soaking_duration
-    @send_notification('wells')
-    def update_soaking_duration(self, user, campaign_id, wells):
+    def update_soaking_duration(self, user, campaign_id, wells=None):
         """
-        Update the soakDuration field for wells by calculating the time elapsed since soakTransferTime.
+        Stores the soakDuration field (in seconds) of the soaking wells of a campaign, calculated
+        from soakTransferTime, in a single pipeline-style update_many.
+
+        The well read methods compute soakDuration when the wells are read, so this is only needed
+        where a stored value is required. No notification is sent: the stored value does not change
+        what the clients display.
         
         Parameters:
             user (str): The user making the request.
             campaign_id (str): The campaign ID associated with the wells.
-            wells (list): List of dictionaries containing well data.
+            wells (list): Optional list of dictionaries with the '_id' of the wells to update.
+                          By default all soaking wells of the campaign are updated.
             
         Returns:
             dict: A dictionary containing MongoDB update result information.
         """
         collection = self.__get_collection('wells')
+        # soakTransferTime is stored in server local time, hence the local clock rather than $$NOW (UTC)
         current_time = datetime.datetime.now()
     
-        for well in wells:
-            well_id = well['_id']
-            soak_start_time = well['soakTransferTime']
-            elapsed_time = current_time - soak_start_time
-            
-            query = {'_id': well_id}
-            update_operation = {'$set': {'soakDuration': elapsed_time.total_seconds()}}
-            
-            try:
-                result = collection.update_one(query, update_operation)
-            except Exception as e:
-                print(f"Failed to update soaking duration for well {well_id}: {e}")
-                return None
+        query = {'userAccount': user, 'campaignId': campaign_id, 'soakTransferTime': {'$ne': None}, 'fished': False}
+        if wells:
+            query['_id'] = {'$in': [well['_id'] for well in wells]}
+        # Subtracting two dates gives milliseconds
+        update_pipeline = [{'$set': {'soakDuration': {
+            '$divide': [{'$subtract': [current_time, '$soakTransferTime']}, 1000]}}}]
     
-            # Mimic the old update result structure
-            formatted_result = {'nModified': result.modified_count, 
-                                'ok': 1.0 if result.acknowledged else 0.0, 
-                                'n': result.matched_count}
+        try:
+            result = collection.update_many(query, update_pipeline)
+        except Exception as e:
+            print(f"Failed to update soaking duration for campaign {campaign_id}: {e}")
+            return None
+    
+        # Mimic the old update result structure
+        formatted_result = {'nModified': result.modified_count, 
+                            'ok': 1.0 if result.acknowledged else 0.0, 
+                            'n': result.matched_count}
         
         return formatted_result
     ### FETCH_TAG update_soaking_duration
 
     ### FETCH_TAG get_all_fished_wells
-    def get_all_fished_wells(self, user, campaign_id):
+    def get_all_fished_wells(self, user, campaign_id, projection=None):
         """
         Fetch all fished wells from the database for a given user and campaign ID.
         
         Parameters:
         - user: The user account
         - campaign_id: The campaign identifier
+        - projection: Optional MongoDB projection limiting the returned fields
         
         Returns:
         - List of dictionaries representing all fished wells for the user and campaign.
@@ -1968,7 +2752,7 @@ class ffcs_db_utils(object):
         query = {'userAccount': user, 'campaignId': campaign_id, 'fished': True}
         
         ### Execute the query
-        result = collection.find(query)
+        result = collection.find(query, projection)
         
         return list(result)
     ### FETCH_TAG get_all_fished_wells
@@ -2000,68 +2784,136 @@ class ffcs_db_utils(object):
     ### FETCH_TAG get_all_wells_not_exported_to_datacollection_xls
 
     ### FETCH_TAG mark_exported_to_xls
-    def mark_exported_to_xls(self, wells):
+    def mark_exported_to_xls(self, wells, chunk_size=1000):
         """
         Sets exportedToXls flag to True for documents in the 'wells' collection.
+
+        All listed wells are updated with update_many over their '_id', in chunks of chunk_size ids.
+        One notification is sent for each distinct user and campaign of the wells.
     
-        :param wells: List of dictionaries, each containing well data.
-        :return: A dictionary containing the last update result.
+        :param wells: List of dictionaries, each containing well data ('_id', 'userAccount', 'campaignId').
+        :param chunk_size: Maximum number of ids in one update_many.
+        :return: A dictionary with the total matched ('n') and modified ('nModified') counts.
         """
         well_collection = self.__get_collection('wells')
-        last_update_result = None  # Initialize last update result variable
-    
+        well_ids = [well_data['_id'] for well_data in wells]
+        campaigns = {}  # (user, campaign_id) -> well ids
         for well_data in wells:
-            user_account = well_data['userAccount']
-            campaign_id = well_data['campaignId']
-            well_id_query = {'_id': well_data['_id']}
-            update_action = {'$set': {'exportedToXls': True}}
-    
-            # Execute the update and capture the result
-            update_result = well_collection.update_one(well_id_query, update_action)
-    
-            # Mimic the old update result structure for compatibility
-            last_update_result = {
-                'nModified': update_result.modified_count,
-                'ok': 1.0 if update_result.acknowledged else 0.0,
-                'n': update_result.matched_count
-            }
+            campaigns.setdefault((well_data['userAccount'], well_data['campaignId']), []).append(well_data['_id'])
+        update_action = {'$set': {'exportedToXls': True}}
+
+        # Mimic the old update result structure for compatibility
+        update_result = {'nModified': 0, 'ok': 1.0, 'n': 0}
+        for start in range(0, len(well_ids), chunk_size):
+            result = well_collection.update_many({'_id': {'$in': well_ids[start:start + chunk_size]}}, update_action)
+            update_result['nModified'] += result.modified_count
+            update_result['n'] += result.matched_count
+            if not result.acknowledged:
+                update_result['ok'] = 0.0
     
         # Send notification
-        self.send_notification(user_account, campaign_id, 'wells')
-        return last_update_result
+        for (user_account, campaign_id), campaign_well_ids in sorted(campaigns.items()):
+            self.send_notification(user_account, campaign_id, 'wells', well_ids=campaign_well_ids)
+        return update_result
     ### FETCH_TAG mark_exported_to_xls
 
     ### FETCH_TAG send_notification
-    def send_notification(self, user_account, campaign_id, notification_type):
+    def send_notification(self, user_account, campaign_id, notification_type, plate_ids=None, well_ids=None,
+                          coalesce=True):
         """
         Sends a notification by inserting a new document into the notifications collection.
+        The version of the notified collection is bumped right away, see bump_collection_version.
+
+        With NOTIFICATIONS_COALESCE_SECONDS set, the notifications of the same user, campaign and type are
+        merged by the NotificationCoalescer and inserted as one document at the end of the window, with
+        the number of merged notifications ('count') and the reported plate and well ids.
         
         Parameters:
         - user_account (str): The account to which the notification is sent.
         - campaign_id (str): The ID of the campaign related to the notification.
         - notification_type (str): The type of the notification.
+        - plate_ids (list, optional): plateIds of the changed plates or wells.
+        - well_ids (list, optional): _ids of the changed wells.
+        - coalesce (bool): False inserts the notification immediately.
         
         Returns:
-        InsertOneResult: The result of the MongoDB insert operation.
+        InsertOneResult: The result of the MongoDB insert operation, None if the notification was coalesced.
         """
-        collection = self.__get_collection('notifications')
+        self.bump_collection_version(user_account, campaign_id, notification_type)
+        if coalesce and self._notification_coalescer is not None:
+            self._notification_coalescer.add(user_account, campaign_id, notification_type, plate_ids, well_ids)
+            return None
         doc = {
             'userAccount': user_account,
             'campaignId': campaign_id,
             'createdOn': datetime.datetime.now(),
-            'notification_type': notification_type
+            'notification_type': notification_type,
+            'count': 1,
+            'plateIds': list(plate_ids or []),
+            'wellIds': list(well_ids or [])
         }
-    
-        r = collection.insert_one(doc)
-        return r
+        return self.__insert_notification(doc)
     ### FETCH_TAG send_notification
 
+    ### FETCH_TAG insert_notification
+    def __insert_notification(self, doc):
+        collection = self.__get_collection('notifications')
+        return collection.insert_one(doc)
+    ### FETCH_TAG insert_notification
+
+    ### FETCH_TAG versions_id
+    @staticmethod
+    def __versions_id(user_account, campaign_id):
+        return {'userAccount': user_account, 'campaignId': campaign_id, 'name': 'versions'}
+    ### FETCH_TAG versions_id
+
+    ### FETCH_TAG bump_collection_version
+    def bump_collection_version(self, user_account, campaign_id, notification_type):
+        """
+        Increments the version of one collection ('wells', 'plates', 'library', ...) of a user and campaign.
+        The versions are kept in one document of the counters collection and are used by the server to
+        build ETags, so a read endpoint can answer a conditional GET without querying the data itself.
+
+        A 'wells' bump also stores whether the campaign has soaking wells ('soaking'), whose soakDuration
+        grows without any write; the ETag of well listings then includes the time.
+        """
+        update = {'$inc': {notification_type: 1}}
+        if notification_type == 'wells':
+            update['$set'] = {'soaking': self.has_soaking_wells(user_account, campaign_id)}
+        collection = self.__get_collection('counters')
+        collection.update_one({'_id': self.__versions_id(user_account, campaign_id)}, update, upsert=True)
+    ### FETCH_TAG bump_collection_version
+
+    ### FETCH_TAG update_soaking_version
+    def update_soaking_version(self, user_account, campaign_id):
+        """
+        Stores the 'soaking' flag in the versions of a user and campaign and returns it. bump_collection_version
+        keeps it up to date; this sets it for campaigns whose versions predate the flag.
+        """
+        soaking = self.has_soaking_wells(user_account, campaign_id)
+        collection = self.__get_collection('counters')
+        collection.update_one({'_id': self.__versions_id(user_account, campaign_id)},
+                              {'$set': {'soaking': soaking}}, upsert=True)
+        return soaking
+    ### FETCH_TAG update_soaking_version
+
+    ### FETCH_TAG get_collection_versions
+    def get_collection_versions(self, user_account, campaign_id):
+        """
+        Returns the collection versions of a user and campaign, e.g. {'wells': 12, 'plates': 3, 'soaking': False}.
+        Collections that were never notified are missing, i.e. at version 0.
+        """
+        collection = self.__get_collection('counters')
+        versions = collection.find_one({'_id': self.__versions_id(user_account, campaign_id)}, {'_id': 0})
+        return versions or {}
+    ### FETCH_TAG get_collection_versions
+
     ###
     ### Group of methods sending notifications
     ###
 
     ### FETCH_TAG get_notifications
-    def get_notifications(self, user_account, campaign_id, timestamp):
+    def get_notifications(self, user_account, campaign_id, timestamp, limit=None, after=None):
         """
         Fetches the notifications from the database for a given user account, campaign, and timestamp.
     
@@ -2069,26 +2921,181 @@ class ffcs_db_utils(object):
             user_account (str): The user account to filter notifications for.
             campaign_id (str): The campaign ID to filter notifications for.
             timestamp (datetime): The starting timestamp for filtering notifications.
+            limit (int, optional): Page size. With limit one page ordered by _id is returned as
+                                   {'items': [...], 'next': token}.
+            after (str, optional): The 'next' token of the previous page.
     
         Returns:
             list: List of dictionaries representing the notifications.
-    
-        Side-effects:
-            - Converts the MongoDB ObjectIds to string format in the "_id" fields.
         """
-        ### Find the notifications in the database and fetch them
-        cursor = self._db.Notifications.find(
-            {'userAccount': user_account, 'campaignId': campaign_id, 'createdOn': {'$gte': timestamp}},
-            cursor_type=pymongo.CursorType.TAILABLE_AWAIT
-        )
+        query = {'userAccount': user_account, 'campaignId': campaign_id, 'createdOn': {'$gte': timestamp}}
+        if limit:
+            return self.__find_page(self._db.Notifications, query, limit, after)
+
+        ### Find the notifications in the database and fetch them. Notifications is a regular, TTL managed
+        ### collection (see ensure_notifications_retention), pushed to clients by the notification stream
+        cursor = self._db.Notifications.find(query).sort('_id', pymongo.ASCENDING)
         notifications = list(cursor)
-    
-        ### Convert MongoDB ObjectIds to string format
-        for notification in notifications:
-            notification["_id"] = str(notification["_id"])
         return notifications
     ### FETCH_TAG get_notifications
 
+    ### FETCH_TAG watch_notifications
+    def watch_notifications(self, resume_after=None, max_await_time_ms=None):
+        """
+        Opens a change stream on the notifications collection reporting the inserted notifications
+        (change['fullDocument']). Change streams need a replica set; on a standalone server pymongo
+        raises OperationFailure.
+
+        Args:
+            resume_after (dict, optional): Resume token of an earlier change stream.
+            max_await_time_ms (int, optional): How long try_next() waits for a change before returning None.
+        """
+        collection = self.__get_collection('notifications')
+        return collection.watch([{'$match': {'operationType': 'insert'}}], resume_after=resume_after,
+                                max_await_time_ms=max_await_time_ms)
+    ### FETCH_TAG watch_notifications
+
+    ### FETCH_TAG get_notifications_since
+    def get_notifications_since(self, created_on, user_account=None, campaign_id=None):
+        """
+        Returns the notifications created at or after created_on minus NOTIFICATIONS_OVERLAP_SECONDS,
+        ordered by createdOn, optionally only those of one user and campaign. Used to follow the
+        collection without change streams. A notification can be inserted a little after its createdOn,
+        so the overlap window reads the last notifications again; callers drop them by their _id.
+        """
+        overlap = datetime.timedelta(seconds=float(Settings.NOTIFICATIONS_OVERLAP_SECONDS))
+        query = {'createdOn': {'$gte': created_on - overlap}}
+        if user_account is not None:
+            query['userAccount'] = user_account
+        if campaign_id is not None:
+            query['campaignId'] = campaign_id
+        collection = self.__get_collection('notifications')
+        return list(collection.find(query).sort([('createdOn', pymongo.ASCENDING), ('_id', pymongo.ASCENDING)]))
+    ### FETCH_TAG get_notifications_since
+
+    ### FETCH_TAG get_missed_notifications
+    def get_missed_notifications(self, user_account, campaign_id, resume_token=None, created_on=None):
+        """
+        Returns the notifications of a user and campaign that a reconnecting notification stream missed,
+        as (notification, resume token or None) pairs.
+
+        With the resume token of the last notification received, the change stream is replayed from it
+        until it is caught up. Without one, or when change streams are not available or the token is too
+        old, the notifications since created_on are read (with the overlap of get_notifications_since).
+        """
+        if resume_token is not None:
+            pipeline = [{'$match': {'operationType': 'insert', 'fullDocument.userAccount': user_account,
+                                    'fullDocument.campaignId': campaign_id}}]
+            collection = self.__get_collection('notifications')
+            try:
+                missed = []
+                with collection.watch(pipeline, resume_after=resume_token, max_await_time_ms=100) as stream:
+                    change = stream.try_next()
+                    while change is not None:
+                        missed.append((change['fullDocument'], change['_id']))
+                        change = stream.try_next()
+                return missed
+            except pymongo.errors.OperationFailure:
+                pass  # no replica set, or the token is no longer in the oplog
+        if created_on is None:
+            return []
+        return [(notification, None)
+                for notification in self.get_notifications_since(created_on, user_account, campaign_id)]
+    ### FETCH_TAG get_missed_notifications
+
+    ### FETCH_TAG get_changes_since
+    def get_changes_since(self, user_account, campaign_id, token=None, max_changes=10000):
+        """
+        Returns the wells and plates of a user and campaign that changed since token, so a client can patch
+        its local copy instead of reloading the campaign. Reads the database change stream (needs a replica
+        set) from token on, until it is caught up or max_changes changes were read.
+
+        Changes of the same document are merged into one entry:
+            {'collection': 'wells' | 'plates', '_id': ObjectId, 'operation': 'insert' | 'replace' | 'update' | 'delete',
+             'document': full document (insert, replace) or 'fields': {changed top level field: current value} (update)}
+        A delete event only has the _id of the document, so deletes are read from the tombstones the delete
+        paths insert with the user and campaign of the deleted documents.
+
+        Args:
+            user_account (str): The user account.
+            campaign_id (str): The campaign ID.
+            token (str, optional): Token returned by the previous call. None returns a starting token, with
+                                   at most the one change read to obtain it.
+            max_changes (int): Maximum number of change events read in one call.
+
+        Returns:
+            dict: {'changes': [...], 'token': token for the next call, 'complete': False if max_changes was hit}
+
+        Raises:
+            ValueError: If the token is malformed.
+            ChangesTokenExpired: If the changes since token are no longer in the oplog; reload everything then.
+            ChangesTokenUnavailable: If the change stream did not report a starting token yet; try again.
+        """
+        collection_names = {DbCollections().wells: 'wells', DbCollections().plates: 'plates'}
+        tombstones = DbCollections().tombstones
+        pipeline = [{'$match': {
+            'ns.coll': {'$in': list(collection_names) + [tombstones]},
+            'operationType': {'$in': ['insert', 'replace', 'update']},
+            'fullDocument.userAccount': user_account,
+            'fullDocument.campaignId': campaign_id
+        }}]
+        if token is not None:
+            try:
+                bytes.fromhex(token)
+            except ValueError:
+                raise ValueError('Invalid changes token: {}'.format(token))
+        resume_after = {'_data': token} if token is not None else None
+
+        changes = {}  # (collection, _id) -> merged change, in the order of first change
+        read = 0
+        try:
+            with self._db.watch(pipeline, resume_after=resume_after, full_document='updateLookup',
+                                max_await_time_ms=100) as stream:
+                while read < max_changes:
+                    if token is None and stream.resume_token is not None:
+                        break  # a starting token is all that was asked for
+                    # a new stream may only get its first resume token from the first getMore
+                    change = stream.try_next()
+                    if change is None:
+                        break
+                    read += 1
+                    if change['ns']['coll'] == tombstones:
+                        tombstone = change['fullDocument']
+                        key = (tombstone['collection'], tombstone['documentId'])
+                        operation = 'delete'
+                    else:
+                        key = (collection_names[change['ns']['coll']], change['documentKey']['_id'])
+                        operation = change['operationType']
+                    merged = changes.setdefault(key, {'collection': key[0], '_id': key[1]})
+                    if operation == 'update' and merged.get('operation') in ('insert', 'replace'):
+                        if change.get('fullDocument') is not None:
+                            merged['document'] = change['fullDocument']
+                    elif operation == 'update':
+                        description = change['updateDescription']
+                        full_document = change.get('fullDocument') or {}
+                        fields = merged.setdefault('fields', {})
+                        for path in list(description['updatedFields']) + list(description['removedFields']):
+                            field = path.split('.')[0]
+                            fields[field] = full_document.get(field)
+                        merged['operation'] = 'update'
+                    elif operation == 'delete':
+                        merged.pop('fields', None)
+                        merged.pop('document', None)
+                        merged['operation'] = 'delete'
+                    else:
+                        merged.pop('fields', None)
+                        merged['document'] = change['fullDocument']
+                        merged['operation'] = operation
+                next_token = stream.resume_token
+        except pymongo.errors.OperationFailure as e:
+            if e.code == 286:  # ChangeStreamHistoryLost
+                raise ChangesTokenExpired('Changes since {} are no longer available, reload the campaign'.format(token))
+            raise RuntimeError('Error reading changes: {}'.format(e))
+        if next_token is None:
+            raise ChangesTokenUnavailable('The change stream has no resume token yet, try again')
+        return {'changes': list(changes.values()), 'token': next_token['_data'], 'complete': read < max_changes}
+    ### FETCH_TAG get_changes_since
+
     ### FETCH_TAG check_if_db_connected
     def check_if_db_connected(self):
         """
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+
+import mongomock
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+sys.path.insert(0, APP_DIR)
+
+# ffcs_db_utils reads .env from the working directory when it is imported
+_env_dir = tempfile.mkdtemp()
+with open(os.path.join(_env_dir, '.env'), 'w') as env_file:
+    env_file.write('URI=mongodb://localhost:27017\nDATABASE_NAME=ffcs_test\n')
+_cwd = os.getcwd()
+os.chdir(_env_dir)
+try:
+    import ffcs_db_utils
+finally:
+    os.chdir(_cwd)
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """Settings with notification coalescing off, so notifications are inserted right away"""
+    monkeypatch.setattr(ffcs_db_utils.Settings, 'NOTIFICATIONS_COALESCE_SECONDS', 0)
+    return ffcs_db_utils.Settings
+
+
+@pytest.fixture
+def db(settings, monkeypatch):
+    monkeypatch.setattr(ffcs_db_utils, 'MongoClient', mongomock.MongoClient)
+    client = ffcs_db_utils.ffcs_db_utils()
+    yield client
+    client.close()
+
+
+def add_plate(db, plate_id='98765', user='e14965', campaign='EP_SmarGon'):
+    db._db['Plates'].insert_one({'userAccount': user, 'campaignId': campaign, 'plateId': plate_id,
+                                 'plateType': 'SwissCI-MRC-3d'})
+
+
+def make_well(plate_id, well, user='e14965', campaign='EP_SmarGon'):
+    return {'userAccount': user, 'campaignId': campaign, 'plateId': plate_id, 'well': well,
+            'wellEcho': well, 'x': 1, 'y': 2, 'xEcho': 1.0, 'yEcho': 2.0}
+
+
+@pytest.fixture
+def api(db, monkeypatch):
+    """TestClient of the server on the mongomock database, without running its startup"""
+    pytest.importorskip('fastapi')
+    pytest.importorskip('httpx')
+    from concurrent.futures import ThreadPoolExecutor
+
+    from fastapi.testclient import TestClient
+
+    import ffcs_db_server
+    from ffcs_db_notifications import NotificationHub
+
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ffcs_db')
+    monkeypatch.setattr(ffcs_db_server, 'client', db, raising=False)
+    monkeypatch.setattr(ffcs_db_server, 'db_executor', executor, raising=False)
+    monkeypatch.setattr(ffcs_db_server, 'notification_hub', NotificationHub(db), raising=False)
+    yield TestClient(ffcs_db_server.app)
+    executor.shutdown()
@@ -0,0 +1,54 @@
+import datetime
+import timeit
+import tracemalloc
+
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+import DbDataSchema
+from ffcs_db_responses import BSONResponse
+
+WELLS = 2000
+
+
+def wells_on_the_wire():
+    """The reply bytes of a campaign listing, as pymongo receives them from the server"""
+    wells = []
+    for n in range(WELLS):
+        well = DbDataSchema.WellDataSchema('e14965', 'EP_SmarGon', '98765', 'A%da' % n, 'A%d' % n, 1, 2, 1.0, 2.0)
+        well['_id'] = bson.ObjectId()
+        well['soakTransferTime'] = datetime.datetime(2024, 5, 1, 12, 0)
+        wells.append(well)
+    return b''.join(bson.encode(well) for well in wells)
+
+
+def decoded_body(wire):
+    return BSONResponse(bson.decode_all(wire)).body
+
+
+def raw_body(wire):
+    return BSONResponse(bson.decode_all(wire, CodecOptions(document_class=RawBSONDocument))).body
+
+
+def peak_memory(render, wire):
+    tracemalloc.start()
+    try:
+        render(wire)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_raw_passthrough_is_cheaper_than_decoding_to_dicts():
+    wire = wells_on_the_wire()
+    assert raw_body(wire) == decoded_body(wire) == wire
+
+    decoded_time = min(timeit.repeat(lambda: decoded_body(wire), number=3, repeat=3))
+    raw_time = min(timeit.repeat(lambda: raw_body(wire), number=3, repeat=3))
+    decoded_peak = peak_memory(decoded_body, wire)
+    raw_peak = peak_memory(raw_body, wire)
+    print(f'\n{WELLS} wells, {len(wire)} bytes: decoded {decoded_time / 3 * 1000:.1f} ms, '
+          f'peak {decoded_peak / 1e6:.1f} MB; raw {raw_time / 3 * 1000:.1f} ms, peak {raw_peak / 1e6:.1f} MB')
+    assert raw_time < decoded_time / 2
+    assert raw_peak < decoded_peak / 2
@@ -0,0 +1,64 @@
+import pytest
+from bson import ObjectId
+
+from conftest import make_well
+from ffcs_db_utils import ChangesTokenUnavailable
+
+
+class FakeChangeStream:
+    """Change stream replaying scripted events; resume_token is only known after the first try_next"""
+    def __init__(self, changes, resume_token=None):
+        self._changes = list(changes)
+        self.resume_token = resume_token
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def try_next(self):
+        self.resume_token = {'_data': '82%04d' % len(self._changes)}
+        return self._changes.pop(0) if self._changes else None
+
+
+def watch_returning(monkeypatch, db, stream):
+    monkeypatch.setattr(db._db, 'watch', lambda *args, **kwargs: stream, raising=False)
+
+
+def test_deletes_leave_tombstones_of_their_campaign(db):
+    ids = db.add_wells([make_well('98765', 'A1a'), make_well('98765', 'A2a'),
+                        make_well('11111', 'A1a', campaign='other')])['insertedIds']
+    assert db.delete_by_id('wells', str(ids[0]))
+    assert db.delete_by_query('wells', {'plateId': '11111'})
+    tombstones = list(db._db['Tombstones'].find({}, {'_id': 0, 'deletedOn': 0}))
+    assert tombstones == [
+        {'collection': 'wells', 'documentId': ids[0], 'userAccount': 'e14965', 'campaignId': 'EP_SmarGon'},
+        {'collection': 'wells', 'documentId': ids[2], 'userAccount': 'e14965', 'campaignId': 'other'}]
+    assert [well['_id'] for well in db.get_all_wells('e14965', 'EP_SmarGon')] == [ids[1]]
+
+
+def test_tombstones_are_reported_as_deletes(db, monkeypatch):
+    well_id = ObjectId()
+    tombstone = {'collection': 'wells', 'documentId': well_id, 'userAccount': 'e14965', 'campaignId': 'EP_SmarGon'}
+    watch_returning(monkeypatch, db, FakeChangeStream([
+        {'ns': {'coll': 'Wells'}, 'operationType': 'update', 'documentKey': {'_id': well_id},
+         'updateDescription': {'updatedFields': {'notes': 'x'}, 'removedFields': []}, 'fullDocument': None},
+        {'ns': {'coll': 'Tombstones'}, 'operationType': 'insert', 'documentKey': {'_id': ObjectId()},
+         'fullDocument': tombstone}]))
+    result = db.get_changes_since('e14965', 'EP_SmarGon', '8200')
+    assert result['changes'] == [{'collection': 'wells', '_id': well_id, 'operation': 'delete'}]
+    assert result['complete']
+
+
+def test_now_reads_once_for_a_starting_token(db, monkeypatch):
+    watch_returning(monkeypatch, db, FakeChangeStream([]))
+    assert db.get_changes_since('e14965', 'EP_SmarGon')['token'] == '820000'
+
+    class NoToken(FakeChangeStream):
+        def try_next(self):
+            return None
+
+    watch_returning(monkeypatch, db, NoToken([]))
+    with pytest.raises(ChangesTokenUnavailable):
+        db.get_changes_since('e14965', 'EP_SmarGon')
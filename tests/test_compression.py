@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from conftest import make_well
+
+URL = '/get_all_wells/?user_account=e14965&campaign_id=EP_SmarGon'
+WELLS = 500
+REQUESTS = 5
+
+
+def measure(client, encoding):
+    """Bytes on the wire and mean latency of the wells listing with the given Accept-Encoding"""
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = client.get(URL, headers={'Accept-Encoding': encoding})
+    latency = (time.perf_counter() - start) / REQUESTS
+    assert response.status_code == 200 and len(response.json()) == WELLS
+    return response.headers.get('content-encoding'), response.num_bytes_downloaded, latency
+
+
+@pytest.fixture
+def campaign(db):
+    db.add_wells([make_well('98765', 'A%da' % n) for n in range(WELLS)])
+
+
+def test_large_listings_are_compressed_small_ones_not(db, api):
+    db.add_wells([make_well('98765', 'A1a')])
+    small = api.get(URL + '&fields=well', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in small.headers
+
+    db.add_wells([make_well('98765', 'B%da' % n) for n in range(50)])
+    large = api.get(URL, headers={'Accept-Encoding': 'gzip'})
+    assert large.headers['content-encoding'] == 'gzip'
+    assert large.headers['vary'] == 'Accept-Encoding'
+    assert len(large.json()) == 51
+
+
+def test_gzip_bytes_on_the_wire(campaign, api):
+    identity = measure(api, 'identity')
+    gzip = measure(api, 'gzip, deflate')
+    print(f'\n{WELLS} wells: identity {identity[1]} bytes {identity[2] * 1000:.1f} ms, '
+          f'gzip {gzip[1]} bytes {gzip[2] * 1000:.1f} ms')
+    assert identity[0] is None and gzip[0] == 'gzip'
+    assert gzip[1] < identity[1] / 10
+
+
+def test_brotli_bytes_on_the_wire(campaign, api, settings):
+    brotli_asgi = pytest.importorskip('brotli_asgi')
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    # the endpoints with the middleware COMPRESSION=br adds instead of GZipMiddleware
+    brotli_app = FastAPI()
+    brotli_app.router.routes.extend(api.app.router.routes)
+    brotli_app.add_middleware(brotli_asgi.BrotliMiddleware, quality=int(settings.COMPRESSION_LEVEL),
+                              minimum_size=int(settings.COMPRESSION_MIN_SIZE), gzip_fallback=True)
+    client = TestClient(brotli_app)
+    identity = measure(client, 'identity')
+    br = measure(client, 'br')
+    preferred = measure(client, 'gzip, br')
+    gzip = measure(api, 'gzip')
+    print(f'\n{WELLS} wells: identity {identity[1]} bytes {identity[2] * 1000:.1f} ms, '
+          f'br {br[1]} bytes {br[2] * 1000:.1f} ms, gzip {gzip[1]} bytes {gzip[2] * 1000:.1f} ms')
+    assert (identity[0], br[0], preferred[0]) == (None, 'br', 'br')
+    assert br[1] < identity[1] / 10
+    assert br[1] <= gzip[1]
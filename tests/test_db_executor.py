@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+import ffcs_db_utils
+from ffcs_db_notifications import NotificationHub
+
+SLOW_CALL_SECONDS = 0.2
+
+
+@pytest.fixture
+def server(db, settings, monkeypatch):
+    """ffcs_db_server started as at deployment, with DB_MAX_WORKERS=3 and without the notification hub thread"""
+    pytest.importorskip('fastapi')
+    import ffcs_db_server
+
+    monkeypatch.setattr(settings, 'DB_MAX_WORKERS', '3')
+    monkeypatch.setattr(NotificationHub, 'start', lambda self: None)
+    # mongomock has no Collection.options()
+    monkeypatch.setattr(ffcs_db_utils.ffcs_db_utils, 'ensure_notifications_retention',
+                        lambda self: {'action': 'unchanged', 'expireAfterSeconds': None})
+    return ffcs_db_server
+
+
+class SlowCall:
+    """Stands in for a blocking database call and records how many run at the same time"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.threads = set()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.threads.add(threading.current_thread().name)
+        time.sleep(SLOW_CALL_SECONDS)
+        with self._lock:
+            self.active -= 1
+        return []
+
+
+def fire(server, slow_call, clients):
+    async def run():
+        await server.startup_event()
+        try:
+            server.client.get_all_wells = slow_call
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://ffcs') as http:
+                start = time.monotonic()
+                responses = await asyncio.gather(*[http.get('/get_all_wells/', params={'user_account': 'e14965'})
+                                                   for _ in range(clients)])
+                return responses, time.monotonic() - start
+        finally:
+            await server.shutdown_event()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('clients', [1, 3, 9])
+def test_throughput_scales_with_concurrent_clients_up_to_the_pool(server, clients):
+    slow_call = SlowCall()
+    responses, elapsed = fire(server, slow_call, clients)
+    assert [response.status_code for response in responses] == [200] * clients
+
+    workers = int(ffcs_db_utils.Settings.DB_MAX_WORKERS)
+    assert slow_call.max_active == min(clients, workers)
+    assert all(name.startswith('ffcs_db') for name in slow_call.threads)
+    # calls overlap: the time is set by the rounds of the pool, not by the number of clients
+    rounds = -(-clients // workers)
+    assert rounds * SLOW_CALL_SECONDS <= elapsed < (rounds + 0.9) * SLOW_CALL_SECONDS
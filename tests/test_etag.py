@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+
+import ffcs_db_utils
+from conftest import add_plate, make_well
+
+WELLS_URL = '/get_all_wells/?user_account=e14965&campaign_id=EP_SmarGon'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    import ffcs_db_server
+
+    class Clock(datetime.datetime):
+        now_value = datetime.datetime(2024, 5, 1, 12, 0, 10)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.now_value
+
+    monkeypatch.setattr(ffcs_db_server, 'datetime', Clock)
+    return Clock
+
+
+@pytest.fixture
+def collections_read(monkeypatch):
+    """Names of the collections the database client opens"""
+    names = []
+    get_collection = ffcs_db_utils.ffcs_db_utils._ffcs_db_utils__get_collection
+
+    def recording(self, name):
+        names.append(name)
+        return get_collection(self, name)
+
+    monkeypatch.setattr(ffcs_db_utils.ffcs_db_utils, '_ffcs_db_utils__get_collection', recording)
+    return names
+
+
+def start_soaking(db):
+    db._db['Wells'].update_many({}, {'$set': {'soakTransferTime': datetime.datetime.now(), 'fished': False}})
+    db.send_notification('e14965', 'EP_SmarGon', 'wells')
+
+
+def test_etag_changes_when_the_campaign_is_notified(db, api):
+    add_plate(db)
+    url = '/get_plates/e14965/EP_SmarGon'
+    etag = api.get(url).headers['ETag']
+    assert api.get(url, headers={'If-None-Match': etag}).status_code == 304
+    # the ETag depends on the representation asked for
+    assert api.get(url, headers={'Accept': 'application/msgpack'}).headers['ETag'] != etag
+
+    db.add_wells([make_well('98765', 'A1a')])  # notifies 'wells', which plate listings depend on
+    response = api.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+    etag = response.headers['ETag']
+
+    db.send_notification('e14965', 'other', 'wells')
+    db.send_notification('e14965', 'EP_SmarGon', 'fished_xtals')
+    assert api.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_soaking_wells_add_the_minute_to_the_etag(api, db, clock):
+    db.add_wells([make_well('98765', 'A1a')])
+    etag = api.get(WELLS_URL).headers['ETag']
+    assert db.get_collection_versions('e14965', 'EP_SmarGon')['soaking'] is False
+
+    start_soaking(db)
+    assert db.get_collection_versions('e14965', 'EP_SmarGon')['soaking'] is True
+    soaking = api.get(WELLS_URL).headers['ETag']
+    assert soaking != etag
+    clock.now_value = datetime.datetime(2024, 5, 1, 12, 0, 50)
+    assert api.get(WELLS_URL, headers={'If-None-Match': soaking}).status_code == 304
+    clock.now_value = datetime.datetime(2024, 5, 1, 12, 1, 5)
+    response = api.get(WELLS_URL, headers={'If-None-Match': soaking})
+    assert response.status_code == 200 and response.headers['ETag'] != soaking
+
+
+def test_not_modified_only_reads_the_counters(api, db, clock, collections_read):
+    db.add_wells([make_well('98765', 'A1a')])
+    start_soaking(db)
+    etag = api.get(WELLS_URL).headers['ETag']
+    del collections_read[:]
+    assert api.get(WELLS_URL, headers={'If-None-Match': etag}).status_code == 304
+    assert collections_read == ['counters']
+
+
+def test_soaking_flag_is_set_once_for_older_versions(api, db, clock, collections_read):
+    db.add_wells([make_well('98765', 'A1a')])
+    db._db['Wells'].update_many({}, {'$set': {'soakTransferTime': datetime.datetime.now(), 'fished': False}})
+    db._db['Counters'].update_many({}, {'$unset': {'soaking': ''}})
+    etag = api.get(WELLS_URL).headers['ETag']
+    assert db.get_collection_versions('e14965', 'EP_SmarGon')['soaking'] is True
+    del collections_read[:]
+    assert api.get(WELLS_URL, headers={'If-None-Match': etag}).status_code == 304
+    assert collections_read == ['counters']
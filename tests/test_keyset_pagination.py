@@ -0,0 +1,76 @@
+import datetime
+
+import pytest
+
+from conftest import make_well
+
+
+def add_wells(db, count):
+    return db.add_wells([make_well('98765', 'A%da' % n) for n in range(count)])['insertedIds']
+
+
+def test_keyset_pages_cover_all_wells_once(db):
+    ids = add_wells(db, 7)
+    seen, after = [], None
+    while True:
+        page = db.get_all_wells('e14965', 'EP_SmarGon', limit=3, after=after)
+        seen.extend(well['_id'] for well in page['items'])
+        after = page['next']
+        if after is None:
+            break
+    assert seen == sorted(ids)
+
+
+def test_page_after_is_stable_under_inserts(db):
+    ids = add_wells(db, 4)
+    first = db.get_all_wells('e14965', 'EP_SmarGon', limit=2)
+    add_wells(db, 1)
+    second = db.get_all_wells('e14965', 'EP_SmarGon', limit=2, after=first['next'])
+    assert [well['_id'] for well in second['items']] == sorted(ids)[2:]
+
+
+def test_fished_xtals_are_paged_newest_first_with_ties_and_nulls(db):
+    ids = add_wells(db, 5)
+    departure = datetime.datetime(2024, 5, 1, 12, 0)
+    times = [departure, departure + datetime.timedelta(hours=1), departure, None, departure]
+    for well_id, time in zip(ids, times):
+        db._db['Wells'].update_one({'_id': well_id}, {'$set': {'fished': True, 'shifterTimeOfDeparture': time}})
+    seen, after = [], None
+    while True:
+        page = db.find_last_fished_xtal('e14965', 'EP_SmarGon', limit=2, after=after)
+        seen.extend(well['_id'] for well in page['items'])
+        after = page['next']
+        if after is None:
+            break
+    tied = sorted([ids[0], ids[2], ids[4]], reverse=True)
+    assert seen == [ids[1]] + tied + [ids[3]]
+
+
+def test_invalid_page_token(db, api):
+    with pytest.raises(ValueError):
+        db.get_all_wells('e14965', 'EP_SmarGon', limit=2, after='not-a-token')
+    response = api.get('/get_all_wells/', params={'user_account': 'e14965', 'campaign_id': 'EP_SmarGon',
+                                                   'limit': 2, 'after': 'not-a-token'})
+    assert response.status_code == 400
+
+
+def test_pages_without_the_keys_in_the_projection(db, api):
+    ids = add_wells(db, 3)
+    page = db.get_all_wells('e14965', 'EP_SmarGon', projection={'_id': 0}, limit=2)
+    assert len(page['items']) == 2 and all('_id' not in well for well in page['items'])
+    rest = db.get_all_wells('e14965', 'EP_SmarGon', projection={'well': 1, '_id': 0}, limit=2, after=page['next'])
+    assert rest == {'items': [{'well': 'A2a'}], 'next': None}
+
+    for well_id in ids:
+        db._db['Wells'].update_one({'_id': well_id}, {'$set': {'fished': True,
+                                                               'shifterTimeOfDeparture': datetime.datetime.now()}})
+    page = db.find_last_fished_xtal('e14965', 'EP_SmarGon', limit=2, after=None)
+    assert page['next'] is not None
+    excluded = db._ffcs_db_utils__find_page(db._db['Wells'], {'fished': True}, 2, page['next'],
+                                            sort_key='shifterTimeOfDeparture', direction=-1,
+                                            projection={'shifterTimeOfDeparture': 0, '_id': 0})
+    assert [set(item) & {'_id', 'shifterTimeOfDeparture'} for item in excluded['items']] == [set()]
+
+    response = api.get('/get_all_wells/', params={'user_account': 'e14965', 'campaign_id': 'EP_SmarGon',
+                                                   'limit': 2, 'exclude': '_id'})
+    assert response.status_code == 200 and response.json()['next'] is not None
@@ -0,0 +1,47 @@
+import mongomock
+
+import ffcs_db_utils
+from conftest import make_well
+from ffcs_db_notifications import NotificationCoalescer
+
+
+def test_coalescer_merges_a_burst_into_one_notification():
+    inserted = []
+    coalescer = NotificationCoalescer(inserted.append, window_seconds=60)
+    coalescer.add('e14965', 'EP_SmarGon', 'wells', plate_ids=['98765'], well_ids=[1, 2])
+    coalescer.add('e14965', 'EP_SmarGon', 'wells', plate_ids=['98765', '11111'], well_ids=[2, 3])
+    coalescer.add('e14965', 'EP_SmarGon', 'plates')
+    assert inserted == []  # nothing is written before the window closes
+
+    coalescer.flush(('e14965', 'EP_SmarGon', 'wells'))
+    assert len(inserted) == 1
+    merged = inserted[0]
+    assert (merged['count'], merged['plateIds'], merged['wellIds'], merged['idsTruncated']) == \
+        (2, ['98765', '11111'], [1, 2, 3], False)
+
+    coalescer.flush(('e14965', 'EP_SmarGon', 'wells'))  # already flushed
+    coalescer.flush_all()
+    assert [n['notification_type'] for n in inserted] == ['wells', 'plates']
+
+
+def test_coalescer_truncates_the_ids():
+    inserted = []
+    coalescer = NotificationCoalescer(inserted.append, window_seconds=60)
+    coalescer.add('e14965', 'EP_SmarGon', 'wells', well_ids=range(NotificationCoalescer.MAX_IDS + 5))
+    coalescer.flush_all()
+    assert len(inserted[0]['wellIds']) == NotificationCoalescer.MAX_IDS and inserted[0]['idsTruncated']
+
+
+def test_close_flushes_the_pending_notifications(settings, monkeypatch):
+    monkeypatch.setattr(settings, 'NOTIFICATIONS_COALESCE_SECONDS', 60)
+    monkeypatch.setattr(ffcs_db_utils, 'MongoClient', mongomock.MongoClient)
+    db = ffcs_db_utils.ffcs_db_utils()
+    mongo = db._client
+    db.add_wells([make_well('98765', 'A1a')])
+    db.add_wells([make_well('98765', 'A2a')])
+    notifications = mongo[settings.DATABASE_NAME]['Notifications']
+    assert notifications.count_documents({}) == 0
+    assert db.get_collection_versions('e14965', 'EP_SmarGon')['wells'] == 2  # versions are bumped right away
+    db.close()
+    [merged] = list(notifications.find())
+    assert merged['count'] == 2 and len(merged['wellIds']) == 2
@@ -0,0 +1,175 @@
+import asyncio
+import datetime
+import threading
+import time
+
+import pymongo
+import pytest
+from bson import ObjectId
+
+from ffcs_db_notifications import NotificationHub, RecentIds, decode_event_id, encode_event_id
+
+
+def insert_notification(db, created_on, doc_id=None, campaign='EP_SmarGon'):
+    notification = {'_id': doc_id or ObjectId(), 'userAccount': 'e14965', 'campaignId': campaign,
+                    'createdOn': created_on, 'notification_type': 'wells'}
+    db._db['Notifications'].insert_one(notification)
+    return notification
+
+
+def test_recent_ids_drops_repeats_and_stays_bounded():
+    delivered = RecentIds(max_size=2)
+    first, second, third = ObjectId(), ObjectId(), ObjectId()
+    assert delivered.add(first) and delivered.add(second)
+    assert not delivered.add(second)
+    assert delivered.add(third)
+    assert delivered.add(first)  # forgotten once more than max_size ids were delivered
+
+
+def test_event_id_round_trip():
+    created_on = datetime.datetime(2024, 5, 1, 12, 0, 0)
+    notification = {'_id': ObjectId(), 'createdOn': created_on}
+    assert decode_event_id(encode_event_id(notification)) == (None, created_on)
+    token = {'_data': '8263A1'}
+    assert decode_event_id(encode_event_id(notification, token)) == (token, created_on)
+    with pytest.raises(ValueError):
+        decode_event_id(str(ObjectId()))
+    # without createdOn the time of the _id is used, in local time like createdOn
+    utc = datetime.datetime(2024, 5, 1, 10, 0, tzinfo=datetime.timezone.utc)
+    untimed = {'_id': ObjectId.from_datetime(utc)}
+    assert decode_event_id(encode_event_id(untimed)) == (None, utc.astimezone().replace(tzinfo=None))
+
+
+def test_notifications_since_reads_the_overlap_window(db, settings, monkeypatch):
+    monkeypatch.setattr(settings, 'NOTIFICATIONS_OVERLAP_SECONDS', 5)
+    now = datetime.datetime.now().replace(microsecond=0)
+    # the later notification has the smaller _id, as when it was made by another client
+    late = insert_notification(db, now, doc_id=ObjectId.from_datetime(now - datetime.timedelta(minutes=1)))
+    early = insert_notification(db, now - datetime.timedelta(seconds=3))
+    insert_notification(db, now - datetime.timedelta(seconds=10))
+    insert_notification(db, now, campaign='other')
+
+    found = db.get_notifications_since(now, 'e14965', 'EP_SmarGon')
+    assert [n['_id'] for n in found] == [early['_id'], late['_id']]
+    missed = db.get_missed_notifications('e14965', 'EP_SmarGon', created_on=now)
+    assert [(n['_id'], token) for n, token in missed] == [(early['_id'], None), (late['_id'], None)]
+
+
+def test_poll_publishes_out_of_order_ids_once(db):
+    async def collect():
+        hub = NotificationHub(db, poll_interval=0.01)
+        queue = hub.subscribe('e14965', 'EP_SmarGon')
+        thread = threading.Thread(target=hub._poll, daemon=True)
+        thread.start()
+        try:
+            await asyncio.sleep(0.05)
+            now = datetime.datetime.now()
+            newer = insert_notification(db, now)
+            # created later but with an older _id than the last published notification
+            older_id = ObjectId.from_datetime(datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1))
+            await asyncio.sleep(0.05)
+            older = insert_notification(db, now, doc_id=older_id)
+            await asyncio.sleep(0.1)
+        finally:
+            hub.stop()
+            thread.join(timeout=1)
+        received = []
+        while not queue.empty():
+            received.append(queue.get_nowait()[0]['_id'])
+        return received, newer['_id'], older['_id']
+
+    received, newer_id, older_id = asyncio.run(collect())
+    assert received == [newer_id, older_id]
+
+
+class FakeChangeStream:
+    """Replays changes and failures; afterwards stays open without changes"""
+    def __init__(self, events, resume_token):
+        self._events = list(events)
+        self.resume_token = resume_token
+        self.alive = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def try_next(self):
+        if not self._events:
+            time.sleep(0.01)
+            return None
+        event = self._events.pop(0)
+        if isinstance(event, Exception):
+            raise event
+        self.resume_token = event['_id']
+        return event
+
+
+class FakeClient:
+    def __init__(self, streams, missed=()):
+        self._streams = list(streams)
+        self.missed = list(missed)
+        self.resumed_from = []
+
+    def watch_notifications(self, resume_after=None, max_await_time_ms=None):
+        self.resumed_from.append(resume_after)
+        events, token = self._streams.pop(0)
+        return FakeChangeStream(events, token)
+
+    def get_notifications_since(self, created_on):
+        return [n for n in self.missed if n['createdOn'] >= created_on - datetime.timedelta(seconds=5)]
+
+
+def change(notification, token):
+    return {'_id': {'_data': token}, 'fullDocument': notification}
+
+
+def notification_at(created_on):
+    return {'_id': ObjectId(), 'userAccount': 'e14965', 'campaignId': 'EP_SmarGon', 'createdOn': created_on}
+
+
+def run_watch(client, expected):
+    async def collect():
+        hub = NotificationHub(client, poll_interval=0.01)
+        queue = hub.subscribe('e14965', 'EP_SmarGon')
+        thread = threading.Thread(target=hub._watch, daemon=True)
+        thread.start()
+        received = []
+        try:
+            while len(received) < expected:
+                notification, token = await asyncio.wait_for(queue.get(), timeout=2)
+                received.append((notification['_id'], token))
+            await asyncio.sleep(0.05)
+            assert queue.empty()
+        finally:
+            hub.stop()
+            thread.join(timeout=1)
+        return received
+
+    return asyncio.run(collect())
+
+
+def test_failed_change_stream_resumes_from_its_token():
+    now = datetime.datetime.now()
+    first, second = notification_at(now), notification_at(now)
+    client = FakeClient([
+        ([change(first, '01'), pymongo.errors.OperationFailure('interrupted', code=11601)], None),
+        ([change(second, '02')], {'_data': '01'}),
+    ])
+    received = run_watch(client, 2)
+    assert received == [(first['_id'], {'_data': '01'}), (second['_id'], {'_data': '02'})]
+    assert client.resumed_from == [None, {'_data': '01'}]
+
+
+def test_lost_change_stream_catches_up_from_the_collection():
+    now = datetime.datetime.now() + datetime.timedelta(seconds=1)
+    first, missed, later = notification_at(now), notification_at(now), notification_at(now)
+    client = FakeClient([
+        ([change(first, '01'), pymongo.errors.OperationFailure('history lost', code=286)], None),
+        ([change(later, '03')], {'_data': '03'}),
+    ], missed=[first, missed])
+    received = run_watch(client, 3)
+    # first is read again by the catch up but not published twice
+    assert received == [(first['_id'], {'_data': '01'}), (missed['_id'], None), (later['_id'], {'_data': '03'})]
+    assert client.resumed_from == [None, None]
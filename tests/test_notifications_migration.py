@@ -0,0 +1,36 @@
+import datetime
+import time
+
+import mongomock
+import pytest
+from bson import ObjectId
+
+
+@pytest.fixture
+def zurich_time(monkeypatch):
+    monkeypatch.setenv('TZ', 'Europe/Zurich')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_backfilled_created_on_is_local_time_like_new_notifications(db, settings, zurich_time, monkeypatch):
+    monkeypatch.setattr(settings, 'NOTIFICATIONS_RETENTION_DAYS', 0)  # keep the old test notifications
+    monkeypatch.setattr(mongomock.Collection, 'options', lambda self: {}, raising=False)  # not in mongomock
+    winter = ObjectId.from_datetime(datetime.datetime(2024, 1, 15, 10, 0, tzinfo=datetime.timezone.utc))
+    summer = ObjectId.from_datetime(datetime.datetime(2024, 7, 15, 10, 0, tzinfo=datetime.timezone.utc))
+    notifications = db._db['Notifications']
+    notifications.insert_many([{'_id': winter, 'userAccount': 'e14965', 'campaignId': 'EP_SmarGon'},
+                               {'_id': summer, 'userAccount': 'e14965', 'campaignId': 'EP_SmarGon',
+                                'createdOn': 'not a date'}])
+    db.send_notification('e14965', 'EP_SmarGon', 'wells')
+
+    result = db.migrate_notifications()
+    assert result['createdOnFixed'] == 2
+    created_on = {n['_id']: n['createdOn'] for n in notifications.find()}
+    assert created_on[winter] == datetime.datetime(2024, 1, 15, 11, 0)
+    assert created_on[summer] == datetime.datetime(2024, 7, 15, 12, 0)
+    # the new notification was written in the same clock
+    newest = max(created_on.values())
+    assert abs(newest - datetime.datetime.now()) < datetime.timedelta(minutes=1)
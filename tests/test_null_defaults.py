@@ -0,0 +1,26 @@
+import datetime
+
+from conftest import make_well
+
+
+def test_read_paths_without_null_defaults(db, settings, monkeypatch):
+    monkeypatch.setattr(settings, 'STORE_NULL_DEFAULTS', False)
+    result = db.add_wells([make_well('98765', 'A1a'), make_well('98765', 'A2a')])
+    assert result['nInserted'] == 2 and result['writeErrors'] == []
+    stored = db.get_one_well(result['insertedIds'][0])
+    assert 'smiles' not in stored and 'soakTransferTime' not in stored and 'xtalName' not in stored
+
+    assert len(db.get_all_wells('e14965', 'EP_SmarGon')) == 2
+    assert len(db.get_all_wells('e14965', 'EP_SmarGon', limit=1)['items']) == 1
+    assert len(db.get_wells_from_plate('e14965', 'EP_SmarGon', '98765')) == 2
+    # null queries also match the missing fields
+    assert len(db.get_not_matched_wells('e14965', 'EP_SmarGon')) == 2
+    assert db.get_soaked_wells('e14965', 'EP_SmarGon') == []
+    assert db.get_all_fished_wells('e14965', 'EP_SmarGon') == []
+    assert db.get_smiles('e14965', 'EP_SmarGon', 'missing') is None
+
+    # a well that got an xtalName but no ligand is still read without errors
+    db._db['Wells'].update_one({'_id': stored['_id']}, {'$set': {'xtalName': 'EP_SmarGon-x0001',
+                                                              'soakTransferTime': datetime.datetime.now()}})
+    assert db.get_smiles('e14965', 'EP_SmarGon', 'EP_SmarGon-x0001') is None
+    assert db.get_one_well(stored['_id'])['soakDuration'] >= 0
@@ -0,0 +1,40 @@
+import datetime
+
+from conftest import make_well
+
+
+def soaking_campaign(db):
+    db.add_wells([make_well('98765', 'A1a'), make_well('98765', 'A2a')])
+    started = datetime.datetime.now() - datetime.timedelta(minutes=5)
+    db._db['Wells'].update_many({}, {'$set': {'soakTransferTime': started, 'fished': False}})
+
+
+def test_soak_duration_fields_only_return_what_was_asked_for(db):
+    soaking_campaign(db)
+    projection = {'well': 1, 'soakDuration': 1}
+    reads = [
+        db.get_all_wells('e14965', 'EP_SmarGon', projection),
+        db.get_all_wells('e14965', 'EP_SmarGon', projection, limit=5)['items'],
+        db.get_wells_from_plate('e14965', 'EP_SmarGon', '98765', projection),
+        [well for batch in db.stream_all_wells('e14965', 'EP_SmarGon', projection) for well in batch],
+    ]
+    for wells in reads:
+        assert [set(well) for well in wells] == [{'_id', 'well', 'soakDuration'}] * 2
+        assert all(well['soakDuration'] >= 300 for well in wells)
+
+
+def test_excluded_soak_fields_still_give_the_soak_duration(db):
+    soaking_campaign(db)
+    wells = db.get_all_wells('e14965', 'EP_SmarGon', {'soakTransferTime': 0, 'fished': 0})
+    assert all('soakTransferTime' not in well and 'fished' not in well for well in wells)
+    assert all(well['soakDuration'] >= 300 for well in wells)
+
+
+def test_requested_soak_fields_are_kept(db, api):
+    soaking_campaign(db)
+    wells = db.get_all_wells('e14965', 'EP_SmarGon', {'soakDuration': 1, 'fished': 1})
+    assert [set(well) for well in wells] == [{'_id', 'soakDuration', 'fished'}] * 2
+
+    response = api.get('/get_all_wells/', params={'user_account': 'e14965', 'campaign_id': 'EP_SmarGon',
+                                                   'fields': 'well,soakDuration'})
+    assert [set(well) for well in response.json()] == [{'_id', 'well', 'soakDuration'}] * 2
@@ -0,0 +1,33 @@
+import bson
+import pytest
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+from conftest import add_plate, make_well
+
+BSON = {'Accept': 'application/bson'}
+
+
+@pytest.fixture
+def raw_db(db):
+    try:
+        db._db['Wells'].with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+    except NotImplementedError as e:  # mongomock cannot return RawBSONDocument
+        pytest.skip(str(e))
+    return db
+
+
+def test_plates_are_passed_through_as_bson(raw_db, api):
+    add_plate(raw_db)
+    response = api.get('/get_plates/e14965/EP_SmarGon', headers=BSON)
+    assert response.headers['content-type'].startswith('application/bson')
+    plates = bson.decode_all(response.content)
+    assert [plate['plateId'] for plate in plates] == ['98765']
+    assert isinstance(plates[0]['_id'], bson.ObjectId)
+
+
+def test_raw_wells_match_the_decoded_wells(raw_db):
+    raw_db.add_wells([make_well('98765', 'A1a'), make_well('98765', 'A2a')])
+    raw = raw_db.get_all_wells_raw('e14965', 'EP_SmarGon')
+    decoded = raw_db.get_all_wells('e14965', 'EP_SmarGon')
+    assert [bson.decode(document.raw) for document in raw] == decoded
@@ -0,0 +1,39 @@
+import threading
+
+from conftest import add_plate, make_well
+
+
+def shifter_data(well, comment='OK'):
+    return {'plateId': '98765', 'plateRow': well[0], 'plateColumn': well[1], 'plateSubwell': well[2],
+            'comment': comment, 'xtalId': None, 'timeOfArrival': '', 'timeOfDeparture': '', 'duration': '',
+            'destinationName': 'PUCK1', 'destinationLocation': '1', 'barcode': None, 'externalComment': None}
+
+
+def xtal_names(db):
+    return sorted(well['xtalName'] for well in db._db['Wells'].find({'xtalName': {'$ne': None}}))
+
+
+def test_concurrent_fishing_results_get_distinct_names(db):
+    add_plate(db)
+    wells = ['A%da' % n for n in range(1, 9)]
+    db.add_wells([make_well('98765', well) for well in wells])
+    peeked = db.get_next_xtal_number('98765')
+
+    # every client peeked the same number, as the GUI does before writing
+    threads = [threading.Thread(target=db.update_shifter_fishing_result, args=(shifter_data(well), peeked))
+               for well in wells]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert xtal_names(db) == sorted('xtal-%d' % n for n in range(1, 9))
+    assert db.get_next_xtal_number('98765') == 9
+
+
+def test_failed_and_repeated_results_do_not_take_names(db):
+    add_plate(db)
+    db.add_wells([make_well('98765', 'A1a'), make_well('98765', 'A2a')])
+    db.update_shifter_fishing_result(shifter_data('A1a', comment='FAIL'), 1)
+    db.update_shifter_fishing_result(shifter_data('A2a'), 1)
+    assert db.update_shifter_fishing_result(shifter_data('A2a'), 1) is None  # already fished
+    assert xtal_names(db) == ['xtal-1']